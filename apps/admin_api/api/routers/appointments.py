@@ -4,8 +4,15 @@ from sqlalchemy.orm import Session
 
 from core.db import get_db
 from core.models import Appointment
-from core.schemas.appointment import AppointmentRead
-from core.schemas.admin_appointment import AppointmentStatusUpdate
+from core.schemas.appointment import AppointmentRead, AppointmentReschedule
+from core.schemas.admin_appointment import (
+    AppointmentStatusUpdate,
+    AppointmentBulkCreate,
+    AppointmentBulkItemResult,
+    AppointmentBulkCreateResponse,
+)
+from core.business.appointments import BookingRequest, apply_status_change, create_appointments_bulk, reschedule_appointment
+from core.business.booking_locks import BookingBusyError
 
 router = APIRouter(prefix="/appointments", tags=["appointments"])
 
@@ -54,6 +61,42 @@ def list_appointments(
 
     return query.order_by(Appointment.start_datetime.desc()).all()
 
+"""
+4-4-1. 예약 일괄 등록
+기능: 전화 예약/타 시스템 이관 예약을 한 번에 등록합니다.
+요구사항: 한 트랜잭션으로 검증/저장하고 건별 결과(생성된 예약 또는 오류)를 반환
+"""
+@router.post("/bulk", response_model=AppointmentBulkCreateResponse)
+def bulk_create_appointments(payload: AppointmentBulkCreate, db: Session = Depends(get_db)):
+    """
+    POST /api/v1/admin/appointments/bulk
+    """
+    requests = [
+        BookingRequest(
+            patient_name=item.patient_name,
+            patient_phone=item.patient_phone,
+            doctor_id=item.doctor_id,
+            treatment_id=item.treatment_id,
+            start_dt=item.start_datetime,
+            memo=item.memo,
+        )
+        for item in payload.items
+    ]
+    try:
+        results = create_appointments_bulk(db, requests)
+    except BookingBusyError as e:
+        raise HTTPException(409, str(e))
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    items = [
+        AppointmentBulkItemResult(index=i, error=r) if isinstance(r, str)
+        else AppointmentBulkItemResult(index=i, appointment=AppointmentRead.model_validate(r))
+        for i, r in enumerate(results)
+    ]
+    failed = sum(1 for item in items if item.error is not None)
+    return AppointmentBulkCreateResponse(created=len(items) - failed, failed=failed, results=items)
+
 """
 4-5. 예약 상태 수정
 기능: 예약의 상태를 변경합니다.
@@ -81,7 +124,29 @@ def update_appointment_status(
     if new_status not in allowed:
         raise HTTPException(400, f"Invalid transition: {appt.status} -> {new_status}")
 
-    appt.status = new_status
+    #취소된 예약은 예약 가능 시간/슬롯 사용 인원/환자 예약 수에 다시 반영
+    apply_status_change(db, appt, new_status)
     db.commit()
     db.refresh(appt)
     return appt
+
+"""
+4-6. 예약 시간 변경
+기능: 예약의 시작시간을 한 트랜잭션으로 옮깁니다. (자기 자신의 기존 구간은 중복/정원 검증에서 제외)
+"""
+@router.patch("/{appointment_id}/reschedule", response_model=AppointmentRead)
+def reschedule_appointment_admin(
+    appointment_id: int,
+    payload: AppointmentReschedule,
+    db: Session = Depends(get_db),
+):
+    appt = db.query(Appointment).filter(Appointment.id == appointment_id).first()
+    if not appt:
+        raise HTTPException(404, "Appointment not found")
+
+    try:
+        return reschedule_appointment(db, appt, payload.start_datetime)
+    except BookingBusyError as e:
+        raise HTTPException(409, str(e))
+    except ValueError as e:
+        raise HTTPException(400, str(e))
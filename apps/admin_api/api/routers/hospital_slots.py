@@ -1,3 +1,4 @@
+from datetime import date
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
@@ -5,6 +6,9 @@ from sqlalchemy import and_
 from core.db import get_db
 from core.models import HospitalSlot
 from core.schemas.hospital_slot import HospitalSlotCreate, HospitalSlotUpdate, HospitalSlotRead
+from core.business.slot_config import bump_slot_version
+from core.business.booking_locks import capacity_lock
+from core.business.slot_occupancy import counters_enabled, drop_slot_occupancy, occupied_dates, rebuild_slot_occupancy
 
 router = APIRouter(prefix="/hospital-slots", tags=["hospital-slots"])
 
@@ -33,6 +37,25 @@ def _validate_slot(payload: HospitalSlotCreate | HospitalSlotUpdate) -> None:
         raise HTTPException(400, "end_time must be on 30-minute boundary")
 
 
+def _commit_slot_change(db: Session, s: HospitalSlot, recount: bool) -> None:
+    """
+    슬롯 변경 / 캐시 버전 갱신 / 카운터 재계산을 한 트랜잭션으로 commit
+    - counter 모드면 카운터가 있는 날짜들의 (날짜) 잠금 안에서 재계산해서 그 사이 일괄 등록/시간 변경과 섞이지 않게 한다
+    """
+    bump_slot_version(db)
+    if not (counters_enabled() and recount):
+        db.commit()
+        db.refresh(s)
+        return
+
+    db.flush()
+    today = date.today()
+    with capacity_lock(db, occupied_dates(db, today)):
+        rebuild_slot_occupancy(db, date_from=today, slot_ids=[s.id], commit=False)
+        db.commit()
+    db.refresh(s)
+
+
 @router.post("", response_model=HospitalSlotRead, status_code=status.HTTP_201_CREATED)
 def create_slot(payload: HospitalSlotCreate, db: Session = Depends(get_db)):
     _validate_slot(payload)
@@ -48,8 +71,8 @@ def create_slot(payload: HospitalSlotCreate, db: Session = Depends(get_db)):
 
     s = HospitalSlot(**payload.model_dump())
     db.add(s)
-    db.commit()
-    db.refresh(s)
+    #새 슬롯에 걸치는 기존 예약을 카운터에 반영 (오늘 이후)
+    _commit_slot_change(db, s, recount=True)
     return s
 
 
@@ -70,8 +93,8 @@ def update_slot(slot_id: int, payload: HospitalSlotUpdate, db: Session = Depends
     for k, v in data.items():
         setattr(s, k, v)
 
-    db.commit()
-    db.refresh(s)
+    #시간대가 바뀌면 해당 슬롯 카운터를 다시 계산 (오늘 이후)
+    _commit_slot_change(db, s, recount="start_time" in data or "end_time" in data)
     return s
 
 
@@ -80,6 +103,8 @@ def delete_slot(slot_id: int, db: Session = Depends(get_db)):
     s = db.query(HospitalSlot).filter(HospitalSlot.id == slot_id).first()
     if not s:
         raise HTTPException(404, "Slot not found")
+    drop_slot_occupancy(db, s.id)
     db.delete(s)
+    bump_slot_version(db)
     db.commit()
     return None
@@ -4,7 +4,8 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 
 from core.db import get_db
-from core.models import Appointment, HospitalSlot
+from core.models import Appointment
+from core.business.slot_config import get_slot_config
 from core.schemas.stats import AdminStatsResponse, StatusCount, DailyCount, TimeSlotCount, VisitTypeRatio
 
 router = APIRouter(prefix="/stats", tags=["stats"])
@@ -50,7 +51,7 @@ def get_stats(
     daily_counts = [DailyCount(date=str(d), count=c) for d, c in daily_rows]
 
     # 3) 시간대별 예약 현황 (HospitalSlot 30분 슬롯 기준, overlap 카운트)
-    slots = db.query(HospitalSlot).order_by(HospitalSlot.start_time.asc()).all()
+    slots = get_slot_config(db).slots
     time_slot_counts: list[TimeSlotCount] = []
     if slots:
         appts = query.filter(Appointment.status != "canceled").all()
@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 from core.db import get_db
 from core.models import Treatment
 from core.schemas.treatment import TreatmentCreate, TreatmentUpdate, TreatmentRead
+from core.business.availability_cache import invalidate_treatment_availability
 
 router = APIRouter(prefix="/treatments", tags=["treatments"])
 
@@ -52,6 +53,7 @@ def update_treatment(treatment_id: int, payload: TreatmentUpdate, db: Session =
     for k, v in data.items():
         setattr(t, k, v)
 
+    invalidate_treatment_availability(db, t.id)
     db.commit()
     db.refresh(t)
     return t
@@ -63,5 +65,6 @@ def delete_treatment(treatment_id: int, db: Session = Depends(get_db)):
     if not t:
         raise HTTPException(404, "Treatment not found")
     db.delete(t)
+    invalidate_treatment_availability(db, t.id)
     db.commit()
     return None
@@ -1,5 +1,6 @@
 from fastapi import FastAPI
 from core.db import init_db
+from core.utils.cache_purge import CachePurgeHintMiddleware
 from contextlib import asynccontextmanager
 
 @asynccontextmanager
@@ -11,6 +12,13 @@ async def lifespan(app: FastAPI):
     print("🛑 Patient API shutdown")
 
 app = FastAPI(title="Derm Clinic - Admin API", version="0.1.0", lifespan=lifespan)
+#데이터 변경 시 gateway 응답 캐시 무효화 힌트(X-Cache-Purge)
+app.add_middleware(CachePurgeHintMiddleware)
+
+#gateway 헬스 체크용
+@app.get("/health", include_in_schema=False)
+def health():
+    return {"status": "ok"}
 
 from apps.admin_api.api.routers.doctors import router as doctors_router
 from apps.admin_api.api.routers.treatments import router as treatments_router
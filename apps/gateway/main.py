@@ -1,11 +1,70 @@
 from fastapi import FastAPI, Request, Response, status
-import httpx, os
+import anyio, asyncio, httpx, os
+from contextlib import AsyncExitStack, asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 
+from apps.gateway.upstreams import Upstream, run_health_checks
+from apps.gateway.response_cache import ResponseCache, etag_matches
+from apps.gateway.single_flight import SingleFlight
+from core.utils.cache_purge import CACHE_PURGE_HEADER
+
+#gateway 동작 방식
+# - proxy: PATIENT_API_URL/ADMIN_API_URL로 HTTP 프록시 (기본)
+# - inprocess: patient_api/admin_api 앱을 gateway 프로세스 안에서 직접 호출 (단일 서버 설치용, localhost HTTP 왕복 없음)
+MODE = os.getenv("GATEWAY_MODE", "proxy")
+GATEWAY_MODES = ("proxy", "inprocess")
+#쉼표로 여러 replica 지정 가능 (apps/gateway/upstreams.py)
 PATIENT_API_URL = os.getenv("PATIENT_API_URL", "http://patient_api:8001")
 ADMIN_API_URL = os.getenv("ADMIN_API_URL", "http://admin_api:8002")
+#true면 요청/응답 본문을 버퍼링하지 않고 스트리밍으로 전달 (대용량 목록/내보내기)
+STREAMING = os.getenv("GATEWAY_STREAMING", "false").lower() in ("1", "true", "yes")
+#true면 동시에 들어온 동일한 GET(경로, 쿼리, COALESCE_HEADERS)은 upstream 호출 하나를 공유
+# (스트리밍 모드에서는 GATEWAY_CACHE_RULES의 공개 경로만 합치고 나머지는 스트리밍)
+COALESCE = os.getenv("GATEWAY_COALESCE", "true").lower() in ("1", "true", "yes")
+#응답이 달라질 수 있는 요청 헤더 (사용자별 응답은 합치지 않음)
+COALESCE_HEADERS = ("authorization", "cookie", "accept", "accept-encoding", "accept-language")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if MODE not in GATEWAY_MODES:
+        raise ValueError(f"GATEWAY_MODE must be one of {GATEWAY_MODES}")
+    async with AsyncExitStack() as stack:
+        # 앱 시작 시: upstream별 공유 클라이언트(연결 풀) 생성
+        if MODE == "inprocess":
+            app.state.upstreams = await _mount_inprocess(stack)
+        else:
+            app.state.upstreams = {
+                "patient": Upstream("patient", PATIENT_API_URL),
+                "admin": Upstream("admin", ADMIN_API_URL),
+            }
+        app.state.response_cache = ResponseCache.from_env()
+        app.state.single_flight = SingleFlight()
+        health_checks = None
+        if MODE == "proxy":
+            health_checks = asyncio.create_task(run_health_checks(list(app.state.upstreams.values())))
+        yield
+        # 앱 종료 시: 헬스 체크 중지, 연결 정리 (inprocess 앱 종료는 stack이 처리)
+        if health_checks is not None:
+            health_checks.cancel()
+        for upstream in app.state.upstreams.values():
+            await upstream.aclose()
+
+async def _mount_inprocess(stack: AsyncExitStack) -> dict[str, Upstream]:
+    """
+    patient_api/admin_api 앱의 lifespan을 실행하고 ASGI transport로 직접 호출하는 upstream 생성
+    - URL 경로, 헤더 처리, 응답 캐시/요청 합치기는 proxy 모드와 동일한 경로를 탄다
+    """
+    from apps.patient_api.main import app as patient_app
+    from apps.admin_api.main import app as admin_app
 
-app = FastAPI(title="Gateway API", version="0.1.0", redirect_slashes=False)
+    upstreams = {}
+    for name, sub_app in (("patient", patient_app), ("admin", admin_app)):
+        await stack.enter_async_context(sub_app.router.lifespan_context(sub_app))
+        upstreams[name] = Upstream(name, f"http://{name}_api", transport=httpx.ASGITransport(app=sub_app))
+    return upstreams
+
+app = FastAPI(title="Gateway API", version="0.1.0", redirect_slashes=False, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -20,64 +79,194 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-async def _proxy(request: Request, upstream_base: str, upstream_path: str) -> Response:
-    method = request.method
-    url = f"{upstream_base}{upstream_path}"
+#응답에서 제외할 hop-by-hop 헤더
+EXCLUDED_RESPONSE_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailers",
+    "transfer-encoding",
+    "upgrade",
+    # gateway 내부용 캐시 무효화 힌트
+    CACHE_PURGE_HEADER.lower(),
+}
+
+def _response_headers(upstream_response: httpx.Response) -> dict[str, str]:
+    return {
+        k: v for k, v in upstream_response.headers.items()
+        if k.lower() not in EXCLUDED_RESPONSE_HEADERS
+    }
+
+async def _proxy(request: Request, upstream_name: str, upstream_path: str) -> Response:
+    response_cache: ResponseCache = request.app.state.response_cache
+    ttl = response_cache.ttl_for(request, upstream_path)
+    if ttl is not None:
+        return await _proxy_cached(request, upstream_name, upstream_path, ttl)
+    if STREAMING and not _coalesced(request, upstream_path):
+        return await _proxy_streaming(request, upstream_name, upstream_path)
+
+    upstream_response = await _fetch(request, upstream_name, upstream_path)
+
+    # ✅ media_type는 지정하지 않는 게 가장 안전(헤더 그대로 전달)
+    return Response(
+        content=upstream_response.content,
+        status_code=upstream_response.status_code,
+        headers=_response_headers(upstream_response),
+    )
+
+def _coalesced(request: Request, upstream_path: str) -> bool:
+    if not COALESCE or request.method != "GET":
+        return False
+    #스트리밍 모드에서 합치면 응답 전체를 버퍼링하므로 작은 공개 응답(캐시 규칙 경로)만 합친다
+    return not STREAMING or request.app.state.response_cache.has_rule(upstream_path)
+
+async def _fetch(request: Request, upstream_name: str, upstream_path: str) -> httpx.Response:
+    """
+    버퍼링 모드 upstream 호출 (동일한 GET이 동시에 들어오면 호출 하나를 공유)
+    """
+    if not _coalesced(request, upstream_path):
+        return await _send_buffered(request, upstream_name, upstream_path)
+
+    key = (
+        upstream_name,
+        upstream_path,
+        str(request.query_params),
+        tuple(request.headers.get(name) for name in COALESCE_HEADERS),
+    )
+    single_flight: SingleFlight = request.app.state.single_flight
+    return await single_flight.do(key, lambda: _send_buffered(request, upstream_name, upstream_path))
+
+async def _send_buffered(request: Request, upstream_name: str, upstream_path: str) -> httpx.Response:
+    upstream: Upstream = request.app.state.upstreams[upstream_name]
 
     headers = dict(request.headers)
     headers.pop("host", None)
     headers.pop("content-length", None)  # ✅ 안전
     body = await request.body()
 
-    async with httpx.AsyncClient(follow_redirects=True, timeout=10.0) as client:
-        upstream_response = await client.request(
-            method=method,
-            url=url,
-            headers=headers,
-            params=request.query_params,   # ✅ query string 직접 붙이는 것보다 안전
-            content=body,
-        )
+    upstream_response = await upstream.send(
+        method=request.method,
+        path=upstream_path,
+        headers=headers,
+        params=request.query_params,   # ✅ query string 직접 붙이는 것보다 안전
+        content=body,
+    )
+    request.app.state.response_cache.apply_purge_hints(upstream_response)
+    return upstream_response
 
-    excluded = {
-        "connection",
-        "keep-alive",
-        "proxy-authenticate",
-        "proxy-authorization",
-        "te",
-        "trailers",
-        "transfer-encoding",
-        "upgrade",
-    }
-    response_headers = {
-        k: v for k, v in upstream_response.headers.items()
-        if k.lower() not in excluded
-    }
+async def _proxy_cached(request: Request, upstream_name: str, upstream_path: str, ttl: float) -> Response:
+    """
+    공개 GET 응답 캐시 (apps/gateway/response_cache.py)
+    - ETag를 붙이고 If-None-Match가 일치하면 304
+    - X-Cache: HIT/MISS
+    """
+    response_cache: ResponseCache = request.app.state.response_cache
+    key = response_cache.key(upstream_path, request)
+    entry = response_cache.get(key)
+    cache_status = "HIT"
+    if entry is None:
+        cache_status = "MISS"
+        upstream_response = await _fetch(request, upstream_name, upstream_path)
+        headers = _response_headers(upstream_response)
+        entry = response_cache.store(key, ttl, upstream_response, headers)
+        if entry is None:
+            # 오류 응답이나 upstream이 캐시를 거부한 응답은 그대로 전달
+            return Response(
+                content=upstream_response.content,
+                status_code=upstream_response.status_code,
+                headers=headers,
+            )
 
-    # ✅ media_type는 지정하지 않는 게 가장 안전(헤더 그대로 전달)
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"etag": entry.etag, "x-cache": cache_status})
     return Response(
-        content=upstream_response.content,
-        status_code=upstream_response.status_code,
-        headers=response_headers,
+        content=entry.body,
+        status_code=entry.status_code,
+        headers={**entry.headers, "etag": entry.etag, "x-cache": cache_status},
+    )
+
+async def _proxy_streaming(request: Request, upstream_name: str, upstream_path: str) -> Response:
+    """
+    요청/응답 본문을 gateway 메모리에 모으지 않고 도착하는 대로 전달
+    - 요청 본문이 있을 때만 request.stream()을 그대로 넘김 (content-length가 있으면 유지, 없으면 chunked)
+    - 응답은 upstream 바이트(압축 포함)를 그대로 StreamingResponse로 전달, 끝나거나 클라이언트가 끊으면 upstream 응답을 닫음
+    """
+    upstream: Upstream = request.app.state.upstreams[upstream_name]
+
+    headers = dict(request.headers)
+    headers.pop("host", None)
+    has_body = "content-length" in headers or "transfer-encoding" in headers
+
+    upstream_response = await upstream.send(
+        method=request.method,
+        path=upstream_path,
+        headers=headers,
+        params=request.query_params,
+        content=request.stream() if has_body else None,
+        stream=True,
     )
+    request.app.state.response_cache.apply_purge_hints(upstream_response)
+
+    return _RelayResponse(upstream_response)
+
+class _RelayResponse(StreamingResponse):
+    """
+    upstream 스트리밍 응답을 그대로 전달하고, 어떻게 끝나든 upstream 응답을 닫아 연결과 진행 중 요청 수를 돌려준다
+    - 클라이언트가 끊어 send가 OSError로 중단되면 background 작업이 실행되지 않고 본문 제너레이터도 닫히지 않으므로 여기서 닫는다
+    """
+
+    def __init__(self, upstream_response: httpx.Response):
+        super().__init__(
+            upstream_response.aiter_raw(),
+            status_code=upstream_response.status_code,
+            headers=_response_headers(upstream_response),
+        )
+        self.upstream_response = upstream_response
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            with anyio.CancelScope(shield=True):
+                await self.upstream_response.aclose()
+
+@app.exception_handler(httpx.TransportError)
+async def upstream_unavailable(request: Request, exc: httpx.TransportError) -> Response:
+    #모든 replica 연결 실패(재시도 포함) -> 502, 응답 시간 초과 -> 504
+    if isinstance(exc, httpx.TimeoutException):
+        return JSONResponse(status_code=status.HTTP_504_GATEWAY_TIMEOUT, content={"detail": "Upstream timed out"})
+    return JSONResponse(status_code=status.HTTP_502_BAD_GATEWAY, content={"detail": "Upstream unavailable"})
+
+@app.get("/gateway/stats")
+async def gateway_stats(request: Request) -> dict:
+    """
+    upstream별 요청 수/동시 요청 수/연결 풀 사용 현황, 응답 캐시 현황, 합쳐진 GET 요청 수
+    """
+    stats = {name: upstream.stats() for name, upstream in request.app.state.upstreams.items()}
+    stats["response_cache"] = request.app.state.response_cache.stats()
+    stats["coalescing"] = request.app.state.single_flight.stats()
+    return stats
 
 # root도 프록시되도록 2개 라우트로 분리
 # @app.api_route("/api/v1/patient", methods=["GET","POST","PUT","DELETE","PATCH","OPTIONS"])
 # async def proxy_patient_root(request: Request) -> Response:
-#     return await _proxy(request, PATIENT_API_URL, "/api/v1/patient")
+#     return await _proxy(request, "patient", "/api/v1/patient")
 
 @app.api_route("/api/v1/patient/{path:path}", methods=["GET","POST","PUT","DELETE","PATCH","OPTIONS"])
 async def proxy_patient_api(request: Request, path: str) -> Response:
     if request.method == "OPTIONS":
         return Response(status_code=status.HTTP_204_NO_CONTENT)
 
-    return await _proxy(request, PATIENT_API_URL, f"/api/v1/patient/{path}")
+    return await _proxy(request, "patient", f"/api/v1/patient/{path}")
 
 # @app.api_route("/api/v1/admin", methods=["GET","POST","PUT","DELETE","PATCH","OPTIONS"])
 # async def proxy_admin_root(request: Request) -> Response:
-#     return await _proxy(request, ADMIN_API_URL, "/api/v1/admin")
+#     return await _proxy(request, "admin", "/api/v1/admin")
 
 @app.api_route("/api/v1/admin/{path:path}", methods=["GET","POST","PUT","DELETE","PATCH","OPTIONS"])
 async def proxy_admin_api(request: Request, path: str) -> Response:
     if request.method == "OPTIONS":
         return Response(status_code=status.HTTP_204_NO_CONTENT)
-    return await _proxy(request, ADMIN_API_URL, f"/api/v1/admin/{path}")
+    return await _proxy(request, "admin", f"/api/v1/admin/{path}")
@@ -0,0 +1,117 @@
+import hashlib
+import os
+import time
+from typing import NamedTuple
+import httpx
+from fastapi import Request
+
+from core.utils.cache import LRUCache
+from core.utils.cache_purge import CACHE_PURGE_HEADER
+"""
+gateway 응답 캐시 (인증 없는 공개 GET)
+- 경로 prefix별 규칙(유지 시간)에 맞는 200 응답만 저장, 크기 제한 LRU
+- ETag(본문 해시)를 붙이고 If-None-Match가 같으면 본문 없이 304
+- upstream이 Cache-Control: no-store/no-cache/private 또는 Set-Cookie를 보내면 저장하지 않음 (opt-out)
+- upstream 응답의 X-Cache-Purge 헤더(경로 prefix 목록)로 해당 경로의 항목을 바로 제거
+  (다른 gateway 워커의 항목은 유지 시간이 지나야 반영)
+
+환경변수
+    GATEWAY_CACHE_SIZE   최대 항목 수 (기본 0 = 사용 안 함, docker-compose에서는 1024)
+    GATEWAY_CACHE_RULES  "경로prefix=초,..." (기본 의사 목록 60초, 예약 가능 시간 5초)
+"""
+
+DEFAULT_CACHE_RULES = "/api/v1/patient/doctors=60,/api/v1/patient/availability=5"
+_OPT_OUT_DIRECTIVES = ("no-store", "no-cache", "private")
+
+
+class CachedResponse(NamedTuple):
+    status_code: int
+    headers: dict[str, str]
+    body: bytes
+    etag: str
+    expires_at: float
+
+
+def parse_rules(value: str) -> list[tuple[str, float]]:
+    #"prefix=ttl,prefix=ttl" -> 긴 prefix 우선
+    rules = []
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        prefix, sep, ttl = item.rpartition("=")
+        if not sep or not prefix:
+            raise ValueError(f"Invalid GATEWAY_CACHE_RULES entry: {item}")
+        rules.append((prefix, float(ttl)))
+    return sorted(rules, key=lambda rule: len(rule[0]), reverse=True)
+
+
+def make_etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    #약한 비교 (W/ 무시), "*"는 항상 일치
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag == "*" or tag.removeprefix("W/") == etag for tag in candidates)
+
+
+class ResponseCache:
+    def __init__(self, maxsize: int, rules: list[tuple[str, float]]):
+        self.rules = rules
+        self.purged = 0
+        self._cache = LRUCache(maxsize)
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        return cls(
+            int(os.getenv("GATEWAY_CACHE_SIZE") or 0),
+            parse_rules(os.getenv("GATEWAY_CACHE_RULES", DEFAULT_CACHE_RULES)),
+        )
+
+    def has_rule(self, path: str) -> bool:
+        #캐시 크기와 무관하게 공개 경로 규칙에 해당하는지
+        return any(path.startswith(prefix) for prefix, _ in self.rules)
+
+    def ttl_for(self, request: Request, path: str) -> float | None:
+        """
+        캐시 대상이면 유지 시간(초), 아니면 None (GET + 인증 헤더 없음 + 규칙 일치)
+        """
+        if self._cache.maxsize <= 0 or request.method != "GET" or "authorization" in request.headers:
+            return None
+        for prefix, ttl in self.rules:
+            if path.startswith(prefix):
+                return ttl if ttl > 0 else None
+        return None
+
+    @staticmethod
+    def key(path: str, request: Request) -> tuple[str, str]:
+        #쿼리 파라미터 순서가 달라도 같은 항목
+        return path, "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+
+    def get(self, key: tuple[str, str]) -> CachedResponse | None:
+        return self._cache.get(key, valid=lambda entry: entry.expires_at > time.monotonic())
+
+    def store(self, key: tuple[str, str], ttl: float, response: httpx.Response, headers: dict[str, str]) -> CachedResponse | None:
+        if response.status_code != 200 or "set-cookie" in response.headers:
+            return None
+        cache_control = response.headers.get("cache-control", "").lower()
+        if any(directive in cache_control for directive in _OPT_OUT_DIRECTIVES):
+            return None
+        body = response.content
+        entry = CachedResponse(response.status_code, headers, body, make_etag(body), time.monotonic() + ttl)
+        self._cache.set(key, entry)
+        return entry
+
+    def purge(self, prefixes: list[str]) -> int:
+        removed = self._cache.pop_where(lambda key: key[0].startswith(tuple(prefixes)))
+        self.purged += removed
+        return removed
+
+    def apply_purge_hints(self, response: httpx.Response) -> int:
+        value = response.headers.get(CACHE_PURGE_HEADER)
+        if not value:
+            return 0
+        return self.purge([prefix.strip() for prefix in value.split(",") if prefix.strip()])
+
+    def stats(self) -> dict:
+        return {**self._cache.stats(), "purged": self.purged, "rules": dict(self.rules)}
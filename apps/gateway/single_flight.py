@@ -0,0 +1,37 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+"""
+동일한 요청의 동시 실행 합치기 (single flight)
+- 같은 키로 진행 중인 호출이 있으면 새로 호출하지 않고 그 결과를 함께 받는다.
+- 호출은 별도 task로 실행하므로 먼저 온 클라이언트가 연결을 끊어도 기다리던 요청은 결과를 받는다.
+"""
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    def __init__(self):
+        self.leaders = 0      # 실제로 실행된 호출 수
+        self.coalesced = 0    # 진행 중인 호출에 합쳐진 요청 수
+        self._in_flight: dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._in_flight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        #기다리던 요청이 모두 끊긴 경우에도 예외가 처리되지 않았다는 경고가 남지 않게 확인
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict[str, int]:
+        return {"leaders": self.leaders, "coalesced": self.coalesced, "in_flight": len(self._in_flight)}
@@ -0,0 +1,270 @@
+import asyncio
+import itertools
+import os
+import time
+from typing import Any, AsyncIterator, Callable
+import httpx
+"""
+gateway -> upstream(patient_api/admin_api) HTTP 클라이언트
+- upstream마다 오래 유지되는 AsyncClient 하나를 lifespan에서 만들고 닫는다 (요청마다 TCP 연결/클라이언트 생성 비용 제거)
+- upstream URL은 쉼표로 여러 replica를 지정할 수 있다 (PATIENT_API_URL="http://p1:8001,http://p2:8001")
+  - 분산 방식: 진행 중 요청이 가장 적은 replica(least_outstanding, 기본) 또는 round_robin
+  - 연결 실패/헬스 체크 실패 replica는 잠시 제외, 모두 제외되면 전체에서 선택
+  - 멱등 메서드(GET/HEAD/OPTIONS/PUT/DELETE)는 연결 오류 시 다른 replica로 한 번 재시도 (스트리밍 요청 본문은 재시도 불가)
+- 환경변수
+    GATEWAY_MAX_CONNECTIONS            upstream별 최대 연결 수 (기본 100)
+    GATEWAY_MAX_KEEPALIVE_CONNECTIONS  유지할 유휴 연결 수 (기본 20)
+    GATEWAY_KEEPALIVE_EXPIRY           유휴 연결 유지 시간(초) (기본 5)
+    GATEWAY_CONNECT_TIMEOUT / GATEWAY_READ_TIMEOUT / GATEWAY_WRITE_TIMEOUT / GATEWAY_POOL_TIMEOUT (초)
+    GATEWAY_LB_STRATEGY                least_outstanding | round_robin
+    GATEWAY_HEALTH_INTERVAL            헬스 체크 간격(초) (기본 5, 0이면 끔)
+    GATEWAY_HEALTH_PATH                헬스 체크 경로 (기본 /health)
+    GATEWAY_EJECT_SECONDS              실패한 replica 제외 시간(초) (기본 10)
+"""
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+LB_STRATEGIES = ("least_outstanding", "round_robin")
+HEALTH_CHECK_TIMEOUT_SECONDS = 2.0
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def client_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=_env_int("GATEWAY_MAX_CONNECTIONS", 100),
+        max_keepalive_connections=_env_int("GATEWAY_MAX_KEEPALIVE_CONNECTIONS", 20),
+        keepalive_expiry=_env_float("GATEWAY_KEEPALIVE_EXPIRY", 5.0),
+    )
+
+
+def client_timeout() -> httpx.Timeout:
+    return httpx.Timeout(
+        connect=_env_float("GATEWAY_CONNECT_TIMEOUT", 5.0),
+        read=_env_float("GATEWAY_READ_TIMEOUT", 10.0),
+        write=_env_float("GATEWAY_WRITE_TIMEOUT", 10.0),
+        pool=_env_float("GATEWAY_POOL_TIMEOUT", 5.0),
+    )
+
+
+class Replica:
+    """
+    upstream replica 하나의 상태 (진행 중 요청 수, 제외 시각)
+    """
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.ejected_until = 0.0
+
+    def available(self, now: float) -> bool:
+        return self.ejected_until <= now
+
+    def eject(self, seconds: float) -> None:
+        self.ejected_until = time.monotonic() + seconds
+
+    def stats(self, now: float) -> dict:
+        return {
+            "base_url": self.base_url,
+            "healthy": self.available(now),
+            "requests": self.requests,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+        }
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    #스트리밍 응답은 본문을 다 보내고 닫을 때 진행 중 요청에서 뺀다
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+class Upstream:
+    """
+    upstream 하나 (replica 목록 + 공유 클라이언트 + 사용량 카운터)
+    """
+
+    def __init__(self, name: str, base_urls: str, transport: httpx.AsyncBaseTransport | None = None):
+        self.name = name
+        self.replicas = [Replica(url.strip()) for url in base_urls.split(",") if url.strip()]
+        if not self.replicas:
+            raise ValueError(f"No upstream URL for {name}")
+        self.strategy = os.getenv("GATEWAY_LB_STRATEGY", "least_outstanding")
+        if self.strategy not in LB_STRATEGIES:
+            raise ValueError(f"GATEWAY_LB_STRATEGY must be one of {LB_STRATEGIES}")
+        self.eject_seconds = _env_float("GATEWAY_EJECT_SECONDS", 10.0)
+        self.health_path = os.getenv("GATEWAY_HEALTH_PATH", "/health")
+        #transport: inprocess 모드에서 ASGI 앱을 직접 호출할 때 지정
+        client_options = {"transport": transport} if transport is not None else {}
+        self.client = httpx.AsyncClient(
+            follow_redirects=True,
+            timeout=client_timeout(),
+            limits=client_limits(),
+            **client_options,
+        )
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._rotation = itertools.count()
+
+    def pick(self, exclude: tuple[Replica, ...] = ()) -> Replica | None:
+        """
+        요청을 보낼 replica 선택 (제외 중인 replica는 다른 replica가 없을 때만)
+        """
+        now = time.monotonic()
+        candidates = [r for r in self.replicas if r not in exclude]
+        healthy = [r for r in candidates if r.available(now)]
+        candidates = healthy or candidates
+        if not candidates:
+            return None
+        start = next(self._rotation) % len(candidates)
+        rotated = candidates[start:] + candidates[:start]
+        if self.strategy == "round_robin":
+            return rotated[0]
+        return min(rotated, key=lambda r: r.in_flight)
+
+    async def send(
+            self,
+            method: str,
+            path: str,
+            headers: dict[str, str],
+            params: Any = None,
+            content: Any = None,
+            stream: bool = False,
+    ) -> httpx.Response:
+        """
+        replica를 골라 요청 (멱등 메서드는 연결 오류 시 다른 replica로 한 번 재시도)
+        """
+        retryable = method in IDEMPOTENT_METHODS and not hasattr(content, "__aiter__")
+        tried: tuple[Replica, ...] = ()
+        while True:
+            replica = self.pick(exclude=tried)
+            tried += (replica,)
+            request = self.client.build_request(
+                method=method,
+                url=f"{replica.base_url}{path}",
+                headers=headers,
+                params=params,
+                content=content,
+            )
+            try:
+                return await self._send_to(replica, request, stream)
+            except httpx.TransportError:
+                replica.eject(self.eject_seconds)
+                if not retryable or len(tried) > 1 or self.pick(exclude=tried) is None:
+                    raise
+                self.retries += 1
+
+    async def _send_to(self, replica: Replica, request: httpx.Request, stream: bool) -> httpx.Response:
+        self.requests += 1
+        replica.requests += 1
+        self._acquire(replica)
+        try:
+            response = await self.client.send(request, stream=stream)
+        except httpx.HTTPError:
+            self.errors += 1
+            replica.errors += 1
+            self._release(replica)
+            raise
+        if not stream or response.is_closed:
+            self._release(replica)
+            return response
+
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                self._release(replica)
+
+        response.stream = _ReleasingStream(response.stream, release)
+        return response
+
+    def _acquire(self, replica: Replica) -> None:
+        replica.in_flight += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def _release(self, replica: Replica) -> None:
+        replica.in_flight -= 1
+        self.in_flight -= 1
+
+    async def check_health(self) -> None:
+        """
+        모든 replica에 헬스 체크 (실패하면 제외, 성공하면 바로 복귀)
+        """
+        async def check(replica: Replica) -> None:
+            try:
+                response = await self.client.get(
+                    f"{replica.base_url}{self.health_path}", timeout=HEALTH_CHECK_TIMEOUT_SECONDS
+                )
+                ok = response.status_code < 500
+            except Exception:
+                ok = False
+            if ok:
+                replica.ejected_until = 0.0
+            else:
+                replica.eject(self.eject_seconds)
+
+        await asyncio.gather(*(check(replica) for replica in self.replicas))
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "strategy": self.strategy,
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "replicas": [replica.stats(now) for replica in self.replicas],
+            "pool": _pool_stats(self.client),
+        }
+
+
+async def run_health_checks(upstreams: list[Upstream]) -> None:
+    """
+    lifespan에서 task로 실행 (GATEWAY_HEALTH_INTERVAL 간격)
+    """
+    interval = _env_float("GATEWAY_HEALTH_INTERVAL", 5.0)
+    if interval <= 0:
+        return
+    while True:
+        await asyncio.sleep(interval)
+        await asyncio.gather(*(upstream.check_health() for upstream in upstreams))
+
+
+def _pool_stats(client: httpx.AsyncClient) -> dict | None:
+    #기본 HTTP transport(httpcore 연결 풀)일 때만 연결 수 확인 가능
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    connections = getattr(pool, "connections", None)
+    if connections is None:
+        return None
+    idle = sum(1 for conn in connections if conn.is_idle())
+    return {"connections": len(connections), "idle": idle, "active": len(connections) - idle}
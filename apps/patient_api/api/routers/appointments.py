@@ -1,10 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import hashlib
+import json
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 
 from core.models import Appointment
 from core.db import get_db
-from core.schemas import AppointmentCreate, AppointmentRead
-from core.business.appointments import create_appointment
+from core.schemas import AppointmentCreate, AppointmentReschedule, AppointmentRead
+from core.business.appointments import create_appointment, apply_cancellation, reschedule_appointment
+from core.business.booking_locks import BookingBusyError
+from core.business.idempotency import (
+    IdempotencyKeyReusedError,
+    IdempotencyInProgressError,
+    abandon_idempotent,
+    begin_attempt,
+    begin_idempotent,
+    finish_idempotent,
+    record_idempotent,
+    scoped_key,
+)
 from apps.patient_api.dependencies import get_current_patient_id
 
 router = APIRouter(prefix="/appointments", tags=["appointments"])
@@ -25,9 +40,56 @@ router = APIRouter(prefix="/appointments", tags=["appointments"])
 """
 
 @router.post("", response_model=AppointmentRead, status_code=status.HTTP_201_CREATED)
-def create_new_appointment(payload: AppointmentCreate, db: Session = Depends(get_db)):
+def create_new_appointment(
+    payload: AppointmentCreate,
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
+):
+    """
+    POST /api/v1/patient/appointments
+    - Idempotency-Key 헤더가 있으면 같은 키의 재요청은 첫 응답을 그대로 반환 (Idempotent-Replayed: true)
+    """
+    if idempotency_key is None:
+        return _create(payload, db)
+
+    #같은 키라도 환자(전화번호)가 다르면 다른 키로 저장
+    key = scoped_key(payload.patient_phone, idempotency_key)
+    request_hash = hashlib.sha256(payload.model_dump_json().encode()).hexdigest()
+    try:
+        stored = begin_idempotent(db, key, request_hash)
+    except IdempotencyKeyReusedError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except IdempotencyInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if stored is not None:
+        return JSONResponse(
+            content=json.loads(stored.body),
+            status_code=stored.status_code,
+            headers={"Idempotent-Replayed": "true"},
+        )
+
+    def store_response(appt: Appointment) -> None:
+        #성공 응답은 예약 INSERT와 같은 트랜잭션에서 저장
+        body = AppointmentRead.model_validate(appt).model_dump(mode="json")
+        record_idempotent(db, key, status.HTTP_201_CREATED, json.dumps(body))
+
+    attempt = begin_attempt(db)
     try:
-        appt = create_appointment(
+        return _create(payload, db, before_commit=store_response)
+    except HTTPException as e:
+        if e.status_code == 409:
+            # 잠금 대기 초과는 재시도하면 성공할 수 있으므로 저장하지 않음
+            abandon_idempotent(db, key, attempt)
+        else:
+            finish_idempotent(db, key, e.status_code, json.dumps({"detail": e.detail}), attempt)
+        raise
+    except Exception:
+        abandon_idempotent(db, key, attempt)
+        raise
+
+def _create(payload: AppointmentCreate, db: Session, before_commit=None):
+    try:
+        return create_appointment(
             db,
             patient_name=payload.patient_name,
             patient_phone=payload.patient_phone,
@@ -35,8 +97,10 @@ def create_new_appointment(payload: AppointmentCreate, db: Session = Depends(get
             treatment_id=payload.treatment_id,
             start_dt=payload.start_datetime,
             memo=payload.memo,
+            before_commit=before_commit,
         )
-        return appt
+    except BookingBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     
@@ -88,7 +152,37 @@ def cancel_appointment(
         return appt
 
     # completed 취소 금지 등 정책은 여기서 추가 가능
-    appt.status = "canceled"
+    apply_cancellation(db, appt)
     db.commit()
     db.refresh(appt)
-    return appt
\ No newline at end of file
+    return appt
+
+"""
+3-6. 예약 시간 변경
+기능: 본인 예약의 시작시간을 한 번에 옮깁니다. (취소 후 재예약 없이, 실패하면 기존 예약 유지)
+"""
+@router.patch("/{appointment_id}/reschedule", response_model=AppointmentRead)
+def reschedule_my_appointment(
+    appointment_id: int,
+    payload: AppointmentReschedule,
+    db: Session = Depends(get_db),
+    patient_id: int = Depends(get_current_patient_id),
+):
+    """
+    PATCH /api/v1/patient/appointments/{appointment_id}/reschedule
+    """
+    appt = (
+        db.query(Appointment)
+        .filter(Appointment.id == appointment_id)
+        .filter(Appointment.patient_id == patient_id)
+        .first()
+    )
+    if not appt:
+        raise HTTPException(status_code=404, detail="Appointment not found")
+
+    try:
+        return reschedule_appointment(db, appt, payload.start_datetime)
+    except BookingBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
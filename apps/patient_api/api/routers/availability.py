@@ -1,12 +1,30 @@
 from datetime import date
-from fastapi import APIRouter, Depends, Query
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 
 from core.db import get_db
-from core.schemas import AvailabilityResponse
-from core.business.availability import get_available_start_times
+from core.schemas import (
+    AvailabilityResponse,
+    AvailabilityDay,
+    AvailabilityRangeResponse,
+    EarliestStartTime,
+    EarliestAvailabilityResponse,
+    DoctorAvailability,
+    DoctorsAvailabilityResponse,
+    AvailabilityCacheStats,
+)
+from core.business.availability import (
+    get_available_start_times,
+    get_available_start_times_range,
+    get_available_start_times_for_doctors,
+    find_earliest_start_times,
+    MAX_RANGE_DAYS,
+)
+from core.business.availability_cache import availability_cache_stats
 
 router = APIRouter(prefix="/availability", tags=["availability"])
+
 """
 3-2. 예약 가능 시간 조회
 기능: 특정 의사의 예약 가능한 시간대를 조회합니다.
@@ -31,4 +49,106 @@ def doctor_availability(
         treatment_id=treatment_id,
         dete=date,
         available_start_times=times,
-    )
\ No newline at end of file
+    )
+
+"""
+3-2-1. 기간 예약 가능 시간 조회
+기능: 특정 의사의 date_from ~ date_to(포함) 기간 예약 가능한 시간대를 날짜별로 한 번에 조회합니다.
+"""
+@router.get("/{doctor_id}/availability/range", response_model=AvailabilityRangeResponse)
+def doctor_availability_range(
+    doctor_id: int,
+    date_from: date = Query(..., description="YYYY-MM-DD 형식의 시작 날짜"),
+    date_to: date = Query(..., description="YYYY-MM-DD 형식의 종료 날짜(포함)"),
+    treatment_id: int = Query(..., description="시술 ID"),
+    db: Session = Depends(get_db),
+):
+    """
+    GET /api/v1/patient/availability/{doctor_id}/availability/range?date_from=2023-10-15&date_to=2023-10-21&treatment_id=1
+    """
+    try:
+        times_by_date = get_available_start_times_range(db, doctor_id, treatment_id, date_from, date_to)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return AvailabilityRangeResponse(
+        doctor_id=doctor_id,
+        treatment_id=treatment_id,
+        date_from=date_from,
+        date_to=date_to,
+        days=[AvailabilityDay(date=d, available_start_times=times) for d, times in times_by_date.items()],
+    )
+
+"""
+3-2-2. 가장 빠른 예약 가능 시간 검색
+기능: date_from부터 horizon_days일 안에서 특정 의사의 가장 빠른 예약 가능 시작시간 limit개를 조회합니다.
+"""
+@router.get("/{doctor_id}/availability/earliest", response_model=EarliestAvailabilityResponse)
+def doctor_earliest_availability(
+    doctor_id: int,
+    date_from: date = Query(..., description="YYYY-MM-DD 형식의 검색 시작 날짜"),
+    treatment_id: int = Query(..., description="시술 ID"),
+    limit: int = Query(1, description="찾을 시작시간 개수"),
+    horizon_days: int = Query(MAX_RANGE_DAYS, description="검색할 최대 일수"),
+    db: Session = Depends(get_db),
+):
+    """
+    GET /api/v1/patient/availability/{doctor_id}/availability/earliest?date_from=2023-10-15&treatment_id=1&limit=3
+    """
+    try:
+        starts = find_earliest_start_times(db, doctor_id, treatment_id, date_from, limit=limit, horizon_days=horizon_days)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return EarliestAvailabilityResponse(
+        doctor_id=doctor_id,
+        treatment_id=treatment_id,
+        date_from=date_from,
+        horizon_days=horizon_days,
+        start_times=[EarliestStartTime(date=s.date(), start_time=s.strftime("%H:%M")) for s in starts],
+    )
+
+"""
+3-2-3. 진료과/의사 목록 예약 가능 시간 조회
+기능: 진료과 전체 또는 여러 의사의 예약 가능한 시간대를 한 번에 조회합니다.
+옵션: department, doctor_ids 모두 생략하면 전체 의사
+"""
+@router.get("/doctors", response_model=DoctorsAvailabilityResponse)
+def doctors_availability(
+    date: date = Query(..., description="YYYY-MM-DD 형식의 날짜"),
+    treatment_id: int = Query(..., description="시술 ID"),
+    department: Optional[str] = Query(None, description="진료과로 필터링"),
+    doctor_ids: Optional[List[int]] = Query(None, description="의사 ID 목록 (doctor_ids=1&doctor_ids=2)"),
+    db: Session = Depends(get_db),
+):
+    """
+    GET /api/v1/patient/availability/doctors?date=2023-10-15&treatment_id=1&department=피부과
+    """
+    results = get_available_start_times_for_doctors(
+        db, treatment_id, date, department=department, doctor_ids=doctor_ids,
+    )
+    return DoctorsAvailabilityResponse(
+        treatment_id=treatment_id,
+        date=date,
+        department=department,
+        doctors=[
+            DoctorAvailability(
+                doctor_id=doctor.id,
+                doctor_name=doctor.name,
+                department=doctor.department,
+                available_start_times=times,
+            )
+            for doctor, times in results
+        ],
+    )
+
+"""
+예약 가능 시간 캐시 상태
+기능: 캐시 크기 조정을 위해 현재 워커의 hit/miss 카운터를 조회합니다.
+"""
+@router.get("/cache-stats", response_model=AvailabilityCacheStats)
+def availability_cache_status(response: Response):
+    """
+    GET /api/v1/patient/availability/cache-stats
+    - 워커별 현재 값이므로 gateway 응답 캐시에서 제외 (no-store)
+    """
+    response.headers["Cache-Control"] = "no-store"
+    return availability_cache_stats()
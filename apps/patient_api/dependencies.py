@@ -3,8 +3,10 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
+from core.config import get_settings
 from core.db import get_db
-from core.models import PatientSessionToken
+from core.business.token_cache import lookup_token
+from core.business.patient_auth import decode_signed_patient_token, is_signed_token
 
 #Authorization Bearer 토큰 검증
 bearer_scheme = HTTPBearer(auto_error=False)
@@ -19,14 +21,15 @@ def get_current_patient_id(
             detail="Invalid authentication credentials",
         )
     token_str = creds.credentials
-    access_token = (
-        db.query(PatientSessionToken)
-        .filter(PatientSessionToken.access_token == token_str)
-        .first()
-    )
+    if get_settings().patient_token_mode == "signed" and is_signed_token(token_str):
+        #서명 토큰은 DB 조회 없이 검증 (세션 세대만 캐시로 확인)
+        access_token = decode_signed_patient_token(db, token_str)
+    else:
+        #같은 세션의 반복 요청은 캐시에서 확인 (core/business/token_cache.py)
+        access_token = lookup_token(db, token_str)
     #토큰유효성 검사
-    #토큰있는지 확인
-    if not access_token:
+    #토큰있는지 확인 (재로그인 등으로 비활성화된 토큰 포함)
+    if not access_token or not access_token.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired access_token",
@@ -39,6 +42,3 @@ def get_current_patient_id(
         )
     
     return access_token.patient_id
-    
-    
-
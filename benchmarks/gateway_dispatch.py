@@ -0,0 +1,122 @@
+"""
+gateway proxy 모드 vs inprocess 모드 지연 시간/처리량 비교
+
+사용법:
+    python -m benchmarks.gateway_dispatch [--requests 2000] [--concurrency 16] [--path /api/v1/patient/doctors/]
+
+임시 파일 SQLite DB에 의사 데이터를 만들고
+- proxy: patient_api를 uvicorn 별도 프로세스로 띄우고 gateway가 localhost HTTP로 프록시
+- inprocess: gateway 프로세스 안에서 patient_api 앱을 직접 호출
+두 경우 모두 클라이언트 -> gateway 구간은 ASGI로 직접 호출하므로 차이는 gateway -> upstream 구간만 반영됩니다.
+(요청 합치기/응답 캐시는 끄고 측정)
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_up(url: str, timeout: float = 20.0) -> None:
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"upstream did not start: {url}")
+
+
+async def _measure(gateway_app, path: str, requests: int, concurrency: int) -> dict:
+    import httpx
+
+    async with gateway_app.router.lifespan_context(gateway_app):
+        transport = httpx.ASGITransport(app=gateway_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+            for _ in range(20):  # warm-up
+                (await client.get(path)).raise_for_status()
+
+            latencies: list[float] = []
+            remaining = iter(range(requests))
+
+            async def worker():
+                for _ in remaining:
+                    started = time.perf_counter()
+                    (await client.get(path)).raise_for_status()
+                    latencies.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": requests / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p95": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="gateway proxy/inprocess 모드 지연 시간과 처리량 비교")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--path", default="/api/v1/patient/doctors/")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.TemporaryDirectory()
+    port = _free_port()
+    os.environ.update({
+        "DB_URL": f"sqlite+pysqlite:///{os.path.join(tmpdir.name, 'gateway_bench.db')}",
+        "PATIENT_API_URL": f"http://127.0.0.1:{port}",
+        "ADMIN_API_URL": f"http://127.0.0.1:{port}",
+        "GATEWAY_HEALTH_INTERVAL": "0",
+    })
+
+    from core.db import get_sessionmaker, init_db
+    from core.models import Doctor
+    import apps.gateway.main as gateway_main
+
+    init_db()
+    db = get_sessionmaker()()
+    db.add_all([Doctor(name=f"의사{i}", department="피부과") for i in range(20)])
+    db.commit()
+    db.close()
+
+    upstream = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "apps.patient_api.main:app", "--port", str(port), "--log-level", "warning"],
+        env=os.environ.copy(),
+    )
+    try:
+        _wait_until_up(f"http://127.0.0.1:{port}/health")
+        gateway_main.COALESCE = False
+        results = {}
+        for mode in ("proxy", "inprocess"):
+            gateway_main.MODE = mode
+            results[mode] = asyncio.run(_measure(gateway_main.app, args.path, args.requests, args.concurrency))
+    finally:
+        upstream.terminate()
+        upstream.wait()
+        tmpdir.cleanup()
+
+    print(f"GET {args.path}: {args.requests} requests, concurrency {args.concurrency}")
+    for mode, result in results.items():
+        print(f"  {mode:<9} {result['rps']:8.0f} req/s   p50 {result['p50']:6.2f} ms   p95 {result['p95']:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
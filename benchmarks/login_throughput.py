@@ -0,0 +1,81 @@
+"""
+환자 로그인(issue_patient_token) 처리량 측정
+
+사용법:
+    python -m benchmarks.login_throughput [--logins 2000] [--threads 8] [--patients 200] [--token-mode db|signed] [--db-url URL]
+
+--db-url을 주지 않으면 임시 파일 SQLite에 환자를 만들어 측정합니다.
+--db-url로 실제 DB를 지정하면 기존 환자들의 세션이 모두 새로 발급되므로 운영 DB에서는 실행하지 마세요.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="환자 로그인 처리량(logins/sec) 측정")
+    parser.add_argument("--logins", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--patients", type=int, default=200, help="임시 DB에 만들 환자 수")
+    parser.add_argument("--token-mode", choices=["db", "signed"], default="db")
+    parser.add_argument("--db-url", default=None)
+    args = parser.parse_args()
+
+    tmpdir = None
+    if args.db_url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        args.db_url = f"sqlite+pysqlite:///{os.path.join(tmpdir.name, 'login_bench.db')}"
+    os.environ["DB_URL"] = args.db_url
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from core.config import get_settings
+    from core.db import Base
+    from core.models import Patient
+    from core.business.patient_auth import issue_patient_token
+
+    settings = get_settings()
+    settings.patient_token_mode = args.token_mode
+    settings.patient_token_secret = settings.patient_token_secret or "benchmark-secret"
+
+    connect_args = {"check_same_thread": False, "timeout": 30} if args.db_url.startswith("sqlite") else {}
+    engine = create_engine(args.db_url, connect_args=connect_args, pool_size=args.threads)
+    SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False, expire_on_commit=False)
+
+    db = SessionLocal()
+    if tmpdir is not None:
+        Base.metadata.create_all(bind=engine)
+        db.add_all([Patient(name=f"환자{i}", phone_number=f"010-9000-{i:04d}") for i in range(args.patients)])
+        db.commit()
+    patients = [(p.phone_number, p.name) for p in db.query(Patient).all()]
+    db.close()
+    if not patients:
+        parser.error("no patients in the database")
+
+    def login(_):
+        phone, name = random.choice(patients)
+        session = SessionLocal()
+        try:
+            issue_patient_token(session, patient_phone=phone, patient_name=name)
+        finally:
+            session.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        list(pool.map(login, range(args.logins)))
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"{args.logins} logins ({args.token_mode} tokens, {args.threads} threads, {len(patients)} patients) "
+        f"in {elapsed:.2f}s: {args.logins / elapsed:.0f} logins/sec"
+    )
+    engine.dispose()
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,16 @@
 from datetime import date, time, datetime, timedelta
+from typing import Callable, NamedTuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import DateTime, Integer, and_, exists, func, literal, select, union_all
 
-from core.models import Doctor, Treatment, Appointment, HospitalSlot, Patient
+from core.models import Doctor, Treatment, Appointment, Patient, HospitalSlot
+from core.business.slot_config import get_slot_config
+from core.business.occupancy import DayGrid, DayOccupancy, DaySnapshot
+from core.business.availability_cache import invalidate_availability
+from core.business.slot_occupancy import counters_enabled, reserve_slots, release_slots, move_slots
+from core.config import get_settings
+from core.business.booking_locks import booking_lock, bulk_booking_lock
+from core.business.patient_visits import add_active_appointment, add_active_appointments, remove_active_appointment
 """
 요구사항:
 
@@ -23,15 +31,12 @@ LUNCH_START = time(12, 0) # 점심시간 시작
 LUNCH_END = time(13, 0)   # 점심시간 종료
 
 START_STEP_MINUTES = 15  # 예약 간격
+MAX_BULK_ITEMS = 5000  # 일괄 등록 최대 건수
 
 #datetime으로 변환
 def _dt(d: date, t: time) -> datetime:
     return datetime.combine(d, t)
 
-#예약 가능 시간대(오픈시간 < 점심시간 and 점심시간 < 닫는시간)
-def _overlap(start1: datetime, end1: datetime, start2: datetime, end2: datetime) -> bool:
-    return start1 < end2 and start2 < end1
-
 def _is_multiple_of_30(x: int) -> bool:
     return x % 30 == 0
 
@@ -47,86 +52,185 @@ def _in_operating_hours(start_dt: datetime, end_dt: datetime) -> bool:
     
     lunch_start = _dt(d, LUNCH_START)
     lunch_end = _dt(d, LUNCH_END)
-    if _overlap(start_dt, end_dt, lunch_start, lunch_end):
+    #점심시간과 겹치면 불가
+    if start_dt < lunch_end and lunch_start < end_dt:
         return False
     
     return True
 
-def _check_capacity(db: Session, start_dt: datetime, end_dt: datetime) -> bool:
+def _load_day_snapshot(db: Session, target_date: date, exclude_id: int | None = None) -> DaySnapshot:
     """
-    예약 구간이 겹치는 모든 HospitalSlot(30분)에 대해
-    해당 slot과 겹치는 전체 예약 수 < max_capacity 이어야 함.
+    해당 날짜의 병원 전체 예약을 한 번만 조회해서 만든 하루 스냅샷
+    - exclude_id: 시간 변경 중인 예약 자신은 빼고 계산
+    - 슬롯이 비어있으면 capacity 제한 없음 (개발 초기에 slot 미구성 시 무제한 처리)
     """
-
-    slots = db.query(HospitalSlot).all()
-    if not slots:
-        # 개발 초기에 slot 미구성 시 무제한 처리(테스트시 db에 적제하기)
-        return True
-    
-    target_date = start_dt.date()
     day_open = _dt(target_date, OPEN_TIME)
     day_close = _dt(target_date, CLOSE_TIME)
-    
-    appts_all = (
+    grid = DayGrid(day_open, day_close, timedelta(minutes=START_STEP_MINUTES))
+
+    query = (
         db.query(Appointment)
         .filter(Appointment.start_datetime < day_close)
         .filter(Appointment.end_datetime > day_open)
         .filter(Appointment.status != "canceled")
-        .all()
     )
+    if exclude_id is not None:
+        query = query.filter(Appointment.id != exclude_id)
+    appts_all = query.all()
+    slots = get_slot_config(db).slots
+    occupancy = DayOccupancy(target_date, slots, appts_all) if slots else None
+    return DaySnapshot(grid, occupancy, appts_all)
 
-    for s in slots:
-        slot_start_dt = _dt(target_date, s.start_time)
-        slot_end_dt = _dt(target_date, s.end_time)
+def _full_slot_select(
+        db: Session,
+        start_dt: datetime,
+        end_dt: datetime,
+        exclude_id: int | None = None,
+        adding: int = 0,
+):
+    """
+    예약 구간이 걸치는 HospitalSlot 중 정원이 찬 슬롯을 찾는 DB 집계 쿼리 (걸치는 슬롯이 없으면 None)
+    - 걸치는 슬롯의 (id, 시작, 종료)를 리터럴 SELECT UNION ALL로 만들고
+      hospital_slots(max_capacity)와 겹치는 appointments를 조인해 슬롯별로 센다
+    - adding: 예약 수에 더해서 볼 인원 (1이면 예약 하나를 더 넣었을 때 정원이 차는 슬롯)
+    - 날짜+시간 조합을 SQL 함수로 하지 않아서 SQLite / PostgreSQL 모두 같은 식으로 동작
+    """
+    covered = get_slot_config(db).covering(start_dt, end_dt)
+    if not covered:
+        return None
 
-        if not _overlap(start_dt, end_dt, slot_start_dt, slot_end_dt):
-            continue
+    target_date = start_dt.date()
+    ranges = [
+        select(
+            literal(s.id, Integer).label("slot_id"),
+            literal(_dt(target_date, s.start_time), DateTime).label("slot_start"),
+            literal(_dt(target_date, s.end_time), DateTime).label("slot_end"),
+        )
+        for s in covered
+    ]
+    covered_slots = (ranges[0] if len(ranges) == 1 else union_all(*ranges)).subquery("covered_slots")
 
-        used = 0
-        for a in appts_all:
-            if _overlap(a.start_datetime, a.end_datetime, slot_start_dt, slot_end_dt):
-                used += 1
-        
-        if used >= s.max_capacity:
-            return False
-    return True
+    overlaps = [
+        Appointment.start_datetime < covered_slots.c.slot_end,
+        Appointment.end_datetime > covered_slots.c.slot_start,
+        Appointment.status != "canceled",
+    ]
+    if exclude_id is not None:
+        overlaps.append(Appointment.id != exclude_id)
 
-def _check_doctor_conflict(db: Session, doctor_id: int, start_dt: datetime, end_dt: datetime) -> bool:
+    return (
+        select(covered_slots.c.slot_id)
+        .join(HospitalSlot, HospitalSlot.id == covered_slots.c.slot_id)
+        .outerjoin(Appointment, and_(*overlaps))  # 겹치는 예약이 없는 슬롯도 0건으로 포함 (정원 0 = 마감 슬롯)
+        .group_by(covered_slots.c.slot_id, HospitalSlot.max_capacity)
+        .having(func.count(Appointment.id) + adding >= HospitalSlot.max_capacity)
+        .limit(1)
+    )
+
+def _doctor_conflict_exists(doctor_id: int, start_dt: datetime, end_dt: datetime, exclude_id: int | None = None):
+    #해당 의사의 예약 중 겹치는 예약이 있는지 (EXISTS 식)
+    conflict = exists().where(
+        Appointment.doctor_id == doctor_id,
+        Appointment.status != "canceled",
+        Appointment.start_datetime < end_dt,
+        Appointment.end_datetime > start_dt,
+    )
+    if exclude_id is not None:
+        conflict = conflict.where(Appointment.id != exclude_id)
+    return conflict
+
+def _check_doctor_conflict(db: Session, doctor_id: int, start_dt: datetime, end_dt: datetime, exclude_id: int | None = None) -> bool:
     """
     해당 의사의 예약 중 겹치는 예약이 없어야 함.
     """
-    conflict = (
-        db.query(Appointment)
-        .filter(Appointment.doctor_id == doctor_id)
-        .filter(Appointment.status != "canceled")
-        .filter(Appointment.start_datetime < end_dt)
-        .filter(Appointment.end_datetime > start_dt)
-        .first()
-    )
-    return conflict is None
+    return not db.scalar(select(_doctor_conflict_exists(doctor_id, start_dt, end_dt, exclude_id)))
 
-def _get_patient(db: Session, name: str, phone_number: str | None) -> Patient | None:
-    #환자정보 가져오기
-    patient = db.query(Patient).filter(Patient.phone_number == phone_number)
-    if name is not None:
-        patient = patient.filter(Patient.name == name)
-    
-    return patient.first()
+def _check_conflict_and_capacity_aggregate(
+        db: Session,
+        doctor_id: int,
+        start_dt: datetime,
+        end_dt: datetime,
+        exclude_id: int | None = None,
+) -> bool:
+    """
+    aggregate 모드: 의사 중복 EXISTS와 정원 초과 슬롯 EXISTS를 한 번의 SELECT로 확인
+    - 반환값: 이 예약을 넣으면 정원이 차는 슬롯이 있는지 (같은 SELECT에서 함께 확인)
+    """
+    full_slot = _full_slot_select(db, start_dt, end_dt, exclude_id)
+    filling_slot = _full_slot_select(db, start_dt, end_dt, exclude_id, adding=1)
+    conflict, full, fills = db.execute(select(
+        _doctor_conflict_exists(doctor_id, start_dt, end_dt, exclude_id),
+        full_slot.exists() if full_slot is not None else literal(False),
+        filling_slot.exists() if filling_slot is not None else literal(False),
+    )).one()
+    if conflict:
+        raise ValueError("Doctor has a conflicting appointment.")
+    if full:
+        raise ValueError("Hospital capacity exceeded for the requested time.")
+    return bool(fills)
 
-def _determine_first_visit(db: Session, patient_id: int) -> str:
+def _check_availability(
+        db: Session,
+        doctor_id: int,
+        start_dt: datetime,
+        end_dt: datetime,
+        moving: Appointment | None = None,
+) -> bool:
     """
-    초진/재진 자동 판단:
-    - 해당 patient로 '취소가 아닌 예약'이 과거에 하나라도 있으면 followup(재진)
-    - 아니면 first(초진)
+    의사 중복진료 / 병원 수용인원 검증 (booking_lock 안에서 호출)
+    - moving: 시간을 옮기는 예약. 그 예약 자신의 현재 구간은 검증에서 빼고, counter 모드는 슬롯 카운터를 옮긴다
+    - 반환값: 슬롯이 정원에 차거나 다시 여유가 생기는지 (예약 가능 시간 캐시의 날짜별 정원 버전)
+      memory/aggregate 모드의 시간 변경은 옛 구간을 따로 세지 않고 항상 True ((날짜) 잠금 안이라 추가 대기 없음)
     """
-    exists = (
-        db.query(Appointment.id)
-        .filter(Appointment.patient_id == patient_id)
-        .filter(Appointment.status != "canceled")
-        .limit(1)
-        .first()
-    )
-    return "followup" if exists else "first"
+    exclude_id = moving.id if moving is not None else None
+    capacity_mode = get_settings().capacity_check_mode
+    if capacity_mode == "counter":
+        # counter 모드는 슬롯 카운터를 조건부로 증가
+        if not _check_doctor_conflict(db, doctor_id, start_dt, end_dt, exclude_id):
+            raise ValueError("Doctor has a conflicting appointment.")
+        if moving is not None:
+            reserved, capacity_changed = move_slots(db, moving.start_datetime, moving.end_datetime, start_dt, end_dt)
+        else:
+            reserved, capacity_changed = reserve_slots(db, start_dt, end_dt)
+        if not reserved:
+            raise ValueError("Hospital capacity exceeded for the requested time.")
+        return capacity_changed
+    if capacity_mode == "aggregate":
+        # aggregate 모드는 의사 중복/정원 초과를 DB 쿼리 한 번으로 확인
+        fills = _check_conflict_and_capacity_aggregate(db, doctor_id, start_dt, end_dt, exclude_id)
+        return fills or moving is not None
+
+    # 하루치 예약으로 만든 칸 마스크에서 예약 구간 칸이 모두 비어 있는지 확인
+    duration = end_dt - start_dt
+    snapshot = _load_day_snapshot(db, start_dt.date(), exclude_id)
+    if not snapshot.doctor_free(doctor_id, start_dt, duration):
+        raise ValueError("Doctor has a conflicting appointment.")
+    if not snapshot.capacity_free(start_dt, duration):
+        raise ValueError("Hospital capacity exceeded for the requested time.")
+    return snapshot.add(doctor_id, start_dt, end_dt) or moving is not None
+
+def _fetch_booking_refs(
+        db: Session,
+        doctor_id: int,
+        treatment_id: int,
+        patient_name: str | None,
+        patient_phone: str,
+):
+    """
+    예약에 필요한 참조 데이터를 한 번의 SELECT로 조회
+    - (의사 존재 여부, 시술 소요시간, 환자 id)
+    - 없는 의사/시술/환자는 False/None으로 돌아온다
+    """
+    patient_query = select(Patient.id).where(Patient.phone_number == patient_phone)
+    if patient_name is not None:
+        patient_query = patient_query.where(Patient.name == patient_name)
+    patient_id = patient_query.limit(1).scalar_subquery()
+
+    return db.execute(select(
+        exists().where(Doctor.id == doctor_id).label("doctor_exists"),
+        select(Treatment.duration_minutes).where(Treatment.id == treatment_id).scalar_subquery().label("duration_minutes"),
+        patient_id.label("patient_id"),
+    )).one()
 
 def create_appointment( #// 404에러 처리예정
         db: Session,
@@ -137,58 +241,264 @@ def create_appointment( #// 404에러 처리예정
         treatment_id: int,
         start_dt: datetime,
         memo: str,
+        before_commit: Callable[[Appointment], None] | None = None,
 ) -> Appointment:
+    """
+    before_commit: 예약 INSERT 후 같은 트랜잭션에서 commit 직전에 호출 (멱등 응답 저장 등)
+    """
     # 1. 시작시간 15분 그리드 검증
     if not _is_15min_grid(start_dt):
         # 15분 그리드 아님 
         raise ValueError("start_datetime must be on a 15-minute grid (00/15/30/45).")
     
-    #2. doctor/treatment 존재 검증
-    doctor = db.query(Doctor).filter(Doctor.id == doctor_id).first()
-    if not doctor:
+    #2. doctor/treatment/환자를 한 번에 조회해서 검증
+    refs = _fetch_booking_refs(db, doctor_id, treatment_id, patient_name, patient_phone)
+    if not refs.doctor_exists:
         raise ValueError("Doctor not found.")
     
-    treatment = db.query(Treatment).filter(Treatment.id == treatment_id).first()
-    if not treatment:
+    if refs.duration_minutes is None:
         raise ValueError("Treatment not found.")
     
-    if not _is_multiple_of_30(treatment.duration_minutes):
+    if not _is_multiple_of_30(refs.duration_minutes):
         raise ValueError("Treatment duration must be a multiple of 30 minutes.")
     
-    end_dt = start_dt + timedelta(minutes=treatment.duration_minutes)
+    end_dt = start_dt + timedelta(minutes=refs.duration_minutes)
 
     #3. 영업시간, 점심시간 검증
     if not _in_operating_hours(start_dt, end_dt):
         raise ValueError("Appointment time is outside operating hours or overlaps with lunch break.")
     
-    #4. 의사 중복진료 검증
-    if not _check_doctor_conflict(db, doctor_id, start_dt, end_dt):
-        raise ValueError("Doctor has a conflicting appointment.")
-    
-    #5. 병원 수용인원 검증
-    if not _check_capacity(db, start_dt, end_dt):
-        raise ValueError("Hospital capacity exceeded for the requested time.")
-    
-    #6. 환자 조회/생성
-    patient = _get_patient(db, patient_name, patient_phone)
-    if not patient:
+    #4. 환자 검증
+    if refs.patient_id is None:
         raise ValueError("Patient not found (phone_number/name mismatch)")
 
-    #7. 초진/재진 판단
-    is_first_visit = _determine_first_visit(db, patient.id)
-
-    #8. 예약 생성 
-    appt = Appointment(
-        patient_id=patient.id,
-        doctor_id=doctor_id,
-        treatment_id=treatment_id,
-        start_datetime=start_dt,
-        end_datetime=end_dt,
-        status="pending",
-        is_first_visit=is_first_visit,
-        memo=memo,
-    )
-    db.add(appt)
-    db.commit()
-    db.refresh(appt)
-    return appt
\ No newline at end of file
+    #5~8. (의사, 날짜)/(날짜) 범위 잠금 안에서 검증 ~ 저장
+    # counter 모드는 슬롯 카운터 조건부 UPDATE가 원자적이므로 (날짜) 잠금 생략
+    with booking_lock(db, doctor_id, start_dt.date(), capacity=not counters_enabled()):
+        #5~6. 의사 중복진료 / 병원 수용인원 검증
+        capacity_changed = _check_availability(db, doctor_id, start_dt, end_dt)
+
+        #7. 초진/재진 판단 (환자의 취소되지 않은 예약 수를 올리면서 함께 판단)
+        # 잠금 밖에서 미리 읽은 값을 쓰지 않는다: (의사, 날짜) 잠금이 다른 같은 환자의 동시 예약은
+        # 환자 행 UPDATE ... RETURNING이 직렬화하므로 둘 다 first가 되지 않는다
+        is_first_visit = add_active_appointment(db, refs.patient_id)
+
+        #8. 예약 생성
+        # 모든 컬럼을 직접 채우고 expire_on_commit=False이므로 commit 후 refresh 조회는 생략
+        appt = Appointment(
+            patient_id=refs.patient_id,
+            doctor_id=doctor_id,
+            treatment_id=treatment_id,
+            start_datetime=start_dt,
+            end_datetime=end_dt,
+            status="pending",
+            is_first_visit=is_first_visit,
+            memo=memo,
+        )
+        db.add(appt)
+        invalidate_availability(db, [(doctor_id, start_dt.date())], [start_dt.date()] if capacity_changed else [])
+        if before_commit is not None:
+            db.flush()
+            before_commit(appt)
+        db.commit()
+    return appt
+
+def _lock_appointment(db: Session, appt: Appointment) -> None:
+    """
+    예약 행을 FOR UPDATE로 다시 읽어 appt를 최신 값으로 갱신 (트랜잭션이 끝날 때까지 다른 변경을 막음)
+    """
+    db.execute(
+        select(Appointment)
+        .where(Appointment.id == appt.id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    ).one()
+
+def reschedule_appointment(db: Session, appt: Appointment, start_dt: datetime) -> Appointment:
+    """
+    예약 시작시간 변경 (취소 + 재예약을 한 트랜잭션으로)
+    - 새 구간 검증은 이 예약 자신의 현재 구간을 제외하고 수행하므로 겹치게 옮겨도 자기 자신과 충돌하지 않는다
+    - 옛 날짜/새 날짜 범위를 함께 잠그고 한 번의 commit으로 옮긴다 (실패하면 기존 예약 그대로)
+    """
+    if appt.status in ("canceled", "completed"):
+        raise ValueError(f"Cannot reschedule a {appt.status} appointment.")
+
+    if not _is_15min_grid(start_dt):
+        raise ValueError("start_datetime must be on a 15-minute grid (00/15/30/45).")
+
+    duration_minutes = db.scalar(select(Treatment.duration_minutes).where(Treatment.id == appt.treatment_id))
+    if duration_minutes is None:
+        raise ValueError("Treatment not found.")
+    end_dt = start_dt + timedelta(minutes=duration_minutes)
+
+    if not _in_operating_hours(start_dt, end_dt):
+        raise ValueError("Appointment time is outside operating hours or overlaps with lunch break.")
+
+    while True:
+        if start_dt == appt.start_datetime and end_dt == appt.end_datetime:
+            return appt
+
+        old_date = appt.start_datetime.date()
+        with bulk_booking_lock(db, {(appt.doctor_id, old_date), (appt.doctor_id, start_dt.date())}):
+            #잠금 전에 읽은 값은 다른 요청이 바꿨을 수 있으므로 행을 잠그고 다시 읽어서 검증/카운터 이동에 사용
+            _lock_appointment(db, appt)
+            if appt.status in ("canceled", "completed"):
+                raise ValueError(f"Cannot reschedule a {appt.status} appointment.")
+            if appt.start_datetime.date() != old_date:
+                # 그 사이 다른 날짜로 옮겨졌으면 바뀐 날짜로 다시 잠근다
+                continue
+            if start_dt == appt.start_datetime and end_dt == appt.end_datetime:
+                return appt
+
+            capacity_changed = _check_availability(db, appt.doctor_id, start_dt, end_dt, moving=appt)
+
+            appt.start_datetime = start_dt
+            appt.end_datetime = end_dt
+            dates = {old_date, start_dt.date()}
+            invalidate_availability(db, [(appt.doctor_id, d) for d in dates], dates if capacity_changed else [])
+            db.commit()
+        return appt
+
+class BookingRequest(NamedTuple):
+    #일괄 등록 한 건 (create_appointment 인자와 동일)
+    patient_name: str
+    patient_phone: str
+    doctor_id: int
+    treatment_id: int
+    start_dt: datetime
+    memo: str = ""
+
+def create_appointments_bulk(db: Session, requests: list[BookingRequest]) -> list[Appointment | str]:
+    """
+    여러 예약을 한 트랜잭션으로 검증/저장하고 건별 결과(생성된 예약 또는 오류 메시지)를 돌려준다
+    - 의사/시술/환자는 요청 전체에 대해 IN 조회 한 번씩
+    - 날짜별 하루 스냅샷을 한 번만 읽고, 통과한 예약을 스냅샷에 반영하며 다음 건을 검증 (요청 안의 충돌도 걸러짐)
+    - 실패한 건은 건너뛰고 나머지는 한 번의 commit으로 저장
+    """
+    if len(requests) > MAX_BULK_ITEMS:
+        raise ValueError(f"At most {MAX_BULK_ITEMS} appointments can be created at once.")
+
+    results: list[Appointment | str | None] = [None] * len(requests)
+
+    #1. 참조 데이터 일괄 조회
+    doctor_ids = set(db.scalars(select(Doctor.id).where(Doctor.id.in_({r.doctor_id for r in requests}))))
+    durations = dict(db.execute(
+        select(Treatment.id, Treatment.duration_minutes).where(Treatment.id.in_({r.treatment_id for r in requests}))
+    ).all())
+    patients = {
+        p.phone_number: p
+        for p in db.scalars(select(Patient).where(Patient.phone_number.in_({r.patient_phone for r in requests})))
+    }
+
+    #2. 건별 정적 검증 (create_appointment와 같은 순서/메시지)
+    candidates: list[tuple[int, BookingRequest, datetime, int]] = []
+    for index, req in enumerate(requests):
+        patient = patients.get(req.patient_phone)
+        if not _is_15min_grid(req.start_dt):
+            results[index] = "start_datetime must be on a 15-minute grid (00/15/30/45)."
+        elif req.doctor_id not in doctor_ids:
+            results[index] = "Doctor not found."
+        elif req.treatment_id not in durations:
+            results[index] = "Treatment not found."
+        elif not _is_multiple_of_30(durations[req.treatment_id]):
+            results[index] = "Treatment duration must be a multiple of 30 minutes."
+        elif not _in_operating_hours(req.start_dt, req.start_dt + timedelta(minutes=durations[req.treatment_id])):
+            results[index] = "Appointment time is outside operating hours or overlaps with lunch break."
+        elif patient is None or (req.patient_name is not None and patient.name != req.patient_name):
+            results[index] = "Patient not found (phone_number/name mismatch)"
+        else:
+            end_dt = req.start_dt + timedelta(minutes=durations[req.treatment_id])
+            candidates.append((index, req, end_dt, patient.id))
+
+    if not candidates:
+        return results
+
+    #3. 대상 (의사, 날짜)/(날짜) 범위를 모두 잡고 날짜별 스냅샷으로 중복/수용인원 검증
+    with bulk_booking_lock(db, {(req.doctor_id, req.start_dt.date()) for _, req, _, _ in candidates}):
+        snapshots = {d: _load_day_snapshot(db, d) for d in sorted({req.start_dt.date() for _, req, _, _ in candidates})}
+        use_counters = counters_enabled()
+
+        accepted: list[tuple[int, BookingRequest, datetime, int]] = []
+        filled_dates: set[date] = set()
+        for index, req, end_dt, patient_id in candidates:
+            snapshot = snapshots[req.start_dt.date()]
+            duration = end_dt - req.start_dt
+            if not snapshot.doctor_free(req.doctor_id, req.start_dt, duration):
+                results[index] = "Doctor has a conflicting appointment."
+            elif not snapshot.capacity_free(req.start_dt, duration):
+                results[index] = "Hospital capacity exceeded for the requested time."
+            else:
+                reserved, filled = reserve_slots(db, req.start_dt, end_dt) if use_counters else (True, False)
+                if not reserved:
+                    results[index] = "Hospital capacity exceeded for the requested time."
+                else:
+                    if snapshot.add(req.doctor_id, req.start_dt, end_dt) or filled:
+                        filled_dates.add(req.start_dt.date())
+                    accepted.append((index, req, end_dt, patient_id))
+
+        #4. 초진/재진: 환자별로 예약 수를 한 번에 올리고, 올리기 전 값이 0이면 그 환자의 첫 건만 first
+        per_patient: dict[int, int] = {}
+        for _, _, _, patient_id in accepted:
+            per_patient[patient_id] = per_patient.get(patient_id, 0) + 1
+        previous = {
+            patient_id: add_active_appointments(db, patient_id, count) - count
+            for patient_id, count in per_patient.items()
+        }
+
+        #5. 저장 (한 번의 flush/commit)
+        appts: list[Appointment] = []
+        for index, req, end_dt, patient_id in accepted:
+            appt = Appointment(
+                patient_id=patient_id,
+                doctor_id=req.doctor_id,
+                treatment_id=req.treatment_id,
+                start_datetime=req.start_dt,
+                end_datetime=end_dt,
+                status="pending",
+                is_first_visit="first" if previous[patient_id] == 0 else "followup",
+                memo=req.memo,
+            )
+            previous[patient_id] += 1
+            results[index] = appt
+            appts.append(appt)
+        db.add_all(appts)
+        invalidate_availability(db, {(req.doctor_id, req.start_dt.date()) for _, req, _, _ in accepted}, filled_dates)
+        db.commit()
+    return results
+
+def apply_cancellation(db: Session, appt: Appointment) -> None:
+    """
+    예약을 취소 상태로 바꾸고 취소에 따른 부가 데이터를 갱신 (commit은 호출한 쪽에서)
+    - 해당 (의사, 날짜) 예약 가능 시간 캐시 무효화 (정원이 찬 슬롯에 여유가 생기면 그 날짜 전체)
+    - 환자의 취소되지 않은 예약 수 감소
+    - counter 모드면 슬롯 사용 인원 반환
+    """
+    #다른 요청이 먼저 취소/시간 변경했을 수 있으므로 행을 잠그고 다시 읽은 값으로 판단 (중복 취소 시 카운터 이중 감소 방지)
+    _lock_appointment(db, appt)
+    if appt.status == "canceled":
+        return
+    if counters_enabled():
+        freed = release_slots(db, appt.start_datetime, appt.end_datetime)
+    else:
+        #취소 전(이 예약 포함) 정원이 찬 슬롯이 있었으면 취소로 여유가 생긴다
+        full_slot = _full_slot_select(db, appt.start_datetime, appt.end_datetime)
+        freed = full_slot is not None and bool(db.scalar(select(full_slot.exists())))
+    appt.status = "canceled"
+    invalidate_availability(db, [(appt.doctor_id, appt.start_datetime.date())], [appt.start_datetime.date()] if freed else [])
+    remove_active_appointment(db, appt.patient_id)
+
+def apply_status_change(db: Session, appt: Appointment, new_status: str) -> None:
+    """
+    예약 상태 변경 (commit은 호출한 쪽에서)
+    - 취소로 바뀌면 apply_cancellation
+    - 취소 → 다른 상태로 되돌리면 환자의 취소되지 않은 예약 수를 다시 올린다
+    """
+    if new_status == "canceled":
+        apply_cancellation(db, appt)
+        return
+    _lock_appointment(db, appt)
+    if appt.status == "canceled":
+        add_active_appointment(db, appt.patient_id)
+        #취소를 되돌리면 그 시간이 다시 차므로 예약 가능 시간 캐시도 무효화
+        invalidate_availability(db, [(appt.doctor_id, appt.start_datetime.date())], [appt.start_datetime.date()])
+    appt.status = new_status
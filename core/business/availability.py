@@ -1,7 +1,14 @@
+from contextlib import closing
 from datetime import date, time, datetime, timedelta
+from typing import Iterator
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from core.models import Doctor, Treatment, Appointment, HospitalSlot
+from core.models import Doctor, Treatment, Appointment
+from core.business.occupancy import DayGrid, DayOccupancy
+from core.business.slot_config import SlotConfig, get_slot_config
+from core.business.availability_cache import cached_start_times
+from core.business.slot_occupancy import counters_enabled, load_used
 #추후에 환경변수로 변경
 OPEN_TIME = time(9, 0)   # 병원 운영 시작 시간
 CLOSE_TIME = time(18, 0) # 병원 운영 종료 시간
@@ -9,19 +16,26 @@ LUNCH_START = time(12, 0) # 점심시간 시작
 LUNCH_END = time(13, 0)   # 점심시간 종료
 
 START_STEP_MINUTES = 15  # 예약 간격
+MAX_RANGE_DAYS = 31  # 기간 조회 최대 일수
+MAX_SEARCH_DAYS = 90  # 가장 빠른 예약 가능 시간 검색 최대 일수
+MAX_SEARCH_RESULTS = 50  # 가장 빠른 예약 가능 시간 검색 최대 개수
+SEARCH_FETCH_SIZE = 500  # 검색 시 예약을 나눠 읽는 단위
 
 #datetime으로 변환
 def _dt(d: date, t: time) -> datetime:
     return datetime.combine(d, t)
 
-#예약 가능 시간대(오픈시간 < 점심시간 and 점심시간 < 닫는시간)
-def _overlap(start1: datetime, end1: datetime, start2: datetime, end2: datetime) -> bool:
-    return start1 < end2 and start2 < end1
-
 def _is_multiple_of_30(x: int) -> bool:
     return x % 30 == 0
 
 def get_available_start_times(db: Session, doctor_id: int, treatment_id: int, target_date: date) -> list[str]:
+    #결과 캐시 (날짜/시술/슬롯 설정 버전이 같을 때만 재사용)
+    return cached_start_times(
+        db, doctor_id, treatment_id, target_date,
+        lambda: _compute_available_start_times(db, doctor_id, treatment_id, target_date),
+    )
+
+def _compute_available_start_times(db: Session, doctor_id: int, treatment_id: int, target_date: date) -> list[str]:
     doctor = (db.query(Doctor).filter(Doctor.id == doctor_id).first())
     if not doctor:
         return []
@@ -36,88 +50,265 @@ def get_available_start_times(db: Session, doctor_id: int, treatment_id: int, ta
     #시술 소요시간
     duration = timedelta(minutes=treatment.duration_minutes)
 
-    day_open = _dt(target_date, OPEN_TIME)
-    day_close = _dt(target_date, CLOSE_TIME)
-    lunch_start = _dt(target_date, LUNCH_START)
-    lunch_end = _dt(target_date, LUNCH_END)
+    slots = get_slot_config(db).slots
+    appts_by_date, occupancy_by_date = _load_days(db, target_date, target_date, slots, [doctor_id])
+    grid = _day_grid(target_date)
+    shared_busy = _shared_busy_mask(grid, target_date, occupancy_by_date[target_date])
+    return _free_start_times(grid, duration, shared_busy, appts_by_date[target_date])
 
-    #해당 의사의 해당 날짜 예약된 모든 예약 조회
-    appts_doctor = (
-        db.query(Appointment)
-        .filter(Appointment.doctor_id == doctor_id)
-        .filter(Appointment.start_datetime < day_close)
-        .filter(Appointment.end_datetime > day_open)
-        .filter(Appointment.status != "canceled")
-        .all()
+def get_available_start_times_range(
+        db: Session,
+        doctor_id: int,
+        treatment_id: int,
+        date_from: date,
+        date_to: date,
+) -> dict[date, list[str]]:
+    """
+    date_from ~ date_to(포함) 기간의 날짜별 예약 가능 시작시간
+    - 의사/시술/슬롯은 한 번만 조회
+    - 기간 전체 예약을 한 번의 범위 쿼리로 가져온 뒤 날짜별로 나눠 계산
+    """
+    if date_to < date_from:
+        raise ValueError("date_to must be on or after date_from.")
+    days = (date_to - date_from).days + 1
+    if days > MAX_RANGE_DAYS:
+        raise ValueError(f"Date range must be at most {MAX_RANGE_DAYS} days.")
+
+    target_dates = [date_from + timedelta(days=i) for i in range(days)]
+    empty = {d: [] for d in target_dates}
+
+    doctor = (db.query(Doctor).filter(Doctor.id == doctor_id).first())
+    if not doctor:
+        return empty
+
+    treatment = (db.query(Treatment).filter(Treatment.id == treatment_id).first())
+    if not treatment:
+        return empty
+
+    if not _is_multiple_of_30(treatment.duration_minutes):
+        return empty
+    duration = timedelta(minutes=treatment.duration_minutes)
+
+    slots = get_slot_config(db).slots
+    appts_by_date, occupancy_by_date = _load_days(db, date_from, date_to, slots, [doctor_id])
+
+    result: dict[date, list[str]] = {}
+    for d in target_dates:
+        grid = _day_grid(d)
+        shared_busy = _shared_busy_mask(grid, d, occupancy_by_date[d])
+        result[d] = _free_start_times(grid, duration, shared_busy, appts_by_date[d])
+    return result
+
+def get_available_start_times_for_doctors(
+        db: Session,
+        treatment_id: int,
+        target_date: date,
+        department: str | None = None,
+        doctor_ids: list[int] | None = None,
+) -> list[tuple[Doctor, list[str]]]:
+    """
+    여러 의사(진료과 전체 또는 의사 목록)의 예약 가능 시작시간을 한 번에 계산
+    - 해당 날짜의 병원 전체 예약을 한 번만 조회
+    - 점심시간/정원 초과 슬롯 구간은 모든 의사가 공유하고, 의사별 예약만 따로 막는다
+    """
+    query = db.query(Doctor)
+    if department:
+        query = query.filter(Doctor.department == department)
+    if doctor_ids:
+        query = query.filter(Doctor.id.in_(doctor_ids))
+    doctors = query.order_by(Doctor.id.asc()).all()
+    if not doctors:
+        return []
+
+    treatment = (db.query(Treatment).filter(Treatment.id == treatment_id).first())
+    if not treatment or not _is_multiple_of_30(treatment.duration_minutes):
+        return [(doctor, []) for doctor in doctors]
+    duration = timedelta(minutes=treatment.duration_minutes)
+
+    slots = get_slot_config(db).slots
+    appts_by_date, occupancy_by_date = _load_days(db, target_date, target_date, slots, [d.id for d in doctors])
+
+    #의사 공통으로 막히는 구간(점심시간 + 정원 초과 슬롯)은 한 번만 계산
+    grid = _day_grid(target_date)
+    shared_busy = _shared_busy_mask(grid, target_date, occupancy_by_date[target_date])
+
+    appts_by_doctor: dict[int, list[Appointment]] = {doctor.id: [] for doctor in doctors}
+    for appt in appts_by_date[target_date]:
+        appts_by_doctor[appt.doctor_id].append(appt)
+
+    return [
+        (doctor, _free_start_times(grid, duration, shared_busy, appts_by_doctor[doctor.id]))
+        for doctor in doctors
+    ]
+
+def find_earliest_start_times(
+        db: Session,
+        doctor_id: int,
+        treatment_id: int,
+        date_from: date,
+        limit: int = 1,
+        horizon_days: int = MAX_RANGE_DAYS,
+) -> list[datetime]:
+    """
+    date_from부터 horizon_days일 동안 날짜 순으로 가장 빠른 예약 가능 시작시간 limit개
+    - 예약은 시작시간 순으로 조금씩 읽으면서 하루씩 계산하고, limit개를 찾으면 바로 멈춘다
+    - 중간 날짜는 남은 개수만큼만 후보를 찾는다
+    - date_from이 오늘이면 지금 이후 시작시간만
+    """
+    if not 1 <= limit <= MAX_SEARCH_RESULTS:
+        raise ValueError(f"limit must be between 1 and {MAX_SEARCH_RESULTS}.")
+    if not 1 <= horizon_days <= MAX_SEARCH_DAYS:
+        raise ValueError(f"horizon_days must be between 1 and {MAX_SEARCH_DAYS}.")
+
+    doctor = (db.query(Doctor).filter(Doctor.id == doctor_id).first())
+    if not doctor:
+        return []
+
+    treatment = (db.query(Treatment).filter(Treatment.id == treatment_id).first())
+    if not treatment or not _is_multiple_of_30(treatment.duration_minutes):
+        return []
+    duration = timedelta(minutes=treatment.duration_minutes)
+
+    date_to = date_from + timedelta(days=horizon_days - 1)
+    slots = get_slot_config(db).slots
+    use_counters = counters_enabled()
+    used_by_date = load_used(db, date_from, date_to) if slots and use_counters else {}
+
+    now = datetime.now()
+    found: list[datetime] = []
+    days = _iter_day_appointments(db, date_from, date_to, None if use_counters else doctor_id)
+    with closing(days):
+        for d, appts_day in days:
+            if not slots:
+                occupancy = None
+            elif use_counters:
+                occupancy = DayOccupancy.from_used(d, slots, used_by_date.get(d, {}))
+            else:
+                occupancy = DayOccupancy(d, slots, appts_day)
+
+            grid = _day_grid(d)
+            busy = _shared_busy_mask(grid, d, occupancy)
+            busy |= grid.busy_mask((a.start_datetime, a.end_datetime) for a in appts_day if a.doctor_id == doctor_id)
+            if d <= now.date():
+                #오늘(또는 지난 날짜)은 지금이거나 이미 지난 시작시간 제외
+                busy |= grid.range_mask(grid.day_open, now + timedelta(microseconds=1))
+            found.extend(grid.start_times(grid.free_start_mask(busy, duration), limit=limit - len(found)))
+            if len(found) >= limit:
+                break
+    return found
+
+def _iter_day_appointments(
+        db: Session,
+        date_from: date,
+        date_to: date,
+        doctor_id: int | None,
+) -> Iterator[tuple[date, list[Appointment]]]:
+    """
+    date_from ~ date_to(포함) 날짜 순으로 (날짜, 그날 영업시간과 겹치는 예약) 생성
+    - 예약은 시작시간 순으로 SEARCH_FETCH_SIZE개씩 읽으므로 중간에 멈추면 나머지는 읽지 않는다
+    - doctor_id가 None이면 병원 전체 예약 (memory 모드 capacity 계산용)
+    """
+    stmt = (
+        select(Appointment)
+        .where(Appointment.start_datetime < _dt(date_to, CLOSE_TIME))
+        .where(Appointment.end_datetime > _dt(date_from, OPEN_TIME))
+        .where(Appointment.status != "canceled")
+        .order_by(Appointment.start_datetime.asc())
+        .execution_options(yield_per=SEARCH_FETCH_SIZE)
     )
+    if doctor_id is not None:
+        stmt = stmt.where(Appointment.doctor_id == doctor_id)
 
-    #병원 전체 예약 조회 (병원 수용 인원 초과 체크용)
-    appts_all = (
+    result = db.scalars(stmt)
+    try:
+        rows = iter(result)
+        pending = next(rows, None)
+        carry: list[Appointment] = []  # 전날 영업시간 이후까지 이어지는 예약
+        d = date_from
+        while d <= date_to:
+            day_open, day_close = _dt(d, OPEN_TIME), _dt(d, CLOSE_TIME)
+            appts_day = [a for a in carry if a.end_datetime > day_open]
+            while pending is not None and pending.start_datetime < day_close:
+                if pending.end_datetime > day_open:
+                    appts_day.append(pending)
+                pending = next(rows, None)
+            carry = [a for a in appts_day if a.end_datetime > day_close]
+            yield d, appts_day
+            d += timedelta(days=1)
+    finally:
+        result.close()
+
+def _load_days(
+        db: Session,
+        date_from: date,
+        date_to: date,
+        slots: tuple[SlotConfig, ...],
+        doctor_ids: list[int],
+) -> tuple[dict[date, list[Appointment]], dict[date, DayOccupancy | None]]:
+    """
+    date_from ~ date_to(포함) 날짜별 (doctor_ids 의사들의 예약, 병원 점유 현황)
+    - memory 모드: 기간 전체의 병원 예약을 한 번에 조회해서 점유 현황을 계산하고 의사 예약은 메모리에서 골라낸다
+    - counter 모드: 의사 예약만 조회하고 점유 현황은 slot_occupancy 카운터에서 읽는다
+    - 슬롯이 비어있으면 capacity 제한을 적용할 수 없으니 점유 현황은 None(“무제한”, 개발 초기 편의)
+    """
+    use_counters = counters_enabled()
+
+    query = (
         db.query(Appointment)
-        .filter(Appointment.start_datetime < day_close)
-        .filter(Appointment.end_datetime > day_open)
+        .filter(Appointment.start_datetime < _dt(date_to, CLOSE_TIME))
+        .filter(Appointment.end_datetime > _dt(date_from, OPEN_TIME))
         .filter(Appointment.status != "canceled")
-        .all()
     )
+    if use_counters:
+        query = query.filter(Appointment.doctor_id.in_(doctor_ids))
+    appts_range = query.order_by(Appointment.start_datetime.asc()).all()
 
-    slots = db.query(HospitalSlot).all()
-    # 슬롯이 비어있으면 capacity 제한을 적용할 수 없으니 “무제한”으로 처리(개발 초기 편의)
-    # 테스트시 반드시 slot seed설정
-    enforce_capacity = len(slots) > 0
-
-    candidates: list[datetime] = []
-    cur = day_open
-    step = timedelta(minutes=START_STEP_MINUTES)
-
-    # 영업시간 내 모든 예약 시간대 생성
-    while cur + duration <= day_close:
-        candidates.append(cur)
-        cur += step
-
-    #검증
-    availale: list[str] = []
-    for start_dt in candidates:
-        end_dt = start_dt + duration
-
-        #점심시간 겹침 체크
-        if _overlap(start_dt, end_dt, lunch_start, lunch_end):
-            continue
-
-        #이미 예약된 시간 체크
-        if any(_overlap(start_dt, end_dt, appt.start_datetime, appt.end_datetime) for appt in appts_doctor):
-            continue
-        
-        #병원 capacity: 예약구간이 걸치는 모든 30분 HospitalSlot이 여유 있어야 함
-        if enforce_capacity and not _check_capacity(db, target_date, start_dt, end_dt, slots, appts_all):
-            continue
-
-        availale.append(start_dt.strftime("%H:%M"))
-    return availale
-
-def _check_capacity(
-        db: Session,
-        target_date: date,
-        start_dt: datetime,
-        end_dt: datetime,
-        slots: list[HospitalSlot],
-        appts_all: list[Appointment],
-) -> bool:
-    #HospitalSlot은 30분 단위로 정의되므로 예약 구간이 걸치는 모든 30분 HospitalSlot이 여유 있어야 함
-    #예약정원이 다 찼는지 확인
-    for s in slots:
-        slot_start_dt = _dt(target_date, s.start_time)
-        slot_end_dt = _dt(target_date, s.end_time)
-
-        if not _overlap(start_dt, end_dt, slot_start_dt, slot_end_dt):
-            continue
-
-        #이 슬롯에 예약된 전체 예약 수 계산
-        used = 0
-        for a in appts_all:
-            if _overlap(a.start_datetime, a.end_datetime, slot_start_dt, slot_end_dt):
-                used += 1
-        
-        if used >= s.max_capacity:
-            return False
-        
-    return True
\ No newline at end of file
+    #날짜별로 예약 분배 (영업시간과 겹치는 날짜에만 포함)
+    target_dates = [date_from + timedelta(days=i) for i in range((date_to - date_from).days + 1)]
+    appts_by_date: dict[date, list[Appointment]] = {d: [] for d in target_dates}
+    for appt in appts_range:
+        d = max(appt.start_datetime.date(), date_from)
+        last = min(appt.end_datetime.date(), date_to)
+        while d <= last:
+            if appt.start_datetime < _dt(d, CLOSE_TIME) and appt.end_datetime > _dt(d, OPEN_TIME):
+                appts_by_date[d].append(appt)
+            d += timedelta(days=1)
+
+    occupancy_by_date: dict[date, DayOccupancy | None] = {d: None for d in target_dates}
+    if slots and use_counters:
+        used_by_date = load_used(db, date_from, date_to)
+        for d in target_dates:
+            occupancy_by_date[d] = DayOccupancy.from_used(d, slots, used_by_date.get(d, {}))
+    elif slots:
+        for d in target_dates:
+            occupancy_by_date[d] = DayOccupancy(d, slots, appts_by_date[d])
+
+    wanted = set(doctor_ids)
+    for d in target_dates:
+        appts_by_date[d] = [a for a in appts_by_date[d] if a.doctor_id in wanted]
+    return appts_by_date, occupancy_by_date
+
+def _day_grid(target_date: date) -> DayGrid:
+    #영업시간을 START_STEP_MINUTES 칸으로 나눈 하루 비트마스크 좌표계
+    return DayGrid(_dt(target_date, OPEN_TIME), _dt(target_date, CLOSE_TIME), timedelta(minutes=START_STEP_MINUTES))
+
+def _shared_busy_mask(grid: DayGrid, target_date: date, occupancy: DayOccupancy | None) -> int:
+    #점심시간은 후보 시작시간을 막는 구간
+    busy = grid.range_mask(_dt(target_date, LUNCH_START), _dt(target_date, LUNCH_END))
+
+    #병원 capacity: 예약구간이 걸치는 모든 30분 HospitalSlot이 여유 있어야 함
+    #슬롯별 사용 인원은 하루에 한 번만 계산하고, 수용 여유가 없는 칸을 막는다
+    if occupancy is not None:
+        busy |= grid.full & ~occupancy.headroom_mask(grid)
+    return busy
+
+def _free_start_times(
+        grid: DayGrid,
+        duration: timedelta,
+        shared_busy: int,
+        appts_doctor: list[Appointment],
+) -> list[str]:
+    #이미 예약된 시간도 후보 시작시간을 막는 칸
+    busy = shared_busy | grid.busy_mask((appt.start_datetime, appt.end_datetime) for appt in appts_doctor)
+    starts = grid.start_times(grid.free_start_mask(busy, duration))
+    return [start_dt.strftime("%H:%M") for start_dt in starts]
@@ -0,0 +1,119 @@
+import threading
+from datetime import date
+from typing import Callable, Iterable
+from sqlalchemy import and_, delete, or_
+from sqlalchemy.orm import Session
+
+from core.config import get_settings
+from core.models import CacheVersion
+from core.utils.cache import LRUCache
+from core.business.cache_versions import bump_version, bump_versions, get_versions
+from core.business.slot_config import get_slot_config
+"""
+(의사, 날짜, 시술)별 예약 가능 시간 결과 캐시
+- 크기 제한 LRU, hits/misses 카운터 제공
+- 결과는 계산 시점의 버전((의사, 날짜) 예약 버전, 날짜별 정원 버전, 시술 버전, 슬롯 설정 버전)과 함께 저장한다.
+- 예약 생성/취소/시간 변경은 해당 (의사, 날짜) 버전만 올리고, 날짜별 정원 버전은 슬롯이 정원에 차거나
+  다시 여유가 생길 때만 올린다. 같은 날짜의 다른 의사 예약끼리 같은 버전 행을 잠그지 않는다.
+- 시술 수정은 해당 시술 버전만 올리므로 영향받는 항목만 무효화되고, 다른 워커도 DB 버전으로 변경을 감지한다.
+- 지난 날짜는 캐시하지 않으므로 그 버전 행은 purge_availability_versions로 지워도 된다.
+"""
+
+_cache: LRUCache | None = None
+_cache_lock = threading.Lock()
+
+
+def _get_cache() -> LRUCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LRUCache(get_settings().availability_cache_size)
+    return _cache
+
+
+#날짜가 이름 앞쪽에 오므로 지난 날짜 행은 이름 범위로 지울 수 있다
+DOCTOR_VERSION_PREFIX = "availability:"
+CAPACITY_VERSION_PREFIX = "capacity:"
+
+
+def _doctor_version_key(doctor_id: int, target_date: date) -> str:
+    return f"{DOCTOR_VERSION_PREFIX}{target_date.isoformat()}:{doctor_id}"
+
+
+def _capacity_version_key(target_date: date) -> str:
+    return f"{CAPACITY_VERSION_PREFIX}{target_date.isoformat()}"
+
+
+def _treatment_version_key(treatment_id: int) -> str:
+    return f"treatment:{treatment_id}"
+
+
+def cached_start_times(
+        db: Session,
+        doctor_id: int,
+        treatment_id: int,
+        target_date: date,
+        compute: Callable[[], list[str]],
+) -> list[str]:
+    cache = _get_cache()
+    if cache.maxsize <= 0 or target_date < date.today():
+        return compute()
+    cache.bind_owner(db.get_bind())
+
+    doctor_key = _doctor_version_key(doctor_id, target_date)
+    capacity_key = _capacity_version_key(target_date)
+    treatment_key = _treatment_version_key(treatment_id)
+    versions = get_versions(db, [doctor_key, capacity_key, treatment_key])
+    current = (versions[doctor_key], versions[capacity_key], versions[treatment_key], get_slot_config(db).version)
+
+    key = (doctor_id, target_date, treatment_id)
+    entry = cache.get(key, valid=lambda e: e[0] == current)
+    if entry is not None:
+        return list(entry[1])
+
+    times = compute()
+    cache.set(key, (current, tuple(times)))
+    return times
+
+
+def invalidate_availability(
+        db: Session,
+        doctor_dates: Iterable[tuple[int, date]],
+        capacity_dates: Iterable[date] = (),
+) -> None:
+    """
+    (의사, 날짜)의 예약이 바뀔 때 commit 전에 호출 (예약 생성, 취소, 시간 변경, 일괄 등록)
+    - capacity_dates: 슬롯이 정원에 찼거나 다시 여유가 생긴 날짜 (그 날짜의 모든 의사 결과 무효화)
+    - 버전 행은 UPSERT 한 번으로 올린다
+    """
+    names = [_doctor_version_key(doctor_id, target_date) for doctor_id, target_date in doctor_dates]
+    names += [_capacity_version_key(target_date) for target_date in capacity_dates]
+    bump_versions(db, names)
+
+
+def invalidate_treatment_availability(db: Session, treatment_id: int) -> None:
+    """
+    시술(소요시간 등)이 바뀔 때 commit 전에 호출
+    """
+    bump_version(db, _treatment_version_key(treatment_id))
+
+
+def purge_availability_versions(db: Session, before: date | None = None) -> int:
+    """
+    before(기본 오늘)보다 지난 날짜의 예약/정원 버전 행을 지우고 commit한다.
+    - 반환값: 지운 행 수
+    """
+    before = before or date.today()
+    deleted = db.execute(
+        delete(CacheVersion).where(or_(*(
+            and_(CacheVersion.name >= prefix, CacheVersion.name < f"{prefix}{before.isoformat()}")
+            for prefix in (DOCTOR_VERSION_PREFIX, CAPACITY_VERSION_PREFIX)
+        )))
+    ).rowcount
+    db.commit()
+    return deleted
+
+
+def availability_cache_stats() -> dict[str, int | float]:
+    return _get_cache().stats()
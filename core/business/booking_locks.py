@@ -0,0 +1,118 @@
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date
+from typing import Iterable, Iterator
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from core.config import get_settings
+"""
+예약 생성 잠금
+- 전역 잠금 대신 (의사, 날짜)와 (날짜) 범위로만 직렬화한다.
+  - (의사, 날짜): 같은 의사의 중복 진료 검증 ~ 예약 저장 구간
+  - (날짜): 병원 수용인원 검증 ~ 예약 저장 구간 (counter 모드는 조건부 UPDATE가 원자적이므로 불필요)
+- PostgreSQL: 트랜잭션 단위 advisory lock(pg_try_advisory_xact_lock)을 짧게 재시도하며 획득, commit/rollback 시 해제
+- 그 외(SQLite 등): 프로세스 내 striped lock으로 대체
+- 항상 범위 이름 순서((날짜) -> (의사, 날짜))로 잡아서 교착을 피한다. 일괄 등록도 같은 순서를 따른다.
+"""
+
+LOCK_RETRY_INITIAL_SECONDS = 0.005  # 첫 재시도 대기
+LOCK_RETRY_MAX_SECONDS = 0.1        # 재시도 대기 상한
+PROCESS_LOCK_STRIPES = 256          # 프로세스 잠금 개수
+
+
+class BookingBusyError(ValueError):
+    """
+    잠금 대기 시간을 넘긴 경우 (잠시 후 재시도 가능)
+    """
+
+
+_process_locks = [threading.Lock() for _ in range(PROCESS_LOCK_STRIPES)]
+
+
+def _date_scope(target_date: date) -> str:
+    return f"booking:date:{target_date.isoformat()}"
+
+
+def _scopes(doctor_id: int, target_date: date, capacity: bool) -> list[str]:
+    scopes = [_date_scope(target_date)] if capacity else []
+    scopes.append(f"booking:doctor:{doctor_id}:{target_date.isoformat()}")
+    return scopes
+
+
+def _lock_key(scope: str) -> int:
+    #advisory lock 키 (signed 64bit)
+    return int.from_bytes(hashlib.blake2b(scope.encode(), digest_size=8).digest(), "big", signed=True)
+
+
+def _acquire_advisory(db: Session, scope: str, deadline: float) -> None:
+    key = _lock_key(scope)
+    delay = LOCK_RETRY_INITIAL_SECONDS
+    while not db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": key}).scalar():
+        if time.monotonic() + delay > deadline:
+            raise BookingBusyError("Booking is busy for the requested time. Please retry.")
+        time.sleep(delay)
+        delay = min(delay * 2, LOCK_RETRY_MAX_SECONDS)
+
+
+@contextmanager
+def booking_lock(db: Session, doctor_id: int, target_date: date, capacity: bool = True) -> Iterator[None]:
+    """
+    with 블록 안에서 검증 ~ commit까지 수행
+    - capacity=False면 (날짜) 잠금은 생략
+    """
+    with _hold(db, _scopes(doctor_id, target_date, capacity)):
+        yield
+
+
+@contextmanager
+def bulk_booking_lock(db: Session, doctor_dates: Iterable[tuple[int, date]]) -> Iterator[None]:
+    """
+    일괄 등록용: 대상 (의사, 날짜)들과 그 날짜들의 (날짜) 범위를 한꺼번에 잡는다
+    """
+    scopes: set[str] = set()
+    for doctor_id, target_date in doctor_dates:
+        scopes.update(_scopes(doctor_id, target_date, capacity=True))
+    with _hold(db, sorted(scopes)):
+        yield
+
+
+@contextmanager
+def capacity_lock(db: Session, dates: Iterable[date]) -> Iterator[None]:
+    """
+    슬롯 설정 변경용: 여러 날짜의 (날짜) 범위만 잡는다 (슬롯 변경 ~ 카운터 재계산 ~ commit까지)
+    """
+    with _hold(db, sorted({_date_scope(d) for d in dates})):
+        yield
+
+
+@contextmanager
+def _hold(db: Session, scopes: list[str]) -> Iterator[None]:
+    settings = get_settings()
+    if not settings.booking_locks:
+        yield
+        return
+
+    deadline = time.monotonic() + settings.booking_lock_timeout_seconds
+
+    if db.get_bind().dialect.name == "postgresql":
+        for scope in scopes:
+            _acquire_advisory(db, scope, deadline)
+        # 트랜잭션이 끝날 때(commit/rollback) 자동 해제
+        yield
+        return
+
+    stripes = sorted({hash(scope) % PROCESS_LOCK_STRIPES for scope in scopes})
+    acquired: list[threading.Lock] = []
+    try:
+        for stripe in stripes:
+            lock = _process_locks[stripe]
+            if not lock.acquire(timeout=max(deadline - time.monotonic(), 0)):
+                raise BookingBusyError("Booking is busy for the requested time. Please retry.")
+            acquired.append(lock)
+        yield
+    finally:
+        for lock in reversed(acquired):
+            lock.release()
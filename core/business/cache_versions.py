@@ -0,0 +1,52 @@
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from core.db import dialect_insert
+from core.models import CacheVersion
+"""
+캐시 버전 관리
+- 프로세스 내 캐시는 DB의 cache_versions 버전과 비교해서 다른 워커의 변경을 감지한다.
+- 데이터를 바꾸는 쪽은 같은 트랜잭션 안에서 bump_version을 호출하고 commit한다.
+"""
+
+def get_versions(db: Session, names: list[str]) -> dict[str, int]:
+    #버전 행이 없으면 0
+    rows = db.execute(
+        select(CacheVersion.name, CacheVersion.version).where(CacheVersion.name.in_(names))
+    ).all()
+    versions = {name: 0 for name in names}
+    versions.update({name: version for name, version in rows})
+    return versions
+
+def get_version(db: Session, name: str) -> int:
+    return get_versions(db, [name])[name]
+
+def bump_version(db: Session, name: str) -> None:
+    """
+    name의 버전을 1 올린다 (commit은 호출한 쪽에서)
+    """
+    bump_versions(db, [name])
+
+def bump_versions(db: Session, names: list[str]) -> None:
+    #여러 버전을 한 번에 1씩 올린다 (upsert를 지원하면 문장 하나, 이름 순으로 잠가서 교착 방지)
+    names = sorted(set(names))
+    if not names:
+        return
+    insert = dialect_insert(db)
+    if insert is not None:
+        stmt = insert(CacheVersion).values([{"name": name, "version": 1} for name in names])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CacheVersion.name],
+            set_={"version": CacheVersion.version + 1},
+        )
+        db.execute(stmt)
+        return
+
+    #upsert를 지원하지 않는 DB
+    for name in names:
+        updated = db.execute(
+            update(CacheVersion).where(CacheVersion.name == name).values(version=CacheVersion.version + 1)
+        )
+        if updated.rowcount == 0:
+            db.add(CacheVersion(name=name, version=1))
+            db.flush()
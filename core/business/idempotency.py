@@ -0,0 +1,169 @@
+import hashlib
+import time
+from datetime import datetime, timedelta
+from typing import NamedTuple
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session, SessionTransaction
+
+from core.config import get_settings
+from core.db import dialect_insert
+from core.models import IdempotencyKey
+"""
+Idempotency-Key 처리
+- 키는 요청한 환자(전화번호) 범위로 나눠 저장한다 (scoped_key). 다른 환자의 키를 읽거나 막을 수 없다.
+- 첫 요청이 키 행을 먼저 INSERT(선점)하고 처리한 뒤 응답(status_code, body)을 저장한다.
+  - 성공 응답은 예약 INSERT와 같은 트랜잭션에서 저장한다 (record_idempotent). 둘 중 하나만 남는 경우가 없다.
+  - 실패 응답은 처리 시작 지점(begin_attempt)까지 되돌린 뒤 저장한다 (finish_idempotent).
+- 같은 키로 다시 오면 저장된 응답을 그대로 돌려주고 예약 로직은 다시 실행하지 않는다.
+- 첫 요청이 아직 처리 중이면 응답이 저장될 때까지 짧게 재조회하며 기다린다 (idempotency_wait_seconds).
+- idempotency_lease_seconds가 지나도록 응답이 없는 선점은 중단된 요청으로 보고 새 요청이 다시 선점한다.
+- idempotency_ttl_seconds가 지난 키는 없는 것으로 보고 새 요청이 다시 선점한다.
+  키는 대부분 한 번만 쓰이므로 만료된 행은 purge_idempotency_keys로 주기적으로 지운다.
+"""
+
+WAIT_INITIAL_SECONDS = 0.01  # 처리 중 키 첫 재조회 대기
+WAIT_MAX_SECONDS = 0.2       # 재조회 대기 상한
+
+
+class IdempotencyKeyReusedError(ValueError):
+    """
+    같은 키가 다른 요청 본문으로 다시 사용된 경우
+    """
+
+
+class IdempotencyInProgressError(ValueError):
+    """
+    같은 키의 첫 요청이 기다리는 시간 안에 끝나지 않은 경우 (잠시 후 재시도 가능)
+    """
+
+
+class StoredResponse(NamedTuple):
+    status_code: int
+    body: str
+
+
+def scoped_key(scope: str, key: str) -> str:
+    #클라이언트 키를 환자 범위로 나눈 저장용 키 (컬럼 길이에 맞게 해시)
+    return hashlib.sha256(f"{scope}\n{key}".encode()).hexdigest()
+
+
+def _claim(db: Session, key: str, request_hash: str, now: datetime) -> bool:
+    #키 행을 처리 중 상태로 INSERT, 이미 있으면 False
+    row = {"key": key, "request_hash": request_hash, "status_code": None, "response_body": None, "created_at": now}
+    insert = dialect_insert(db)
+    if insert is not None:
+        claimed = db.execute(insert(IdempotencyKey).values(row).on_conflict_do_nothing()).rowcount == 1
+    else:
+        claimed = db.get(IdempotencyKey, key) is None
+        if claimed:
+            db.execute(IdempotencyKey.__table__.insert(), [row])
+    db.commit()
+    return claimed
+
+
+def begin_idempotent(db: Session, key: str, request_hash: str) -> StoredResponse | None:
+    """
+    None이면 이 요청이 키를 선점했으므로 처리 후 finish_idempotent/abandon_idempotent를 호출한다
+    - 저장된 응답이 있으면 StoredResponse
+    """
+    settings = get_settings()
+    deadline = time.monotonic() + settings.idempotency_wait_seconds
+    delay = WAIT_INITIAL_SECONDS
+
+    while True:
+        now = datetime.now()
+        if _claim(db, key, request_hash, now):
+            return None
+
+        row = db.execute(
+            select(IdempotencyKey.request_hash, IdempotencyKey.status_code, IdempotencyKey.response_body, IdempotencyKey.created_at)
+            .where(IdempotencyKey.key == key)
+        ).first()
+        if row is None:
+            # 그 사이 처리 실패로 지워짐 -> 다시 선점 시도
+            continue
+
+        expired = row.created_at < now - timedelta(seconds=settings.idempotency_ttl_seconds)
+        stale = row.status_code is None and row.created_at < now - timedelta(seconds=settings.idempotency_lease_seconds)
+        if expired or stale:
+            # 만료된 키, 응답 없이 중단된 선점(예약도 같이 rollback됨)은 지우고 다시 선점
+            db.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key, IdempotencyKey.created_at == row.created_at))
+            db.commit()
+            continue
+
+        if row.request_hash != request_hash:
+            raise IdempotencyKeyReusedError("Idempotency-Key was already used with a different request body.")
+
+        if row.status_code is not None:
+            return StoredResponse(row.status_code, row.response_body)
+
+        if time.monotonic() + delay > deadline:
+            raise IdempotencyInProgressError("A request with this Idempotency-Key is still in progress. Please retry.")
+        time.sleep(delay)
+        delay = min(delay * 2, WAIT_MAX_SECONDS)
+
+
+def record_idempotent(db: Session, key: str, status_code: int, body: str) -> None:
+    """
+    처리 결과 저장 -> 같은 키의 재요청/대기 중 요청은 이 응답을 받는다 (commit은 호출한 쪽에서)
+    - 예약 INSERT와 같은 트랜잭션에서 호출한다
+    """
+    db.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.key == key)
+        .values(status_code=status_code, response_body=body)
+    )
+
+
+def begin_attempt(db: Session) -> SessionTransaction:
+    """
+    선점 후 처리 시작 지점 (SAVEPOINT)
+    - 처리가 실패하면 finish_idempotent/abandon_idempotent가 이 지점까지 되돌린 뒤 응답을 저장한다
+    - 처리가 성공하면 처리 쪽 commit에 함께 반영된다
+    """
+    return db.begin_nested()
+
+
+def _discard_attempt(attempt: SessionTransaction | None) -> None:
+    #처리 중 쌓인 변경(카운터 등)은 버린다
+    if attempt is not None and attempt.is_active:
+        attempt.rollback()
+
+
+def finish_idempotent(
+        db: Session, key: str, status_code: int, body: str, attempt: SessionTransaction | None = None,
+) -> None:
+    #실패 응답 저장: attempt 이후 변경은 버리고 응답만 commit
+    _discard_attempt(attempt)
+    record_idempotent(db, key, status_code, body)
+    db.commit()
+
+
+def abandon_idempotent(db: Session, key: str, attempt: SessionTransaction | None = None) -> None:
+    #재시도해야 하는 실패(잠금 대기 초과 등)는 저장하지 않고 키를 놓는다 (attempt 이후 변경도 버림)
+    _discard_attempt(attempt)
+    db.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key, IdempotencyKey.status_code.is_(None)))
+    db.commit()
+
+
+def purge_idempotency_keys(db: Session, batch_size: int = 1000, now: datetime | None = None) -> int:
+    """
+    idempotency_ttl_seconds가 지난 키 삭제 (삭제한 행 수 반환)
+    - created_at 순서로 batch_size개씩 지우고 배치마다 commit해서 잠금을 짧게 유지
+    """
+    cutoff = (now or datetime.now()) - timedelta(seconds=get_settings().idempotency_ttl_seconds)
+    removed = 0
+    while True:
+        keys = db.execute(
+            select(IdempotencyKey.key)
+            .where(IdempotencyKey.created_at < cutoff)
+            .order_by(IdempotencyKey.created_at)
+            .limit(batch_size)
+        ).scalars().all()
+        if not keys:
+            return removed
+        db.execute(delete(IdempotencyKey).where(IdempotencyKey.key.in_(keys), IdempotencyKey.created_at < cutoff))
+        db.commit()
+        removed += len(keys)
+        if len(keys) < batch_size:
+            return removed
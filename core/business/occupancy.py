@@ -0,0 +1,162 @@
+from bisect import bisect_left, bisect_right
+from datetime import date, time, datetime, timedelta
+
+from core.models import Appointment
+from core.business.slot_config import SlotConfig
+"""
+하루 단위 점유 현황 엔진
+
+- 하루치 예약을 한 번만 정렬해서 HospitalSlot별 사용 인원(used) 배열을 만든다.
+- 하루 영업시간을 15분 칸으로 나눈 비트마스크(DayGrid)로 의사 예약/점심시간/정원이 찬 슬롯을 표시하고,
+  시술 시간 D의 예약 가능 시작시간은 "비어 있는 칸" 마스크를 D 칸만큼 밀어가며 AND 해서 한 번에 구한다.
+"""
+
+#datetime으로 변환
+def _dt(d: date, t: time) -> datetime:
+    return datetime.combine(d, t)
+
+
+class DayOccupancy:
+    """
+    특정 날짜의 HospitalSlot별 사용 인원
+    - slot_ranges: (슬롯 시작, 슬롯 종료, 최대 인원) 목록
+    - used: slot_ranges와 같은 순서의 사용 인원 배열
+    """
+
+    def __init__(self, target_date: date, slots: tuple[SlotConfig, ...], appts_all: list[Appointment]):
+        self.target_date = target_date
+        self.slot_ranges = [
+            (_dt(target_date, s.start_time), _dt(target_date, s.end_time), s.max_capacity)
+            for s in slots
+        ]
+
+        starts = sorted(a.start_datetime for a in appts_all)
+        ends = sorted(a.end_datetime for a in appts_all)
+
+        # 슬롯과 겹치는 예약 수 = (슬롯 종료 전에 시작한 예약 수) - (슬롯 시작 전에 이미 끝난 예약 수)
+        self.used = [
+            bisect_left(starts, slot_end) - bisect_right(ends, slot_start)
+            for slot_start, slot_end, _ in self.slot_ranges
+        ]
+
+    @classmethod
+    def from_used(cls, target_date: date, slots: tuple[SlotConfig, ...], used_by_slot: dict[int, int]) -> "DayOccupancy":
+        #slot_occupancy 카운터처럼 이미 집계된 {slot_id: used}로 만든다
+        occupancy = cls(target_date, slots, [])
+        occupancy.used = [used_by_slot.get(s.id, 0) for s in slots]
+        return occupancy
+
+    def full_ranges(self) -> list[tuple[datetime, datetime]]:
+        #정원이 다 찬 슬롯 구간
+        return [
+            (slot_start, slot_end)
+            for (slot_start, slot_end, max_capacity), used in zip(self.slot_ranges, self.used)
+            if used >= max_capacity
+        ]
+
+    def headroom_mask(self, grid: "DayGrid") -> int:
+        #수용 인원 여유가 있는 칸 (슬롯이 없는 칸은 제한 없음)
+        return grid.full & ~grid.busy_mask(self.full_ranges())
+
+
+class DayGrid:
+    """
+    하루 영업시간을 step 간격 칸으로 나눈 비트마스크 좌표계
+    - bit i = [day_open + i*step, day_open + (i+1)*step) 칸
+    - 시술 시간은 step의 배수여야 한다 (30분 단위 시술, 15분 칸)
+    """
+
+    def __init__(self, day_open: datetime, day_close: datetime, step: timedelta):
+        self.day_open = day_open
+        self.step = step
+        self.size = max((day_close - day_open) // step, 0)
+        self.full = (1 << self.size) - 1
+
+    def range_mask(self, start: datetime, end: datetime) -> int:
+        #[start, end)와 겹치는 칸
+        lo = max((start - self.day_open) // self.step, 0)
+        hi = min(-((self.day_open - end) // self.step), self.size)  # ceil((end - day_open) / step)
+        if lo >= hi:
+            return 0
+        return ((1 << (hi - lo)) - 1) << lo
+
+    def busy_mask(self, ranges) -> int:
+        busy = 0
+        for start, end in ranges:
+            busy |= self.range_mask(start, end)
+        return busy
+
+    def free_start_mask(self, busy: int, duration: timedelta) -> int:
+        """
+        bit i = i번째 칸에서 시작하는 duration 구간이 busy와 겹치지 않음
+        - 비어 있는 칸 마스크를 1, 2, 4... 칸씩 밀어 AND 해서 duration 칸 연속으로 빈 시작 칸만 남긴다
+        """
+        k = -(-duration // self.step)
+        if k <= 0 or k > self.size:
+            return 0
+        window = self.full & ~busy
+        span = 1
+        while span < k:
+            shift = min(span, k - span)
+            window &= window >> shift
+            span += shift
+        return window & ((1 << (self.size - k + 1)) - 1)
+
+    def start_times(self, mask: int, limit: int | None = None) -> list[datetime]:
+        #마스크의 켜진 칸을 앞에서부터 시작시간으로 변환
+        starts: list[datetime] = []
+        while mask and (limit is None or len(starts) < limit):
+            low = mask & -mask
+            starts.append(self.day_open + (low.bit_length() - 1) * self.step)
+            mask ^= low
+        return starts
+
+    def is_free(self, busy: int, start: datetime, duration: timedelta) -> bool:
+        #start가 칸 경계이고 [start, start + duration)이 모두 영업시간 안의 빈 칸인지
+        offset = start - self.day_open
+        if offset < timedelta(0) or offset % self.step:
+            return False
+        i = offset // self.step
+        k = -(-duration // self.step)
+        if i + k > self.size:
+            return False
+        return busy & (((1 << k) - 1) << i) == 0
+
+
+class DaySnapshot:
+    """
+    하루치 예약을 메모리에 올려둔 스냅샷 (예약 검증 / 일괄 등록용)
+    - doctor_busy: 의사별 예약 칸 마스크
+    - full: 수용 인원 여유가 없는 칸 마스크
+    - add()로 예약을 반영하면 의사 마스크와 슬롯 사용 인원을 바로 갱신하므로
+      같은 날짜의 다음 예약은 DB를 다시 읽지 않고 검증할 수 있다
+    """
+
+    def __init__(self, grid: DayGrid, occupancy: DayOccupancy | None, appts_all: list[Appointment]):
+        self.grid = grid
+        self.occupancy = occupancy
+        self.doctor_busy: dict[int, int] = {}
+        for a in appts_all:
+            self.doctor_busy[a.doctor_id] = self.doctor_busy.get(a.doctor_id, 0) | grid.range_mask(a.start_datetime, a.end_datetime)
+        self.full = grid.full & ~occupancy.headroom_mask(grid) if occupancy is not None else 0
+
+    def doctor_free(self, doctor_id: int, start: datetime, duration: timedelta) -> bool:
+        return self.grid.is_free(self.doctor_busy.get(doctor_id, 0), start, duration)
+
+    def capacity_free(self, start: datetime, duration: timedelta) -> bool:
+        return self.grid.is_free(self.full, start, duration)
+
+    def add(self, doctor_id: int, start: datetime, end: datetime) -> bool:
+        #반환값: 이 예약으로 정원이 찬 슬롯이 있는지
+        self.doctor_busy[doctor_id] = self.doctor_busy.get(doctor_id, 0) | self.grid.range_mask(start, end)
+        if self.occupancy is None:
+            return False
+        filled = False
+        for i, (slot_start, slot_end, max_capacity) in enumerate(self.occupancy.slot_ranges):
+            if start < slot_end and slot_start < end:
+                self.occupancy.used[i] += 1
+                if self.occupancy.used[i] >= max_capacity:
+                    self.full |= self.grid.range_mask(slot_start, slot_end)
+                    filled = True
+        return filled
+
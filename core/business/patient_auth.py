@@ -1,23 +1,39 @@
 from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, or_, select
 from sqlalchemy.orm import Session
 
+from core.config import get_settings
 from core.models import Patient, PatientSessionToken
-from core.utils.tokens import generate_token
+from core.utils.tokens import generate_token, sign_token, verify_signed_token
+from core.business.token_cache import (
+    TokenInfo,
+    current_session_generation,
+    invalidate_patient_tokens,
+    next_session_generation,
+    remember_session_generation,
+)
 #토큰유효기간(7일)
 TOKEN_TTL_DAYS = 7
+#서명 토큰 형식: "p1.{patient_id}.{세션 세대}.{만료 unix time}.{서명}"
+SIGNED_TOKEN_PREFIX = "p1"
 #토근발급
 def issue_patient_token(
         db: Session,
         patient_phone: str,
         patient_name: str | None = None
         ) -> PatientSessionToken:
-    query = db.query(Patient).filter(Patient.phone_number == patient_phone)
+    """
+    환자 조회 ~ 기존 토큰 비활성화 ~ 새 토큰 저장을 한 트랜잭션(commit 1회)으로 처리
+    - 환자 행을 FOR UPDATE로 잠가 같은 환자의 동시 로그인을 직렬화 (단일 세션 보장)
+    - SQLite는 FOR UPDATE가 없지만 첫 쓰기(UPDATE)부터 DB 쓰기 잠금으로 직렬화된다
+    """
+    query = db.query(Patient.id).filter(Patient.phone_number == patient_phone)
     
     # 이름이 들어온 경우에만 추가 검증
     if patient_name is not None:
         query = query.filter(Patient.name == patient_name)
 
-    patient = query.first()
+    patient = query.with_for_update().first()
     if not patient:
         # 여기까지도 "없으면 에러"로 처리 
         raise ValueError("Patient not found (phone_number/name mismatch)")
@@ -26,22 +42,85 @@ def issue_patient_token(
     db.query(PatientSessionToken)\
       .filter(PatientSessionToken.patient_id == patient.id,
               PatientSessionToken.is_active == True)\
-      .update({"is_active": False})
-    db.commit()
+      .update({"is_active": False}, synchronize_session=False)
 
-    #새 토큰 발급
-    token_str = generate_token(32)
     now = datetime.now(timezone.utc)
     expires_at = now + timedelta(days=TOKEN_TTL_DAYS)
 
-    access_token = PatientSessionToken(
+    if get_settings().patient_token_mode == "signed":
+        #서명 토큰: 세대를 올려 이전 세션 토큰을 무효화 (토큰은 저장하지 않음)
+        secret = _signing_secret()
+        generation = next_session_generation(db, patient.id)
+        db.commit()
+        invalidate_patient_tokens(patient.id)
+        remember_session_generation(db, patient.id, generation)
+        fields = [SIGNED_TOKEN_PREFIX, str(patient.id), str(generation), str(int(expires_at.timestamp()))]
+        return sign_token(fields, secret)
+
+    #새 토큰 발급
+    token_str = generate_token(32)
+
+    db.add(PatientSessionToken(
         patient_id = patient.id,
         access_token=token_str,
         is_active = True,
         expires_at=expires_at.replace(tzinfo=None),
-    )
-    db.add(access_token)
+    ))
     db.commit()
+    #비활성화된 토큰은 검증 캐시에서도 제거
+    invalidate_patient_tokens(patient.id)
     return token_str
 
-    
\ No newline at end of file
+def is_signed_token(token_str: str) -> bool:
+    #DB 토큰(token_urlsafe)에는 '.'이 없음
+    return token_str.startswith(f"{SIGNED_TOKEN_PREFIX}.")
+
+def decode_signed_patient_token(db: Session, token_str: str) -> TokenInfo | None:
+    """
+    서명 토큰 검증 (서명이 틀리거나 형식이 다르면 None)
+    - 이전 세대 토큰은 is_active=False
+    """
+    fields = verify_signed_token(token_str, _signing_secret())
+    if fields is None or len(fields) != 4 or fields[0] != SIGNED_TOKEN_PREFIX:
+        return None
+    try:
+        patient_id, generation, expires_ts = (int(f) for f in fields[1:])
+    except ValueError:
+        return None
+
+    current = current_session_generation(db, patient_id, seen=generation)
+    expires_at = datetime.fromtimestamp(expires_ts, timezone.utc).replace(tzinfo=None)
+    return TokenInfo(patient_id, expires_at, generation == current)
+
+def _signing_secret() -> str:
+    secret = get_settings().patient_token_secret
+    if not secret:
+        raise RuntimeError("PATIENT_TOKEN_SECRET is required when PATIENT_TOKEN_MODE=signed")
+    return secret
+
+def purge_session_tokens(db: Session, batch_size: int = 1000, now: datetime | None = None) -> int:
+    """
+    만료되었거나 비활성화된 토큰 삭제 (삭제한 행 수 반환)
+    - id 순서로 batch_size개씩 지우고 배치마다 commit해서 잠금을 짧게 유지
+    """
+    now = now or datetime.utcnow()
+    removed = 0
+    last_id = 0
+    while True:
+        ids = db.execute(
+            select(PatientSessionToken.id)
+            .where(
+                PatientSessionToken.id > last_id,
+                or_(PatientSessionToken.expires_at < now, PatientSessionToken.is_active == False),
+            )
+            .order_by(PatientSessionToken.id)
+            .limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            return removed
+        db.execute(delete(PatientSessionToken).where(PatientSessionToken.id.in_(ids)))
+        db.commit()
+        removed += len(ids)
+        last_id = ids[-1]
+        if len(ids) < batch_size:
+            return removed
@@ -0,0 +1,57 @@
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from core.models import Appointment, Patient
+"""
+환자별 취소되지 않은 예약 수 (patients.active_appointment_count)
+- 초진/재진 판단을 예약마다 appointments를 훑지 않고 이 값으로 한다.
+- 예약 생성/취소와 같은 트랜잭션에서 원자적 UPDATE로 갱신한다.
+- 기존 데이터나 값이 어긋났을 때는 backfill_active_appointment_counts로 다시 계산한다.
+"""
+
+
+def add_active_appointment(db: Session, patient_id: int) -> str:
+    """
+    예약 수를 1 올리고 이번 예약의 초진/재진 구분을 돌려준다 (commit은 호출한 쪽에서)
+    - 올린 뒤 값이 1이면 이전에 취소되지 않은 예약이 없었으므로 first(초진)
+    """
+    return "first" if add_active_appointments(db, patient_id, 1) == 1 else "followup"
+
+
+def add_active_appointments(db: Session, patient_id: int, count: int) -> int:
+    #일괄 등록용: 예약 수를 count만큼 올리고 올린 뒤 값을 돌려준다
+    return db.scalar(
+        update(Patient)
+        .where(Patient.id == patient_id)
+        .values(active_appointment_count=Patient.active_appointment_count + count)
+        .returning(Patient.active_appointment_count)
+    )
+
+
+def remove_active_appointment(db: Session, patient_id: int) -> None:
+    #예약 취소 시 1 내린다 (0 아래로는 내리지 않음)
+    db.execute(
+        update(Patient)
+        .where(Patient.id == patient_id, Patient.active_appointment_count > 0)
+        .values(active_appointment_count=Patient.active_appointment_count - 1)
+    )
+
+
+def backfill_active_appointment_counts(db: Session) -> int:
+    """
+    appointments로부터 모든 환자의 active_appointment_count를 다시 계산하고 commit
+    - 상관 서브쿼리 UPDATE 한 번으로 처리하고, 값이 바뀐 환자 수를 돌려준다
+    """
+    active_count = (
+        select(func.count(Appointment.id))
+        .where(Appointment.patient_id == Patient.id, Appointment.status != "canceled")
+        .scalar_subquery()
+    )
+    result = db.execute(
+        update(Patient)
+        .where(Patient.active_appointment_count != active_count)
+        .values(active_appointment_count=active_count)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
@@ -0,0 +1,113 @@
+import threading
+import time as time_module
+from datetime import date, time, datetime
+from typing import NamedTuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from core.config import get_settings
+from core.models import HospitalSlot
+from core.business.cache_versions import bump_version, get_version
+"""
+HospitalSlot 설정 캐시
+- HospitalSlot은 관리자 hospital_slots 라우터에서만 바뀌는 거의 고정된 데이터이므로
+  프로세스 안에 시작시간 순으로 정렬하고 30분 오프셋으로 색인해서 보관한다.
+- 관리자 생성/수정/삭제 시 cache_versions의 hospital_slots 버전을 올리고,
+  각 워커는 slot_cache_check_seconds 간격으로만 버전을 확인해서 바뀌었을 때 다시 읽는다.
+"""
+
+SLOT_VERSION_KEY = "hospital_slots"
+SLOT_OFFSET_MINUTES = 30  # 색인 단위(분)
+
+
+class SlotConfig(NamedTuple):
+    id: int
+    start_time: time
+    end_time: time
+    max_capacity: int
+
+
+def _minutes(t: time) -> int:
+    return t.hour * 60 + t.minute
+
+
+class SlotSnapshot:
+    """
+    특정 버전의 HospitalSlot 설정
+    - slots: 시작시간 순으로 정렬된 슬롯
+    - by_offset: 30분 오프셋(자정 기준) -> 그 30분 구간과 겹치는 슬롯
+    """
+
+    def __init__(self, version: int, slots: list[SlotConfig]):
+        self.version = version
+        self.slots = tuple(sorted(slots, key=lambda s: (s.start_time, s.end_time, s.id)))
+        by_offset: dict[int, list[SlotConfig]] = {}
+        for s in self.slots:
+            first = _minutes(s.start_time) // SLOT_OFFSET_MINUTES
+            last = (_minutes(s.end_time) - 1) // SLOT_OFFSET_MINUTES
+            for offset in range(first, last + 1):
+                by_offset.setdefault(offset, []).append(s)
+        self.by_offset = {offset: tuple(slots) for offset, slots in by_offset.items()}
+
+    def __bool__(self) -> bool:
+        return bool(self.slots)
+
+    def covering(self, start_dt: datetime, end_dt: datetime) -> list[SlotConfig]:
+        #[start_dt, end_dt) 구간과 겹치는 슬롯 (같은 날짜 기준)
+        d = start_dt.date()
+        first = _minutes(start_dt.time()) // SLOT_OFFSET_MINUTES
+        last = (_minutes(end_dt.time()) - 1) // SLOT_OFFSET_MINUTES if end_dt.date() == d else 24 * 60 // SLOT_OFFSET_MINUTES
+        covered: dict[int, SlotConfig] = {}
+        for offset in range(first, last + 1):
+            for s in self.by_offset.get(offset, ()):
+                if start_dt < datetime.combine(d, s.end_time) and datetime.combine(d, s.start_time) < end_dt:
+                    covered[s.id] = s
+        return sorted(covered.values(), key=lambda s: (s.start_time, s.end_time, s.id))
+
+
+class _SlotConfigCache:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.bind = None
+        self.snapshot: SlotSnapshot | None = None
+        self.checked_at = 0.0
+
+    def invalidate(self) -> None:
+        with self.lock:
+            self.snapshot = None
+
+    def get(self, db: Session) -> SlotSnapshot:
+        bind = db.get_bind()
+        interval = get_settings().slot_cache_check_seconds
+        with self.lock:
+            now = time_module.monotonic()
+            # 다른 DB에 연결된 세션이면(테스트 등) 캐시를 새로 만든다
+            if self.snapshot is not None and self.bind is bind and now - self.checked_at < interval:
+                return self.snapshot
+
+            version = get_version(db, SLOT_VERSION_KEY)
+            if self.snapshot is None or self.bind is not bind or self.snapshot.version != version:
+                rows = db.query(HospitalSlot).all()
+                self.snapshot = SlotSnapshot(
+                    version,
+                    [SlotConfig(s.id, s.start_time, s.end_time, s.max_capacity) for s in rows],
+                )
+                self.bind = bind
+            self.checked_at = now
+            return self.snapshot
+
+
+_cache = _SlotConfigCache()
+
+
+def get_slot_config(db: Session) -> SlotSnapshot:
+    return _cache.get(db)
+
+
+def bump_slot_version(db: Session) -> None:
+    """
+    HospitalSlot 변경 시 commit 전에 호출
+    - DB 버전을 올려 다른 워커가 감지하도록 하고, 현재 프로세스의 캐시는 commit 직후 비운다.
+    """
+    bump_version(db, SLOT_VERSION_KEY)
+    event.listen(db, "after_commit", lambda session: _cache.invalidate(), once=True)
@@ -0,0 +1,249 @@
+from datetime import date, datetime, time
+from itertools import groupby
+from sqlalchemy import and_, delete, select, update
+from sqlalchemy.orm import Session
+
+from core.config import get_settings
+from core.db import dialect_insert
+from core.models import Appointment, HospitalSlot, SlotOccupancy
+from core.business.occupancy import DayOccupancy
+from core.business.slot_config import SlotConfig
+"""
+날짜별 슬롯 사용 인원 카운터 (slot_occupancy)
+- capacity_check_mode=counter일 때 예약 생성/취소/상태 변경과 같은 트랜잭션에서 갱신한다.
+- 수용인원 검증은 예약이 걸치는 슬롯들에 대한 조건부 UPDATE(used < max_capacity) 한 번으로 처리하고,
+  갱신된 슬롯 수가 걸치는 슬롯 수보다 적으면 정원 초과로 보고 올린 슬롯만 되돌린다.
+- 걸치는 슬롯은 캐시 스냅샷이 아니라 hospital_slots에서 직접 찾는다 (다른 워커의 슬롯 변경 직후에도 같은 행을 갱신).
+- 카운터 행이 없는 (날짜, 슬롯)은 0으로 가정하지 않고 슬롯 행과 그날 예약으로 세어서 만든다.
+- 카운터를 바꾸는 함수는 슬롯이 정원에 찼거나 다시 여유가 생겼는지도 알려준다 (예약 가능 시간 캐시의 날짜별 정원 버전).
+- 카운터가 어긋났거나 counter 모드로 전환할 때는 rebuild_slot_occupancy로 다시 계산한다.
+"""
+
+REBUILD_BATCH_SIZE = 1000  # rebuild 시 한 번에 쓰는 행 수
+
+
+def counters_enabled() -> bool:
+    return get_settings().capacity_check_mode == "counter"
+
+
+def _covered_slots(db: Session, start_dt: datetime, end_dt: datetime) -> tuple[list[int], bool]:
+    """
+    [start_dt, end_dt)에 걸치는 슬롯 id와 그날 카운터 행이 없는 슬롯이 있는지 (SELECT 한 번)
+    - 캐시 스냅샷(get_slot_config)은 다른 워커의 슬롯 변경을 slot_cache_check_seconds 동안 모를 수 있으므로
+      카운터를 바꿀 때는 hospital_slots 행에서 직접 찾는다
+    """
+    slot_date = start_dt.date()
+    end_time = end_dt.time() if end_dt.date() == slot_date else time.max
+    rows = db.execute(
+        select(HospitalSlot.id, SlotOccupancy.slot_id)
+        .outerjoin(SlotOccupancy, and_(SlotOccupancy.slot_id == HospitalSlot.id, SlotOccupancy.slot_date == slot_date))
+        .where(HospitalSlot.start_time < end_time, HospitalSlot.end_time > start_dt.time())
+        .order_by(HospitalSlot.start_time, HospitalSlot.end_time, HospitalSlot.id)
+    ).all()
+    return [slot_id for slot_id, _ in rows], any(counter_slot_id is None for _, counter_slot_id in rows)
+
+
+def _load_slots(db: Session, slot_ids: list[int] | None = None) -> tuple[SlotConfig, ...]:
+    #캐시 스냅샷 대신 hospital_slots 행을 직접 읽는다 (다른 워커의 스냅샷이 낡았어도 현재 설정 기준)
+    query = select(HospitalSlot).order_by(HospitalSlot.start_time, HospitalSlot.end_time, HospitalSlot.id)
+    if slot_ids is not None:
+        query = query.where(HospitalSlot.id.in_(slot_ids))
+    return tuple(SlotConfig(s.id, s.start_time, s.end_time, s.max_capacity) for s in db.scalars(query))
+
+
+def _ensure_rows(db: Session, slot_date: date) -> None:
+    """
+    그날 빠진 카운터 행을 모두 만든다 (걸치는 슬롯의 행이 없을 때 호출)
+    - 없는 행을 0으로 가정하지 않고 슬롯 행과 그날 예약으로 다시 세어서 넣는다
+      (아직 카운터가 없는 날짜, 슬롯 변경 직후 재계산으로 지워진 행 모두 같은 값이 됨)
+    """
+    existing = set(db.scalars(select(SlotOccupancy.slot_id).where(SlotOccupancy.slot_date == slot_date)))
+    appts = db.scalars(
+        select(Appointment)
+        .where(Appointment.status != "canceled")
+        .where(Appointment.start_datetime >= datetime.combine(slot_date, time.min))
+        .where(Appointment.start_datetime <= datetime.combine(slot_date, time.max))
+    ).all()
+    slots = tuple(s for s in _load_slots(db) if s.id not in existing)
+    occupancy = DayOccupancy(slot_date, slots, list(appts))
+    rows = [{"slot_date": slot_date, "slot_id": s.id, "used": used} for s, used in zip(slots, occupancy.used)]
+    if not rows:
+        return
+
+    insert = dialect_insert(db)
+    if insert is not None:
+        db.execute(insert(SlotOccupancy).values(rows).on_conflict_do_nothing())
+    else:
+        db.execute(SlotOccupancy.__table__.insert(), rows)
+
+
+def _covered_slots_with_rows(db: Session, start_dt: datetime, end_dt: datetime) -> list[int]:
+    #걸치는 슬롯 id (카운터 행이 없으면 먼저 만든다)
+    slot_ids, missing = _covered_slots(db, start_dt, end_dt)
+    if missing:
+        _ensure_rows(db, start_dt.date())
+    return slot_ids
+
+
+def reserve_slots(db: Session, start_dt: datetime, end_dt: datetime) -> tuple[bool, bool]:
+    """
+    [start_dt, end_dt) 예약이 걸치는 모든 슬롯의 used를 1 올린다 (commit은 호출한 쪽에서)
+    - 반환값: (예약 가능 여부, 이번 예약으로 정원이 찬 슬롯이 있는지)
+    - 한 슬롯이라도 정원이 차 있으면 아무것도 바꾸지 않고 (False, False)
+    """
+    return _reserve(db, start_dt.date(), _covered_slots_with_rows(db, start_dt, end_dt))
+
+
+def move_slots(db: Session, old_start: datetime, old_end: datetime, new_start: datetime, new_end: datetime) -> tuple[bool, bool]:
+    """
+    예약 시간 변경: 새 구간에만 걸치는 슬롯은 조건부로 올리고, 옛 구간에만 걸치는 슬롯은 내린다 (commit은 호출한 쪽에서)
+    - 두 구간이 같이 걸치는 슬롯은 그대로 두므로 자기 자신의 기존 예약 때문에 정원 초과가 되지 않는다
+    - 반환값: (변경 가능 여부, 정원이 차거나 다시 여유가 생긴 슬롯이 있는지)
+    - 새 슬롯이 정원 초과면 아무것도 바꾸지 않고 (False, False)
+    """
+    old_ids, _ = _covered_slots(db, old_start, old_end)
+    new_ids = _covered_slots_with_rows(db, new_start, new_end)
+    if old_start.date() == new_start.date():
+        old_ids, new_ids = [i for i in old_ids if i not in new_ids], [i for i in new_ids if i not in old_ids]
+
+    reserved, filled = _reserve(db, new_start.date(), new_ids)
+    if not reserved:
+        return False, False
+    freed = _decrement(db, old_start.date(), old_ids) if old_ids else False
+    return True, filled or freed
+
+
+def _max_capacity():
+    #카운터 행의 슬롯 정원 (UPDATE 조건/RETURNING용 상관 서브쿼리)
+    return (
+        select(HospitalSlot.max_capacity)
+        .where(HospitalSlot.id == SlotOccupancy.slot_id)
+        .scalar_subquery()
+    )
+
+
+def _reserve(db: Session, slot_date: date, slot_ids: list[int]) -> tuple[bool, bool]:
+    if not slot_ids:
+        # 개발 초기에 slot 미구성 시 무제한 처리
+        return True, False
+
+    rows = db.execute(
+        update(SlotOccupancy)
+        .where(SlotOccupancy.slot_date == slot_date)
+        .where(SlotOccupancy.slot_id.in_(slot_ids))
+        .where(SlotOccupancy.used < _max_capacity())
+        .values(used=SlotOccupancy.used + 1)
+        .returning(SlotOccupancy.slot_id, SlotOccupancy.used >= _max_capacity())
+        .execution_options(synchronize_session=False)
+    ).all()
+    if len(rows) == len(slot_ids):
+        return True, any(full for _, full in rows)
+
+    #일부 슬롯만 올라갔으면 올린 슬롯만 되돌린다
+    if rows:
+        _decrement(db, slot_date, [slot_id for slot_id, _ in rows])
+    return False, False
+
+
+def release_slots(db: Session, start_dt: datetime, end_dt: datetime) -> bool:
+    """
+    취소 등으로 예약이 빠질 때 걸치는 슬롯의 used를 1 내린다 (commit은 호출한 쪽에서)
+    - 반환값: 정원이 차 있던 슬롯에 다시 여유가 생겼는지
+    """
+    slot_ids, _ = _covered_slots(db, start_dt, end_dt)
+    return _decrement(db, start_dt.date(), slot_ids) if slot_ids else False
+
+
+def _decrement(db: Session, slot_date: date, slot_ids: list[int]) -> bool:
+    #내리기 전에 정원이 차 있던 슬롯이 있으면 True
+    freed = db.scalars(
+        update(SlotOccupancy)
+        .where(SlotOccupancy.slot_date == slot_date)
+        .where(SlotOccupancy.slot_id.in_(slot_ids))
+        .where(SlotOccupancy.used > 0)
+        .values(used=SlotOccupancy.used - 1)
+        .returning(SlotOccupancy.used + 1 >= _max_capacity())
+        .execution_options(synchronize_session=False)
+    ).all()
+    return any(freed)
+
+
+def load_used(db: Session, date_from: date, date_to: date) -> dict[date, dict[int, int]]:
+    #기간 내 날짜별 {slot_id: used}
+    rows = db.execute(
+        select(SlotOccupancy.slot_date, SlotOccupancy.slot_id, SlotOccupancy.used)
+        .where(SlotOccupancy.slot_date >= date_from, SlotOccupancy.slot_date <= date_to)
+    ).all()
+    used: dict[date, dict[int, int]] = {}
+    for slot_date, slot_id, count in rows:
+        used.setdefault(slot_date, {})[slot_id] = count
+    return used
+
+
+def drop_slot_occupancy(db: Session, slot_id: int) -> None:
+    #삭제된 슬롯의 카운터 정리 (commit은 호출한 쪽에서)
+    db.execute(delete(SlotOccupancy).where(SlotOccupancy.slot_id == slot_id))
+
+
+def occupied_dates(db: Session, date_from: date) -> list[date]:
+    #date_from 이후 카운터 행이 있는 날짜 (슬롯 변경 시 잠글 날짜)
+    return list(db.scalars(
+        select(SlotOccupancy.slot_date).where(SlotOccupancy.slot_date >= date_from).distinct()
+    ))
+
+
+def rebuild_slot_occupancy(
+        db: Session,
+        date_from: date | None = None,
+        date_to: date | None = None,
+        slot_ids: list[int] | None = None,
+        commit: bool = True,
+) -> int:
+    """
+    appointments로부터 slot_occupancy를 다시 계산하고 commit한다.
+    - date_from/date_to/slot_ids로 범위를 좁힐 수 있다.
+    - 슬롯 설정은 hospital_slots에서 직접 읽으므로 같은 트랜잭션에서 바꾼 슬롯도 반영된다.
+    - commit=False면 슬롯 변경과 같은 트랜잭션에 넣고 commit은 호출한 쪽에서
+    - 반환값: 기록한 카운터 행 수 (used > 0 인 행만 기록)
+    """
+    db.flush()
+    slots = _load_slots(db, slot_ids)
+
+    stmt = delete(SlotOccupancy)
+    if date_from is not None:
+        stmt = stmt.where(SlotOccupancy.slot_date >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(SlotOccupancy.slot_date <= date_to)
+    if slot_ids is not None:
+        stmt = stmt.where(SlotOccupancy.slot_id.in_(slot_ids))
+    db.execute(stmt)
+
+    query = (
+        db.query(Appointment)
+        .filter(Appointment.status != "canceled")
+        .order_by(Appointment.start_datetime.asc())
+    )
+    if date_from is not None:
+        query = query.filter(Appointment.start_datetime >= datetime.combine(date_from, time.min))
+    if date_to is not None:
+        query = query.filter(Appointment.start_datetime <= datetime.combine(date_to, time.max))
+
+    written = 0
+    batch: list[dict] = []
+    #날짜 순으로 흘려 읽으면서 하루씩 계산
+    for slot_date, appts in groupby(query.yield_per(REBUILD_BATCH_SIZE), key=lambda a: a.start_datetime.date()):
+        occupancy = DayOccupancy(slot_date, slots, list(appts))
+        for s, used in zip(slots, occupancy.used):
+            if used > 0:
+                batch.append({"slot_date": slot_date, "slot_id": s.id, "used": used})
+        if len(batch) >= REBUILD_BATCH_SIZE:
+            db.execute(SlotOccupancy.__table__.insert(), batch)
+            written += len(batch)
+            batch = []
+    if batch:
+        db.execute(SlotOccupancy.__table__.insert(), batch)
+        written += len(batch)
+
+    if commit:
+        db.commit()
+    return written
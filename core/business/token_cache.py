@@ -0,0 +1,123 @@
+import threading
+from datetime import datetime
+from typing import NamedTuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from core.config import get_settings
+from core.utils.cache import LRUCache
+from core.models import PatientSessionToken
+from core.business.cache_versions import bump_version, get_version
+"""
+환자 access_token 검증 결과 캐시
+- 토큰 문자열 -> (patient_id, expires_at, is_active), 크기 제한 LRU + TTL
+- 같은 세션의 반복 요청은 patient_session_tokens를 조회하지 않는다.
+- issue_patient_token이 기존 토큰을 비활성화하면 해당 환자의 항목을 바로 제거한다.
+- 다른 워커에서 재로그인한 경우 이 워커의 항목은 TTL(token_cache_ttl_seconds)이 지나야 반영된다.
+
+signed 모드의 환자별 세션 세대 캐시
+- 세대는 cache_versions의 patient_session:{patient_id} 버전이며 로그인할 때마다 1 올린다.
+- 토큰의 세대가 캐시보다 낮으면 이전 세션(401), 높으면 다른 워커의 새 로그인이므로 DB에서 다시 읽는다.
+"""
+
+
+class TokenInfo(NamedTuple):
+    patient_id: int
+    expires_at: datetime
+    is_active: bool
+
+
+_cache: LRUCache | None = None
+_generations: LRUCache | None = None
+_cache_lock = threading.Lock()
+
+
+def _get_cache() -> LRUCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                settings = get_settings()
+                _cache = LRUCache(settings.token_cache_size, ttl_seconds=settings.token_cache_ttl_seconds)
+    return _cache
+
+
+def _get_generation_cache() -> LRUCache:
+    global _generations
+    if _generations is None:
+        with _cache_lock:
+            if _generations is None:
+                settings = get_settings()
+                _generations = LRUCache(
+                    settings.session_generation_cache_size,
+                    ttl_seconds=settings.session_generation_ttl_seconds,
+                )
+    return _generations
+
+
+def _session_version_key(patient_id: int) -> str:
+    return f"patient_session:{patient_id}"
+
+
+def lookup_token(db: Session, token_str: str) -> TokenInfo | None:
+    """
+    토큰 정보 조회 (없는 토큰이면 None, 없는 토큰은 캐시하지 않음)
+    """
+    cache = _get_cache()
+    cache.bind_owner(db.get_bind())
+    info = cache.get(token_str)
+    if info is not None:
+        return info
+
+    row = db.execute(
+        select(
+            PatientSessionToken.patient_id,
+            PatientSessionToken.expires_at,
+            PatientSessionToken.is_active,
+        ).where(PatientSessionToken.access_token == token_str)
+    ).first()
+    if row is None:
+        return None
+    info = TokenInfo(row.patient_id, row.expires_at, bool(row.is_active))
+    cache.set(token_str, info)
+    return info
+
+
+def invalidate_patient_tokens(patient_id: int) -> int:
+    """
+    환자의 토큰이 비활성화될 때 commit 후 호출
+    """
+    return _get_cache().pop_values_where(lambda info: info.patient_id == patient_id)
+
+
+def token_cache_stats() -> dict[str, int | float]:
+    return _get_cache().stats()
+
+
+def current_session_generation(db: Session, patient_id: int, seen: int = 0) -> int:
+    """
+    환자의 현재 세션 세대 (캐시 값이 seen보다 낮으면 DB에서 다시 읽음)
+    """
+    cache = _get_generation_cache()
+    cache.bind_owner(db.get_bind())
+    generation = cache.get(patient_id)
+    if generation is None or generation < seen:
+        generation = get_version(db, _session_version_key(patient_id))
+        cache.set(patient_id, generation)
+    return generation
+
+
+def next_session_generation(db: Session, patient_id: int) -> int:
+    """
+    로그인 시 commit 전에 호출: 세대를 1 올리고 새 세대를 반환 (이전 세대 토큰은 무효)
+    """
+    key = _session_version_key(patient_id)
+    bump_version(db, key)
+    return get_version(db, key)
+
+
+def remember_session_generation(db: Session, patient_id: int, generation: int) -> None:
+    #commit 후 호출: 이 워커는 이전 세대 토큰을 바로 거부
+    cache = _get_generation_cache()
+    cache.bind_owner(db.get_bind())
+    cache.set(patient_id, generation)
@@ -0,0 +1,32 @@
+"""
+patients.active_appointment_count 재계산
+
+사용법:
+    python -m core.commands.backfill_patient_visits
+
+컬럼을 추가한 직후(기존 DB는 아래 ALTER 먼저 실행), 또는 값이 appointments와 어긋났을 때 실행합니다.
+    ALTER TABLE patients ADD COLUMN active_appointment_count INTEGER NOT NULL DEFAULT 0;
+"""
+import argparse
+import time
+
+from core.db import get_sessionmaker, init_db
+from core.business.patient_visits import backfill_active_appointment_counts
+
+
+def main() -> None:
+    argparse.ArgumentParser(description="appointments로부터 환자별 취소되지 않은 예약 수를 다시 계산").parse_args()
+
+    init_db()
+    db = get_sessionmaker()()
+    try:
+        started = time.perf_counter()
+        updated = backfill_active_appointment_counts(db)
+        elapsed = time.perf_counter() - started
+    finally:
+        db.close()
+    print(f"patients.active_appointment_count backfilled: {updated} rows updated in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
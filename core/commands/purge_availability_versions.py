@@ -0,0 +1,29 @@
+"""
+지난 날짜의 예약 가능 시간 캐시 버전 삭제
+
+사용법:
+    python -m core.commands.purge_availability_versions
+
+예약 생성/취소마다 cache_versions에 (의사, 날짜)별 예약 버전과 날짜별 정원 버전 행이 생깁니다.
+지난 날짜는 캐시하지 않으므로 오늘 이전 날짜의 행은 필요 없습니다. 하루 한 번(cron 등) 실행합니다.
+"""
+import time
+
+from core.db import get_sessionmaker, init_db
+from core.business.availability_cache import purge_availability_versions
+
+
+def main() -> None:
+    init_db()
+    db = get_sessionmaker()()
+    try:
+        started = time.perf_counter()
+        removed = purge_availability_versions(db)
+        elapsed = time.perf_counter() - started
+    finally:
+        db.close()
+    print(f"availability versions purged: {removed} rows removed in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
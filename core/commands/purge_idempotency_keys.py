@@ -0,0 +1,37 @@
+"""
+만료된 Idempotency-Key 삭제
+
+사용법:
+    python -m core.commands.purge_idempotency_keys [--batch-size 1000]
+
+키는 환자별로 나뉘고 보통 요청마다 새로 만들어지므로 IDEMPOTENCY_TTL_SECONDS가 지난 행이
+idempotency_keys에 계속 쌓입니다. 주기적으로(cron 등) 실행합니다.
+배치마다 commit하므로 실행 중에도 예약 생성이 오래 막히지 않습니다.
+"""
+import argparse
+import time
+
+from core.db import get_sessionmaker, init_db
+from core.business.idempotency import purge_idempotency_keys
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="보관 시간이 지난 Idempotency-Key를 배치 단위로 삭제")
+    parser.add_argument("--batch-size", type=int, default=1000, help="한 번에 삭제할 최대 행 수")
+    args = parser.parse_args()
+    if args.batch_size <= 0:
+        parser.error("--batch-size must be positive")
+
+    init_db()
+    db = get_sessionmaker()()
+    try:
+        started = time.perf_counter()
+        removed = purge_idempotency_keys(db, batch_size=args.batch_size)
+        elapsed = time.perf_counter() - started
+    finally:
+        db.close()
+    print(f"idempotency_keys purged: {removed} rows removed in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
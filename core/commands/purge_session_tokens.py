@@ -0,0 +1,36 @@
+"""
+만료/비활성 환자 토큰 삭제
+
+사용법:
+    python -m core.commands.purge_session_tokens [--batch-size 1000]
+
+재로그인으로 비활성화된 토큰과 만료된 토큰이 patient_session_tokens에 계속 쌓이므로 주기적으로(cron 등) 실행합니다.
+배치마다 commit하므로 실행 중에도 로그인/인증이 오래 막히지 않습니다.
+"""
+import argparse
+import time
+
+from core.db import get_sessionmaker, init_db
+from core.business.patient_auth import purge_session_tokens
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="만료되었거나 비활성화된 환자 토큰을 배치 단위로 삭제")
+    parser.add_argument("--batch-size", type=int, default=1000, help="한 번에 삭제할 최대 행 수")
+    args = parser.parse_args()
+    if args.batch_size <= 0:
+        parser.error("--batch-size must be positive")
+
+    init_db()
+    db = get_sessionmaker()()
+    try:
+        started = time.perf_counter()
+        removed = purge_session_tokens(db, batch_size=args.batch_size)
+        elapsed = time.perf_counter() - started
+    finally:
+        db.close()
+    print(f"patient_session_tokens purged: {removed} rows removed in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
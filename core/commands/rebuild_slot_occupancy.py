@@ -0,0 +1,36 @@
+"""
+slot_occupancy 카운터 재계산
+
+사용법:
+    python -m core.commands.rebuild_slot_occupancy
+    python -m core.commands.rebuild_slot_occupancy --date-from 2026-01-01 --date-to 2026-01-31
+
+capacity_check_mode=counter로 전환하기 전, 또는 카운터가 appointments와 어긋났을 때 실행합니다.
+"""
+import argparse
+import time
+from datetime import date
+
+from core.db import get_sessionmaker, init_db
+from core.business.slot_occupancy import rebuild_slot_occupancy
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="appointments로부터 slot_occupancy 카운터를 다시 계산")
+    parser.add_argument("--date-from", type=date.fromisoformat, default=None, help="YYYY-MM-DD (포함)")
+    parser.add_argument("--date-to", type=date.fromisoformat, default=None, help="YYYY-MM-DD (포함)")
+    args = parser.parse_args()
+
+    init_db()
+    db = get_sessionmaker()()
+    try:
+        started = time.perf_counter()
+        written = rebuild_slot_occupancy(db, date_from=args.date_from, date_to=args.date_to)
+        elapsed = time.perf_counter() - started
+    finally:
+        db.close()
+    print(f"slot_occupancy rebuilt: {written} rows in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
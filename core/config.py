@@ -4,6 +4,35 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 class Settings(BaseSettings):
     app_env: str = "development"
     db_url: str
+    #다른 워커의 HospitalSlot 변경(cache_versions)을 확인하는 최소 간격(초)
+    slot_cache_check_seconds: float = 5.0
+    #(의사, 날짜, 시술)별 예약 가능 시간 캐시 최대 항목 수 (0이면 사용 안 함)
+    availability_cache_size: int = 2048
+    #병원 수용인원 검증 방식
+    # - memory: 하루치 예약을 읽어 메모리에서 계산
+    # - counter: slot_occupancy 카운터를 조건부 UPDATE로 증가 (전환 전 rebuild_slot_occupancy 실행)
+    # - aggregate: 예약이 걸치는 슬롯만 DB 집계 쿼리 한 번으로 확인
+    capacity_check_mode: str = "memory"
+    #예약 생성 시 (의사, 날짜)/(날짜) 단위 잠금 사용 여부와 잠금 대기 최대 시간(초)
+    booking_locks: bool = True
+    booking_lock_timeout_seconds: float = 5.0
+    #Idempotency-Key 응답 보관 시간(초)과 같은 키의 처리 중 요청을 기다리는 최대 시간(초)
+    idempotency_ttl_seconds: float = 86400.0
+    idempotency_wait_seconds: float = 10.0
+    #응답 없이 이 시간(초)이 지난 처리 중 키는 중단된 요청으로 보고 다시 선점 (잠금 대기 + 처리 시간보다 길게)
+    idempotency_lease_seconds: float = 60.0
+    #환자 토큰 검증 결과 캐시 최대 항목 수(0이면 사용 안 함)와 유지 시간(초)
+    # - 다른 워커에서 재로그인해 비활성화된 토큰은 최대 이 시간 동안 이 워커에서 유효할 수 있음
+    token_cache_size: int = 4096
+    token_cache_ttl_seconds: float = 30.0
+    #환자 토큰 방식
+    # - db: patient_session_tokens에 저장한 랜덤 토큰 (기본)
+    # - signed: patient_token_secret으로 서명한 토큰 (검증 시 DB 조회 없음, 세션 세대만 캐시로 확인)
+    patient_token_mode: str = "db"
+    patient_token_secret: str = ""
+    #signed 모드의 환자별 세션 세대 캐시 최대 항목 수와 유지 시간(초)
+    session_generation_cache_size: int = 8192
+    session_generation_ttl_seconds: float = 30.0
     
     model_config = SettingsConfigDict(
         env_file=None,
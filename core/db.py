@@ -3,6 +3,8 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from core.config import get_settings
 from sqlalchemy.pool import StaticPool
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 
 class Base(DeclarativeBase):
@@ -57,6 +59,16 @@ def get_db() -> Generator:
         db.close()
 
 
+def dialect_insert(db):
+    """
+    ON CONFLICT(upsert)를 지원하는 DB면 해당 dialect의 insert, 아니면 None
+    """
+    return {
+        "postgresql": pg_insert,
+        "sqlite": sqlite_insert,
+    }.get(db.get_bind().dialect.name)
+
+
 def init_db() -> None:
     """
     개발 편의용: 테이블이 없으면 생성
@@ -4,5 +4,8 @@ from .hospital_slot import HospitalSlot
 from .patient import Patient
 from .appointment import Appointment
 from .patient_session_token import PatientSessionToken
+from .cache_version import CacheVersion
+from .slot_occupancy import SlotOccupancy
+from .idempotency_key import IdempotencyKey
 
-__all__ = ["Doctor", "Treatment", "HospitalSlot", "Patient", "Appointment", "PatientSessionToken"]
\ No newline at end of file
+__all__ = ["Doctor", "Treatment", "HospitalSlot", "Patient", "Appointment", "PatientSessionToken", "CacheVersion", "SlotOccupancy", "IdempotencyKey"]
\ No newline at end of file
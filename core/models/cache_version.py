@@ -0,0 +1,13 @@
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.types import Integer, String
+from core.db import Base
+"""
+캐시 버전 (CacheVersion)
+설명: 프로세스 내 캐시가 다른 API 워커의 변경을 감지하기 위한 이름별 버전 번호
+예시: name=hospital_slots, version=3
+"""
+class CacheVersion(Base):
+    __tablename__ = "cache_versions"
+
+    name: Mapped[str] = mapped_column(String(100), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -0,0 +1,18 @@
+from datetime import datetime
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.types import DateTime, Integer, String, Text
+from core.db import Base
+"""
+멱등성 키 (IdempotencyKey)
+필수 필드: 키, 요청 해시, 생성일시
+설명: Idempotency-Key 헤더로 들어온 예약 생성 요청의 첫 응답. status_code가 비어 있으면 처리 중
+예시: key=3f1c..., status_code=201, response_body={"id": 10, ...}
+"""
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    status_code: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    response_body: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
@@ -5,10 +5,12 @@ from core.db import Base
 2-4. 환자 정보 (Patient)
 필수 필드: 이름, 연락처
 설명: 예약을 진행하는 환자의 기본 정보
+active_appointment_count: 취소되지 않은 예약 수 (0이면 다음 예약은 초진). 예약 생성/취소 시 함께 갱신됩니다.
 """
 class Patient(Base):
     __tablename__ = "patients"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String(100), nullable=False)
-    phone_number: Mapped[str] = mapped_column(String(15), nullable=False, unique=True)
\ No newline at end of file
+    phone_number: Mapped[str] = mapped_column(String(15), nullable=False, unique=True)
+    active_appointment_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
@@ -0,0 +1,16 @@
+from datetime import date
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Date, ForeignKey, Integer
+from core.db import Base
+"""
+날짜별 슬롯 사용 인원 (SlotOccupancy)
+필수 필드: 날짜, 병원 슬롯(FK), 사용 인원
+설명: 날짜별 HospitalSlot과 겹치는 취소되지 않은 예약 수. 예약 생성/취소/상태 변경 시 함께 갱신됩니다.
+예시: 날짜: 2026-01-03, 슬롯: 10:00~10:30, 사용 인원: 2
+"""
+class SlotOccupancy(Base):
+    __tablename__ = "slot_occupancy"
+
+    slot_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    slot_id: Mapped[int] = mapped_column(Integer, ForeignKey("hospital_slots.id", ondelete="CASCADE"), primary_key=True)
+    used: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -1,5 +1,5 @@
 from .doctor import DoctorRead
-from .availability import AvailabilityResponse
-from .appointment import AppointmentCreate, AppointmentRead
+from .availability import AvailabilityResponse, AvailabilityDay, AvailabilityRangeResponse, EarliestStartTime, EarliestAvailabilityResponse, DoctorAvailability, DoctorsAvailabilityResponse, AvailabilityCacheStats
+from .appointment import AppointmentCreate, AppointmentReschedule, AppointmentRead
 
-__all__ = ["DoctorRead", "AvailabilityResponse", "AppointmentCreate", "AppointmentRead"]
\ No newline at end of file
+__all__ = ["DoctorRead", "AvailabilityResponse", "AvailabilityDay", "AvailabilityRangeResponse", "EarliestStartTime", "EarliestAvailabilityResponse", "DoctorAvailability", "DoctorsAvailabilityResponse", "AvailabilityCacheStats", "AppointmentCreate", "AppointmentReschedule", "AppointmentRead"]
\ No newline at end of file
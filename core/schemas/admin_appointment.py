@@ -1,4 +1,20 @@
+from typing import List, Optional
 from pydantic import BaseModel
 
+from core.schemas.appointment import AppointmentCreate, AppointmentRead
+
 class AppointmentStatusUpdate(BaseModel):
     status: str
+
+class AppointmentBulkCreate(BaseModel):
+    items: List[AppointmentCreate]
+
+class AppointmentBulkItemResult(BaseModel):
+    index: int
+    appointment: Optional[AppointmentRead] = None
+    error: Optional[str] = None
+
+class AppointmentBulkCreateResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[AppointmentBulkItemResult]
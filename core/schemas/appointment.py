@@ -9,6 +9,9 @@ class AppointmentCreate(BaseModel):
     start_datetime: datetime
     memo: str = ""
 
+class AppointmentReschedule(BaseModel):
+    start_datetime: datetime
+
 class AppointmentRead(BaseModel):
     id: int
     patient_id: int
@@ -1,6 +1,6 @@
 from datetime import date
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 """
 3-2. 예약 가능 시간 조회
 기능: 특정 의사의 예약 가능한 시간대를 조회합니다.
@@ -13,4 +13,45 @@ class AvailabilityResponse(BaseModel):
     doctor_id: int
     treatment_id: int
     dete: date
-    available_start_times: List[str]
\ No newline at end of file
+    available_start_times: List[str]
+
+class AvailabilityDay(BaseModel):
+    date: date
+    available_start_times: List[str]
+
+class AvailabilityRangeResponse(BaseModel):
+    doctor_id: int
+    treatment_id: int
+    date_from: date
+    date_to: date
+    days: List[AvailabilityDay]
+
+class EarliestStartTime(BaseModel):
+    date: date
+    start_time: str
+
+class EarliestAvailabilityResponse(BaseModel):
+    doctor_id: int
+    treatment_id: int
+    date_from: date
+    horizon_days: int
+    start_times: List[EarliestStartTime]
+
+class DoctorAvailability(BaseModel):
+    doctor_id: int
+    doctor_name: str
+    department: str
+    available_start_times: List[str]
+
+class DoctorsAvailabilityResponse(BaseModel):
+    treatment_id: int
+    date: date
+    department: Optional[str] = None
+    doctors: List[DoctorAvailability]
+
+class AvailabilityCacheStats(BaseModel):
+    size: int
+    maxsize: int
+    hits: int
+    misses: int
+    hit_ratio: float
@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    스레드 안전한 크기 제한 LRU 캐시 (선택적으로 TTL)
+    - maxsize를 넘으면 가장 오래 사용하지 않은 항목부터 제거
+    - hits/misses 카운터로 캐시 크기 조정에 참고
+    """
+
+    def __init__(self, maxsize: int, ttl_seconds: float | None = None):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._owner: Any = None
+
+    def bind_owner(self, owner: Any) -> None:
+        #캐시 내용이 속한 대상(DB 연결 등)이 바뀌면 전부 비운다
+        with self._lock:
+            if owner is not self._owner:
+                self._data.clear()
+                self._owner = owner
+
+    def get(self, key: Hashable, default: Any = None, valid: Callable[[Any], bool] | None = None) -> Any:
+        #valid가 주어지면 False인 항목은 만료된 것으로 보고 제거
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING and self.ttl_seconds is not None and item[0] <= time.monotonic():
+                del self._data[key]
+                item = _MISSING
+            if item is not _MISSING and valid is not None and not valid(item[1]):
+                del self._data[key]
+                item = _MISSING
+            if item is _MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds is not None else 0.0
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def pop_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    def pop_values_where(self, predicate: Callable[[Any], bool]) -> int:
+        #값 기준으로 제거 (키만으로 대상을 찾을 수 없을 때)
+        with self._lock:
+            keys = [key for key, item in self._data.items() if predicate(item[1])]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict[str, int | float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
@@ -0,0 +1,55 @@
+"""
+gateway 응답 캐시 무효화 힌트
+- 데이터를 바꾸는 요청이 성공하면 upstream 응답에 X-Cache-Purge 헤더로 영향받는 공개 GET 경로 prefix를 알린다.
+- gateway는 이 헤더를 보고 캐시 항목을 제거하고, 클라이언트에는 전달하지 않는다.
+"""
+
+CACHE_PURGE_HEADER = "X-Cache-Purge"
+
+_AVAILABILITY = "/api/v1/patient/availability"
+_DOCTORS = "/api/v1/patient/doctors"
+
+#변경 요청 경로 prefix -> 무효화할 공개 GET 경로 prefix
+#(병원 수용인원은 의사 전체가 공유하므로 예약 변경은 예약 가능 시간 전체를 무효화)
+PURGE_RULES: list[tuple[str, tuple[str, ...]]] = [
+    ("/api/v1/admin/doctors", (_DOCTORS, _AVAILABILITY)),
+    ("/api/v1/admin/treatments", (_AVAILABILITY,)),
+    ("/api/v1/admin/hospital-slots", (_AVAILABILITY,)),
+    ("/api/v1/admin/appointments", (_AVAILABILITY,)),
+    ("/api/v1/patient/appointments", (_AVAILABILITY,)),
+]
+
+_SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def purge_prefixes(method: str, path: str) -> tuple[str, ...]:
+    if method in _SAFE_METHODS:
+        return ()
+    for prefix, purges in PURGE_RULES:
+        if path.startswith(prefix):
+            return purges
+    return ()
+
+
+class CachePurgeHintMiddleware:
+    """
+    성공한(2xx) 변경 요청의 응답에 X-Cache-Purge 헤더 추가 (ASGI 미들웨어)
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        purges = purge_prefixes(scope["method"], scope["path"]) if scope["type"] == "http" else ()
+        if not purges:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_hint(message):
+            if message["type"] == "http.response.start" and 200 <= message["status"] < 300:
+                headers = list(message.get("headers", []))
+                headers.append((CACHE_PURGE_HEADER.lower().encode(), ",".join(purges).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_hint)
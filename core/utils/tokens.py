@@ -1,4 +1,25 @@
+import base64
+import hashlib
+import hmac
 import secrets
 
 def generate_token(length: int = 32) -> str:
-    return secrets.token_urlsafe(length)
\ No newline at end of file
+    return secrets.token_urlsafe(length)
+
+def _signature(body: str, secret: str) -> str:
+    digest = hmac.new(secret.encode(), body.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+def sign_token(fields: list[str], secret: str) -> str:
+    """
+    HMAC-SHA256 서명 토큰: "필드1.필드2....서명" (필드에는 '.'이 없어야 함)
+    """
+    body = ".".join(fields)
+    return f"{body}.{_signature(body, secret)}"
+
+def verify_signed_token(token: str, secret: str) -> list[str] | None:
+    #서명이 맞으면 필드 목록, 아니면 None
+    body, sep, signature = token.rpartition(".")
+    if not sep or not hmac.compare_digest(signature, _signature(body, secret)):
+        return None
+    return body.split(".")
@@ -36,7 +36,8 @@ CREATE TABLE hospital_slots (
 CREATE TABLE patients (
     id SERIAL PRIMARY KEY,
     name VARCHAR(100) NOT NULL,
-    phone_number VARCHAR(20) NOT NULL UNIQUE
+    phone_number VARCHAR(20) NOT NULL UNIQUE,
+    active_appointment_count INTEGER NOT NULL DEFAULT 0
 );
 
 -- =========================
@@ -54,3 +55,33 @@ CREATE TABLE appointments (
     memo TEXT,
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
+
+-- =========================
+-- Cache Versions
+-- =========================
+CREATE TABLE cache_versions (
+    name VARCHAR(100) PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+-- =========================
+-- Slot Occupancy
+-- =========================
+CREATE TABLE slot_occupancy (
+    slot_date DATE NOT NULL,
+    slot_id INTEGER NOT NULL REFERENCES hospital_slots(id) ON DELETE CASCADE,
+    used INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (slot_date, slot_id)
+);
+
+-- =========================
+-- Idempotency Keys
+-- =========================
+CREATE TABLE idempotency_keys (
+    key VARCHAR(255) PRIMARY KEY,
+    request_hash VARCHAR(64) NOT NULL,
+    status_code INTEGER,
+    response_body TEXT,
+    created_at TIMESTAMP NOT NULL
+);
+CREATE INDEX ix_idempotency_keys_created_at ON idempotency_keys (created_at);
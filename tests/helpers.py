@@ -0,0 +1,45 @@
+# tests/helpers.py
+"""
+여러 테스트 모듈에서 쓰는 요청/측정 헬퍼
+"""
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+
+def book(client, doctor_id, treatment_id, start_dt, patient=("김철수", "010-3333-4444")):
+    return client.post(
+        "/api/v1/patient/appointments",
+        json={
+            "patient_name": patient[0],
+            "patient_phone": patient[1],
+            "doctor_id": doctor_id,
+            "treatment_id": treatment_id,
+            "start_datetime": start_dt.isoformat(),
+            "memo": "",
+        },
+    )
+
+
+@contextmanager
+def count_statements(connection):
+    """
+    요청 하나가 DB에 보내는 SQL 문 수 (테스트 격리용 SAVEPOINT 문은 제외)
+    """
+    statements: list[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith(("SAVEPOINT", "RELEASE", "ROLLBACK")):
+            statements.append(statement)
+
+    event.listen(connection, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(connection, "before_cursor_execute", before_cursor_execute)
+
+
+def login(client, phone="010-3333-4444", name="김철수"):
+    res = client.post("/api/v1/patient/auth/patient/login", json={"phone_number": phone, "name": name})
+    assert res.status_code == 200, res.text
+    return {"Authorization": f"Bearer {res.json()['access_token']}"}
@@ -405,6 +405,34 @@ def test_admin_delete_hospital_slot_not_found_404(gateway_client):
     assert res.status_code == 404, res.text
 
 
+def test_admin_hospital_slot_change_refreshes_slot_cache(gateway_client, db_session):
+    """
+    [정상] HospitalSlot 캐시
+    - 변경이 없으면 같은 스냅샷을 재사용(조회 쿼리 없음)
+    - 관리자 생성/수정으로 버전이 올라가면 다음 조회에서 새 설정을 읽어야 함
+    """
+    from core.business.slot_config import get_slot_config
+
+    created = gateway_client.post(
+        "/api/v1/admin/hospital-slots",
+        json={"start_time": "15:00:00", "end_time": "15:30:00", "max_capacity": 1},
+    )
+    assert created.status_code in (200, 201), created.text
+    slot_id = created.json()["id"]
+
+    snapshot = get_slot_config(db_session)
+    assert get_slot_config(db_session) is snapshot
+    assert [s.max_capacity for s in snapshot.slots if s.id == slot_id] == [1]
+
+    res = gateway_client.put(f"/api/v1/admin/hospital-slots/{slot_id}", json={"max_capacity": 5})
+    assert res.status_code == 200, res.text
+
+    refreshed = get_slot_config(db_session)
+    assert refreshed.version > snapshot.version
+    assert [s.max_capacity for s in refreshed.slots if s.id == slot_id] == [5]
+    assert [s.id for s in refreshed.by_offset[15 * 2]] == [slot_id]
+
+
 # =========================================================
 # Admin Appointments
 # Base: /api/v1/admin/appointments
@@ -492,6 +520,86 @@ def test_admin_update_appointment_status_invalid_transition_400(gateway_client,
     assert res.status_code == 400, res.text
 
 
+def _bulk_item(doctor_id, treatment_id, start_dt, patient=("김철수", "010-3333-4444")):
+    return {
+        "patient_name": patient[0],
+        "patient_phone": patient[1],
+        "doctor_id": doctor_id,
+        "treatment_id": treatment_id,
+        "start_datetime": start_dt.isoformat(),
+        "memo": "이관",
+    }
+
+
+def test_admin_bulk_create_appointments_per_item_results(gateway_client, seed_master, db_session):
+    """
+    [정상/예외] POST /api/v1/admin/appointments/bulk
+    - 요청 안의 의사 중복/슬롯 정원(2) 초과/없는 환자는 해당 건만 실패
+    - 나머지는 저장되고, 환자별 첫 건만 first
+    """
+    from core.models import Doctor
+
+    doctors = [seed_master["doctor"], Doctor(name="의사1", department="피부과"), Doctor(name="의사2", department="피부과")]
+    db_session.add_all(doctors[1:])
+    db_session.flush()
+    treatment_id = seed_master["treatment"].id
+    start = datetime.combine(datetime.now().date() + timedelta(days=3), datetime.min.time()).replace(hour=10)
+
+    items = [
+        _bulk_item(doctors[0].id, treatment_id, start),
+        _bulk_item(doctors[0].id, treatment_id, start + timedelta(minutes=15)),  # 의사 중복
+        _bulk_item(doctors[1].id, treatment_id, start),
+        _bulk_item(doctors[2].id, treatment_id, start),  # 정원 초과
+        _bulk_item(doctors[2].id, treatment_id, start + timedelta(hours=1)),
+        _bulk_item(doctors[2].id, treatment_id, start, patient=("없는사람", "010-0000-0000")),
+    ]
+    res = gateway_client.post("/api/v1/admin/appointments/bulk", json={"items": items})
+    assert res.status_code == 200, res.text
+    body = res.json()
+    assert (body["created"], body["failed"]) == (3, 3)
+
+    results = body["results"]
+    assert [r["error"] is None for r in results] == [True, False, True, False, True, False]
+    assert "conflicting" in results[1]["error"]
+    assert "capacity" in results[3]["error"]
+    assert "Patient not found" in results[5]["error"]
+    assert [results[i]["appointment"]["is_first_visit"] for i in (0, 2, 4)] == ["first", "followup", "followup"]
+
+    listed = gateway_client.get("/api/v1/admin/appointments", params={"date_from": start.date().isoformat(), "date_to": start.date().isoformat()})
+    assert len(listed.json()) == 3
+
+
+def test_admin_bulk_create_appointments_validation_fail_422(gateway_client):
+    """
+    [예외] items 누락 -> 422
+    """
+    res = gateway_client.post("/api/v1/admin/appointments/bulk", json={})
+    assert res.status_code == 422, res.text
+
+
+def test_admin_reschedule_appointment_across_days(gateway_client, seed_master):
+    """
+    [정상/예외] PATCH /api/v1/admin/appointments/{id}/reschedule
+    - 다른 날짜로 이동 성공, 점심시간으로 이동하면 400
+    """
+    start = datetime.combine(datetime.now().date() + timedelta(days=4), datetime.min.time()).replace(hour=9)
+    created = gateway_client.post(
+        "/api/v1/patient/appointments",
+        json=_bulk_item(seed_master["doctor"].id, seed_master["treatment"].id, start),
+    )
+    assert created.status_code == 201, created.text
+    appt_id = created.json()["id"]
+
+    moved = start + timedelta(days=1, hours=5)
+    res = gateway_client.patch(f"/api/v1/admin/appointments/{appt_id}/reschedule", json={"start_datetime": moved.isoformat()})
+    assert res.status_code == 200, res.text
+    assert res.json()["start_datetime"].startswith(moved.strftime("%Y-%m-%dT%H:%M"))
+
+    lunch = moved.replace(hour=12)
+    res = gateway_client.patch(f"/api/v1/admin/appointments/{appt_id}/reschedule", json={"start_datetime": lunch.isoformat()})
+    assert res.status_code == 400, res.text
+
+
 # =========================================================
 # Admin Stats
 # Base: /api/v1/admin/stats
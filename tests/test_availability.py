@@ -0,0 +1,443 @@
+# tests/test_availability.py
+from __future__ import annotations
+
+import random
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from core.config import get_settings
+from core.models import Appointment, CacheVersion, Doctor, HospitalSlot, Treatment
+from core.business import availability
+from core.business.availability import find_earliest_start_times, get_available_start_times
+from core.business.availability_cache import purge_availability_versions
+from tests.helpers import book
+
+
+# =========================================================
+# Availability engine (core.business.availability)
+# =========================================================
+def _brute_force_available(target_date, duration_minutes, slots, appts, doctor_id):
+    """
+    기존 구현(후보 x 슬롯 x 예약 전수 비교)을 그대로 옮긴 기준값
+    """
+    def dt(t):
+        return datetime.combine(target_date, t)
+
+    def overlap(s1, e1, s2, e2):
+        return s1 < e2 and s2 < e1
+
+    duration = timedelta(minutes=duration_minutes)
+    live = [a for a in appts if a.status != "canceled"]
+    mine = [a for a in live if a.doctor_id == doctor_id]
+    result = []
+    cur = dt(time(9, 0))
+    while cur + duration <= dt(time(18, 0)):
+        end = cur + duration
+        ok = not overlap(cur, end, dt(time(12, 0)), dt(time(13, 0)))
+        ok = ok and not any(overlap(cur, end, a.start_datetime, a.end_datetime) for a in mine)
+        for s in slots:
+            if not ok:
+                break
+            if not overlap(cur, end, dt(s.start_time), dt(s.end_time)):
+                continue
+            used = sum(overlap(a.start_datetime, a.end_datetime, dt(s.start_time), dt(s.end_time)) for a in live)
+            ok = used < s.max_capacity
+        if ok:
+            result.append(cur.strftime("%H:%M"))
+        cur += timedelta(minutes=15)
+    return result
+
+
+def test_availability_engine_matches_brute_force(db_session, seed_master):
+    """
+    [정상] 슬롯별 사용 인원 배열 + prefix-sum 엔진의 결과가 기존 전수 비교 결과와 동일해야 함
+    """
+    rng = random.Random(20260103)
+    target_date = date.today() + timedelta(days=3)
+    doctors = [seed_master["doctor"]] + [Doctor(name=f"의사{i}", department="피부과") for i in range(3)]
+    long_treatment = Treatment(name="레이저 시술", duration_minutes=90, price=50000, description="")
+    db_session.add_all(doctors[1:] + [long_treatment])
+    db_session.flush()
+
+    patient_id = seed_master["patients"][0].id
+    for _ in range(25):
+        start = datetime.combine(target_date, time(9, 0)) + timedelta(minutes=15 * rng.randrange(36))
+        db_session.add(Appointment(
+            patient_id=patient_id,
+            doctor_id=rng.choice(doctors).id,
+            treatment_id=seed_master["treatment"].id,
+            start_datetime=start,
+            end_datetime=start + timedelta(minutes=rng.choice([30, 60, 90])),
+            status=rng.choice(["pending", "confirmed", "canceled"]),
+            is_first_visit="first",
+            memo="",
+        ))
+    db_session.flush()
+
+    slots = db_session.query(HospitalSlot).all()
+    appts = db_session.query(Appointment).all()
+    for doctor in doctors:
+        for treatment in (seed_master["treatment"], long_treatment):
+            expected = _brute_force_available(target_date, treatment.duration_minutes, slots, appts, doctor.id)
+            assert get_available_start_times(db_session, doctor.id, treatment.id, target_date) == expected
+
+
+def test_create_appointment_masks_match_availability(db_session, seed_master):
+    """
+    [정상] 예약 생성 검증(하루 칸 마스크)이 허용하는 시작시간 == 예약 가능 시간 조회 결과
+    """
+    from core.business.appointments import _in_operating_hours, _load_day_snapshot
+
+    rng = random.Random(20260109)
+    target_date = date.today() + timedelta(days=4)
+    doctors = [seed_master["doctor"]] + [Doctor(name=f"의사{i}", department="피부과") for i in range(2)]
+    db_session.add_all(doctors[1:])
+    db_session.flush()
+
+    for _ in range(15):
+        start = datetime.combine(target_date, time(9, 0)) + timedelta(minutes=15 * rng.randrange(36))
+        db_session.add(Appointment(
+            patient_id=seed_master["patients"][0].id,
+            doctor_id=rng.choice(doctors).id,
+            treatment_id=seed_master["treatment"].id,
+            start_datetime=start,
+            end_datetime=start + timedelta(minutes=rng.choice([30, 60])),
+            status="confirmed",
+            is_first_visit="first",
+            memo="",
+        ))
+    db_session.flush()
+
+    duration = timedelta(minutes=seed_master["treatment"].duration_minutes)
+    for doctor in doctors:
+        snapshot = _load_day_snapshot(db_session, target_date)
+        grid = snapshot.grid
+        allowed = [
+            start.strftime("%H:%M")
+            for start in (grid.day_open + i * grid.step for i in range(grid.size))
+            if _in_operating_hours(start, start + duration)
+            and snapshot.doctor_free(doctor.id, start, duration)
+            and snapshot.capacity_free(start, duration)
+        ]
+        assert allowed == get_available_start_times(db_session, doctor.id, seed_master["treatment"].id, target_date)
+
+
+def test_patient_availability_range_matches_daily(gateway_client, seed_master):
+    """
+    [정상] GET /api/v1/patient/availability/{doctor_id}/availability/range
+    - 날짜별 결과가 단일 날짜 조회 결과와 동일해야 함
+    """
+    doctor_id = seed_master["doctor"].id
+    treatment_id = seed_master["treatment"].id
+    date_from = date.today() + timedelta(days=1)
+    start_dt = datetime.combine(date_from + timedelta(days=1), time(10, 0))
+
+    created = gateway_client.post(
+        "/api/v1/patient/appointments",
+        json={
+            "patient_name": "김철수",
+            "patient_phone": "010-3333-4444",
+            "doctor_id": doctor_id,
+            "treatment_id": treatment_id,
+            "start_datetime": start_dt.isoformat(),
+            "memo": "기간 조회 테스트",
+        },
+    )
+    assert created.status_code == 201, created.text
+
+    res = gateway_client.get(
+        f"/api/v1/patient/availability/{doctor_id}/availability/range",
+        params={
+            "date_from": date_from.isoformat(),
+            "date_to": (date_from + timedelta(days=6)).isoformat(),
+            "treatment_id": treatment_id,
+        },
+    )
+    assert res.status_code == 200, res.text
+    days = res.json()["days"]
+    assert len(days) == 7
+
+    for day in days:
+        single = gateway_client.get(
+            f"/api/v1/patient/availability/{doctor_id}/availability",
+            params={"date": day["date"], "treatment_id": treatment_id},
+        )
+        assert single.status_code == 200, single.text
+        assert day["available_start_times"] == single.json()["available_start_times"]
+    assert "10:00" not in days[1]["available_start_times"]
+
+
+def test_patient_availability_range_invalid_400(gateway_client, seed_master):
+    """
+    [예외] date_to가 date_from보다 이전이면 400
+    """
+    doctor_id = seed_master["doctor"].id
+    res = gateway_client.get(
+        f"/api/v1/patient/availability/{doctor_id}/availability/range",
+        params={"date_from": "2026-01-10", "date_to": "2026-01-09", "treatment_id": seed_master["treatment"].id},
+    )
+    assert res.status_code == 400, res.text
+
+
+def test_patient_earliest_availability_skips_full_day(gateway_client, seed_master, db_session):
+    """
+    [정상] GET /api/v1/patient/availability/{doctor_id}/availability/earliest
+    - 첫날이 꽉 찬 의사는 다음 날부터 검색
+    - 결과가 해당 날짜 단일 조회 결과의 앞부분과 동일해야 함
+    """
+    doctor_id = seed_master["doctor"].id
+    treatment_id = seed_master["treatment"].id
+    date_from = date.today() + timedelta(days=1)
+
+    #첫날 운영시간 전체 + 다음 날 09:00 예약
+    busy = [(time(9, 0), time(12, 0)), (time(13, 0), time(18, 0))]
+    next_day = date_from + timedelta(days=1)
+    for d, ranges in ((date_from, busy), (next_day, [(time(9, 0), time(9, 30))])):
+        for start, end in ranges:
+            db_session.add(Appointment(
+                patient_id=seed_master["patients"][0].id,
+                doctor_id=doctor_id,
+                treatment_id=treatment_id,
+                start_datetime=datetime.combine(d, start),
+                end_datetime=datetime.combine(d, end),
+                status="confirmed",
+                is_first_visit="first",
+                memo="",
+            ))
+    db_session.flush()
+
+    res = gateway_client.get(
+        f"/api/v1/patient/availability/{doctor_id}/availability/earliest",
+        params={"date_from": date_from.isoformat(), "treatment_id": treatment_id, "limit": 3, "horizon_days": 7},
+    )
+    assert res.status_code == 200, res.text
+    start_times = res.json()["start_times"]
+
+    single = gateway_client.get(
+        f"/api/v1/patient/availability/{doctor_id}/availability",
+        params={"date": next_day.isoformat(), "treatment_id": treatment_id},
+    )
+    expected = single.json()["available_start_times"][:3]
+    assert [s["date"] for s in start_times] == [next_day.isoformat()] * 3
+    assert [s["start_time"] for s in start_times] == expected
+    assert expected[0] == "09:30"
+
+
+def test_earliest_availability_today_skips_past_starts(db_session, seed_master, monkeypatch):
+    """
+    [정상] date_from이 오늘이면 지금이거나 이미 지난 시작시간은 제외
+    - 10:15 정각이면 10:30부터, 17:50이면 오늘은 없고 다음 날 09:00부터
+    """
+    today = date.today()
+    doctor_id = seed_master["doctor"].id
+    treatment_id = seed_master["treatment"].id
+
+    def earliest_at(now_time):
+        class FrozenDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return datetime.combine(today, now_time)
+
+        monkeypatch.setattr(availability, "datetime", FrozenDatetime)
+        return find_earliest_start_times(db_session, doctor_id, treatment_id, today, limit=2)
+
+    assert earliest_at(time(10, 15)) == [datetime.combine(today, time(10, 30)), datetime.combine(today, time(10, 45))]
+    assert earliest_at(time(10, 20)) == [datetime.combine(today, time(10, 30)), datetime.combine(today, time(10, 45))]
+    tomorrow = today + timedelta(days=1)
+    assert earliest_at(time(17, 50)) == [datetime.combine(tomorrow, time(9, 0)), datetime.combine(tomorrow, time(9, 15))]
+
+
+def test_patient_earliest_availability_invalid_limit_400(gateway_client, seed_master):
+    """
+    [예외] limit이 범위를 벗어나면 400
+    """
+    res = gateway_client.get(
+        f"/api/v1/patient/availability/{seed_master['doctor'].id}/availability/earliest",
+        params={"date_from": "2026-01-10", "treatment_id": seed_master["treatment"].id, "limit": 0},
+    )
+    assert res.status_code == 400, res.text
+
+
+def test_patient_availability_by_department(gateway_client, seed_master, db_session):
+    """
+    [정상] GET /api/v1/patient/availability/doctors?department=피부과
+    - 진료과 의사별 결과가 의사 단건 조회 결과와 동일해야 하고, 다른 진료과 의사는 제외
+    """
+    other = Doctor(name="이원장", department="피부과")
+    surgeon = Doctor(name="박원장", department="성형외과")
+    db_session.add_all([other, surgeon])
+    db_session.flush()
+
+    treatment_id = seed_master["treatment"].id
+    target_date = date.today() + timedelta(days=2)
+    created = gateway_client.post(
+        "/api/v1/patient/appointments",
+        json={
+            "patient_name": "홍길동",
+            "patient_phone": "010-1111-2222",
+            "doctor_id": other.id,
+            "treatment_id": treatment_id,
+            "start_datetime": datetime.combine(target_date, time(9, 30)).isoformat(),
+            "memo": "진료과 조회 테스트",
+        },
+    )
+    assert created.status_code == 201, created.text
+
+    res = gateway_client.get(
+        "/api/v1/patient/availability/doctors",
+        params={"date": target_date.isoformat(), "treatment_id": treatment_id, "department": "피부과"},
+    )
+    assert res.status_code == 200, res.text
+    doctors = res.json()["doctors"]
+    assert [d["doctor_id"] for d in doctors] == [seed_master["doctor"].id, other.id]
+
+    for d in doctors:
+        single = gateway_client.get(
+            f"/api/v1/patient/availability/{d['doctor_id']}/availability",
+            params={"date": target_date.isoformat(), "treatment_id": treatment_id},
+        )
+        assert d["available_start_times"] == single.json()["available_start_times"]
+    assert "09:30" in doctors[0]["available_start_times"]
+    assert "09:30" not in doctors[1]["available_start_times"]
+
+
+def test_patient_availability_by_department_missing_query_422(gateway_client, seed_master):
+    """
+    [예외] 필수 query(date, treatment_id) 누락 시 422
+    """
+    res = gateway_client.get("/api/v1/patient/availability/doctors", params={"department": "피부과"})
+    assert res.status_code == 422, res.text
+
+
+def test_patient_availability_cache_invalidated_per_date(gateway_client, seed_master):
+    """
+    [정상] 예약 가능 시간 결과 캐시
+    - 같은 (의사, 날짜, 시술) 재조회는 hit
+    - 예약 생성/관리자 취소는 해당 날짜만 무효화하고 다른 날짜는 계속 hit
+    """
+    doctor_id = seed_master["doctor"].id
+    treatment_id = seed_master["treatment"].id
+    day1 = date.today() + timedelta(days=4)
+    day2 = day1 + timedelta(days=1)
+
+    def availability(d):
+        res = gateway_client.get(
+            f"/api/v1/patient/availability/{doctor_id}/availability",
+            params={"date": d.isoformat(), "treatment_id": treatment_id},
+        )
+        assert res.status_code == 200, res.text
+        return res.json()["available_start_times"]
+
+    def stats():
+        return gateway_client.get("/api/v1/patient/availability/cache-stats").json()
+
+    availability(day1)
+    availability(day2)
+    before = stats()
+    assert "10:00" in availability(day1)
+    after = stats()
+    assert after["hits"] == before["hits"] + 1
+
+    created = gateway_client.post(
+        "/api/v1/patient/appointments",
+        json={
+            "patient_name": "김철수",
+            "patient_phone": "010-3333-4444",
+            "doctor_id": doctor_id,
+            "treatment_id": treatment_id,
+            "start_datetime": datetime.combine(day1, time(10, 0)).isoformat(),
+            "memo": "캐시 무효화 테스트",
+        },
+    )
+    assert created.status_code == 201, created.text
+
+    before = stats()
+    assert "10:00" not in availability(day1)
+    availability(day2)
+    after = stats()
+    assert after["misses"] == before["misses"] + 1
+    assert after["hits"] == before["hits"] + 1
+
+    res = gateway_client.patch(
+        f"/api/v1/admin/appointments/{created.json()['id']}/status",
+        json={"status": "canceled"},
+    )
+    assert res.status_code == 200, res.text
+    assert "10:00" in availability(day1)
+
+
+@pytest.mark.parametrize("mode", ["memory", "counter", "aggregate"])
+def test_patient_availability_cache_invalidated_per_doctor(gateway_client, seed_master, db_session, monkeypatch, mode):
+    """
+    [정상] 다른 의사의 예약은 슬롯 정원이 차거나 다시 여유가 생길 때만 캐시를 무효화
+    - 같은 날짜의 예약이 공유 버전 행(날짜별 정원 버전)을 매번 올리지 않음
+    """
+    monkeypatch.setattr(get_settings(), "capacity_check_mode", mode)
+    treatment_id = seed_master["treatment"].id
+    doctors = [Doctor(name=f"의사{i}", department="피부과") for i in range(2)]
+    db_session.add_all(doctors)
+    db_session.flush()
+    watched, other = seed_master["doctor"].id, doctors[0].id
+    day = date.today() + timedelta(days=4)
+    start_dt = datetime.combine(day, time(10, 0))
+
+    def availability():
+        res = gateway_client.get(
+            f"/api/v1/patient/availability/{watched}/availability",
+            params={"date": day.isoformat(), "treatment_id": treatment_id},
+        )
+        assert res.status_code == 200, res.text
+        return res.json()["available_start_times"]
+
+    def misses():
+        return gateway_client.get("/api/v1/patient/availability/cache-stats").json()["misses"]
+
+    def version_names():
+        return set(db_session.scalars(select(CacheVersion.name).where(CacheVersion.name.contains(day.isoformat()))))
+
+    availability()
+    #정원 2인 10:00 슬롯의 첫 예약: 다른 의사 결과는 그대로 hit
+    first = book(gateway_client, other, treatment_id, start_dt)
+    assert first.status_code == 201, first.text
+    assert version_names() == {f"availability:{day.isoformat()}:{other}"}
+    before = misses()
+    assert "10:00" in availability()
+    assert misses() == before
+
+    #두 번째 예약으로 정원이 차면 같은 날짜의 모든 의사 결과 무효화
+    second = book(gateway_client, doctors[1].id, treatment_id, start_dt)
+    assert second.status_code == 201, second.text
+    assert f"capacity:{day.isoformat()}" in version_names()
+    before = misses()
+    assert "10:00" not in availability()
+    assert misses() == before + 1
+
+    #취소로 다시 여유가 생기면 다시 무효화
+    res = gateway_client.patch(f"/api/v1/admin/appointments/{first.json()['id']}/status", json={"status": "canceled"})
+    assert res.status_code == 200, res.text
+    before = misses()
+    assert "10:00" in availability()
+    assert misses() == before + 1
+
+
+def test_purge_availability_versions_keeps_today_and_later(db_session):
+    """
+    [정상] 지난 날짜의 예약/정원 버전 행만 삭제 (시술/슬롯 설정 버전은 유지)
+    """
+    today = date.today()
+    yesterday = today - timedelta(days=1)
+    names = [
+        f"availability:{yesterday.isoformat()}:1",
+        f"capacity:{yesterday.isoformat()}",
+        f"availability:{today.isoformat()}:1",
+        f"capacity:{today.isoformat()}",
+        "treatment:1",
+        "hospital_slots",
+    ]
+    db_session.add_all([CacheVersion(name=name, version=3) for name in names])
+    db_session.commit()
+
+    assert purge_availability_versions(db_session) == 2
+    assert set(db_session.scalars(select(CacheVersion.name))) == set(names[2:])
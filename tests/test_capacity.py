@@ -0,0 +1,268 @@
+# tests/test_capacity.py
+from __future__ import annotations
+
+import random
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from sqlalchemy import delete, event, insert
+
+from core.config import get_settings
+from core.models import Appointment, Doctor, HospitalSlot, SlotOccupancy
+from core.business.slot_config import get_slot_config
+from core.business.slot_occupancy import rebuild_slot_occupancy
+from tests.helpers import book, count_statements
+
+
+# =========================================================
+# Slot occupancy counters (capacity_check_mode=counter)
+# =========================================================
+def test_counter_mode_capacity_and_cancel(gateway_client, seed_master, db_session, monkeypatch):
+    """
+    [정상/예외] counter 모드
+    - 슬롯 정원(2)까지는 예약 성공, 세 번째는 400
+    - 취소하면 카운터가 줄어 다시 예약 가능
+    - rebuild 결과가 트랜잭션으로 갱신한 카운터와 동일
+    """
+    monkeypatch.setattr(get_settings(), "capacity_check_mode", "counter")
+    doctors = [Doctor(name=f"의사{i}", department="피부과") for i in range(3)]
+    db_session.add_all(doctors)
+    db_session.flush()
+    treatment_id = seed_master["treatment"].id
+    start_dt = datetime.combine(date.today() + timedelta(days=5), time(10, 15))
+
+    first = book(gateway_client, doctors[0].id, treatment_id, start_dt)
+    second = book(gateway_client, doctors[1].id, treatment_id, start_dt)
+    assert first.status_code == 201, first.text
+    assert second.status_code == 201, second.text
+
+    third = book(gateway_client, doctors[2].id, treatment_id, start_dt)
+    assert third.status_code == 400, third.text
+    assert "capacity" in third.json()["detail"]
+
+    res = gateway_client.get(
+        f"/api/v1/patient/availability/{doctors[2].id}/availability",
+        params={"date": start_dt.date().isoformat(), "treatment_id": treatment_id},
+    )
+    assert "10:15" not in res.json()["available_start_times"]
+
+    canceled = gateway_client.patch(f"/api/v1/admin/appointments/{first.json()['id']}/status", json={"status": "canceled"})
+    assert canceled.status_code == 200, canceled.text
+    retry = book(gateway_client, doctors[2].id, treatment_id, start_dt)
+    assert retry.status_code == 201, retry.text
+
+    counters = {(r.slot_date, r.slot_id): r.used for r in db_session.query(SlotOccupancy).all() if r.used}
+    rebuild_slot_occupancy(db_session)
+    rebuilt = {(r.slot_date, r.slot_id): r.used for r in db_session.query(SlotOccupancy).all()}
+    assert counters == rebuilt
+    assert sorted(rebuilt.values()) == [2, 2]
+
+
+# =========================================================
+# DB aggregate capacity check (capacity_check_mode=aggregate)
+# =========================================================
+def test_aggregate_capacity_check_matches_masks(db_session, seed_master):
+    """
+    [정상] aggregate 모드 검증 쿼리 결과 == 하루 칸 마스크 결과 (슬롯을 여러 개 걸치는 시술 포함)
+    - 의사 중복이면 conflicting, 아니면 정원 초과 여부가 같아야 함
+    - 통과하면 이 예약으로 정원이 차는 슬롯이 있는지도 같아야 함
+    """
+    from core.business.appointments import _check_conflict_and_capacity_aggregate, _load_day_snapshot
+
+    rng = random.Random(20260110)
+    target_date = date.today() + timedelta(days=6)
+    doctors = [Doctor(name=f"의사{i}", department="피부과") for i in range(4)]
+    db_session.add_all(doctors)
+    db_session.flush()
+    for _ in range(30):
+        start = datetime.combine(target_date, time(9, 0)) + timedelta(minutes=15 * rng.randrange(34))
+        db_session.add(Appointment(
+            patient_id=seed_master["patients"][0].id,
+            doctor_id=rng.choice(doctors).id,
+            treatment_id=seed_master["treatment"].id,
+            start_datetime=start,
+            end_datetime=start + timedelta(minutes=rng.choice([30, 60])),
+            status=rng.choice(["pending", "confirmed", "canceled"]),
+            is_first_visit="first",
+            memo="",
+        ))
+    db_session.flush()
+
+    snapshot = _load_day_snapshot(db_session, target_date)
+    grid = snapshot.grid
+    seen = set()
+    for i in range(grid.size - 3):
+        start = grid.day_open + i * grid.step
+        for duration in (timedelta(minutes=30), timedelta(minutes=60)):
+            if not snapshot.doctor_free(doctors[0].id, start, duration):
+                expected = "conflicting"
+            elif not snapshot.capacity_free(start, duration):
+                expected = "capacity"
+            else:
+                expected = None
+            #예약 하나를 더 넣으면 정원이 차는 슬롯이 있는지 (날짜별 정원 버전을 올릴지)
+            fills = any(
+                start < slot_end and slot_start < start + duration and used + 1 >= max_capacity
+                for (slot_start, slot_end, max_capacity), used in zip(snapshot.occupancy.slot_ranges, snapshot.occupancy.used)
+            )
+            try:
+                filled = _check_conflict_and_capacity_aggregate(db_session, doctors[0].id, start, start + duration)
+                error = None
+            except ValueError as e:
+                filled = None
+                error = "conflicting" if "conflicting" in str(e) else "capacity"
+            assert error == expected, (start, duration)
+            if error is None:
+                assert filled == fills, (start, duration)
+            seen.add(expected)
+    assert seen == {"conflicting", "capacity", None}
+
+
+def test_aggregate_mode_capacity_exceeded_400(gateway_client, seed_master, db_session, monkeypatch):
+    """
+    [예외] aggregate 모드에서 슬롯 정원(2) 초과 시 400
+    """
+    monkeypatch.setattr(get_settings(), "capacity_check_mode", "aggregate")
+    doctors = [Doctor(name=f"의사{i}", department="피부과") for i in range(3)]
+    db_session.add_all(doctors)
+    db_session.flush()
+    treatment_id = seed_master["treatment"].id
+    start_dt = datetime.combine(date.today() + timedelta(days=5), time(14, 15))
+
+    assert book(gateway_client, doctors[0].id, treatment_id, start_dt).status_code == 201
+    assert book(gateway_client, doctors[1].id, treatment_id, start_dt).status_code == 201
+    third = book(gateway_client, doctors[2].id, treatment_id, start_dt)
+    assert third.status_code == 400, third.text
+    assert "capacity" in third.json()["detail"]
+
+    same_doctor = book(gateway_client, doctors[0].id, treatment_id, start_dt + timedelta(minutes=15))
+    assert same_doctor.status_code == 400, same_doctor.text
+    assert "conflicting" in same_doctor.json()["detail"]
+
+
+# =========================================================
+# create_appointment round trips
+# =========================================================
+@pytest.mark.parametrize("mode, expected", [("memory", 5), ("aggregate", 5), ("counter", 7)])
+def test_create_appointment_statement_count(gateway_client, seed_master, db_session, monkeypatch, mode, expected):
+    """
+    [정상] 예약 생성 1건의 SQL 문 수 고정
+    - 참조 조회(의사/시술/환자) 1 + 검증 + 환자 예약 수 갱신(초진 판단) 1 + INSERT 1 + 캐시 버전 갱신 1
+    """
+    monkeypatch.setattr(get_settings(), "capacity_check_mode", mode)
+    monkeypatch.setattr(get_settings(), "slot_cache_check_seconds", 3600.0)
+    treatment_id = seed_master["treatment"].id
+    doctor_id = seed_master["doctor"].id
+    start_dt = datetime.combine(date.today() + timedelta(days=7), time(10, 0))
+
+    #슬롯 설정 캐시 적재
+    assert book(gateway_client, doctor_id, treatment_id, start_dt).status_code == 201
+
+    with count_statements(db_session.connection()) as statements:
+        res = book(gateway_client, doctor_id, treatment_id, start_dt + timedelta(hours=1))
+    assert res.status_code == 201, res.text
+    assert res.json()["is_first_visit"] == "followup"
+    assert len(statements) == expected, statements
+
+
+@pytest.mark.parametrize("mode", ["memory", "counter", "aggregate"])
+def test_closed_slot_rejected_in_every_mode(gateway_client, seed_master, db_session, monkeypatch, mode):
+    """
+    [예외] 관리자가 정원 0으로 닫은 슬롯은 겹치는 예약이 없어도 모든 모드에서 400
+    """
+    monkeypatch.setattr(get_settings(), "capacity_check_mode", mode)
+    treatment_id = seed_master["treatment"].id
+    doctor_id = seed_master["doctor"].id
+    start_dt = datetime.combine(date.today() + timedelta(days=5), time(10, 0))
+
+    slot = db_session.query(HospitalSlot).filter(HospitalSlot.start_time == time(10, 0)).one()
+    closed = gateway_client.put(f"/api/v1/admin/hospital-slots/{slot.id}", json={"max_capacity": 0})
+    assert closed.status_code == 200, closed.text
+
+    res = book(gateway_client, doctor_id, treatment_id, start_dt)
+    assert res.status_code == 400, res.text
+    assert "capacity" in res.json()["detail"]
+
+    #닫힌 슬롯에 걸치지 않는 시간은 그대로 예약 가능
+    assert book(gateway_client, doctor_id, treatment_id, start_dt + timedelta(hours=4)).status_code == 201
+
+
+def test_counter_mode_missing_rows_recounted(gateway_client, seed_master, db_session, monkeypatch):
+    """
+    [예외] 카운터 행이 지워진 상태(재계산 도중 등)에서도 0으로 가정하지 않고 예약 내역으로 다시 세서 정원 검증
+    """
+    monkeypatch.setattr(get_settings(), "capacity_check_mode", "counter")
+    doctors = [Doctor(name=f"의사{i}", department="피부과") for i in range(3)]
+    db_session.add_all(doctors)
+    db_session.flush()
+    treatment_id = seed_master["treatment"].id
+    start_dt = datetime.combine(date.today() + timedelta(days=8), time(15, 0))
+
+    assert book(gateway_client, doctors[0].id, treatment_id, start_dt).status_code == 201
+    db_session.query(SlotOccupancy).delete()
+    db_session.commit()
+
+    assert book(gateway_client, doctors[1].id, treatment_id, start_dt).status_code == 201
+    third = book(gateway_client, doctors[2].id, treatment_id, start_dt)
+    assert third.status_code == 400, third.text
+
+
+def test_counter_mode_slot_change_recounts_in_one_transaction(gateway_client, seed_master, db_session, monkeypatch):
+    """
+    [정상] counter 모드에서 슬롯 추가/시간 변경 시 슬롯 변경과 카운터 재계산이 한 번의 commit으로 반영
+    """
+    monkeypatch.setattr(get_settings(), "capacity_check_mode", "counter")
+    treatment_id = seed_master["treatment"].id
+    start_dt = datetime.combine(date.today() + timedelta(days=9), time(17, 30))
+
+    assert book(gateway_client, seed_master["doctor"].id, treatment_id, start_dt).status_code == 201
+    slot = db_session.query(HospitalSlot).filter(HospitalSlot.start_time == time(17, 30)).one()
+
+    commits = []
+    def on_commit(session):
+        commits.append(session)
+
+    event.listen(db_session, "after_commit", on_commit)
+    try:
+        res = gateway_client.put(f"/api/v1/admin/hospital-slots/{slot.id}", json={"start_time": "17:00:00"})
+    finally:
+        event.remove(db_session, "after_commit", on_commit)
+    assert res.status_code == 200, res.text
+    assert len(commits) == 1
+
+    counters = {(r.slot_date, r.slot_id): r.used for r in db_session.query(SlotOccupancy).all() if r.used}
+    rebuild_slot_occupancy(db_session)
+    assert counters == {(r.slot_date, r.slot_id): r.used for r in db_session.query(SlotOccupancy).all()}
+    assert counters[(start_dt.date(), slot.id)] == 1
+
+
+def test_counter_mode_uses_live_slots_when_snapshot_is_stale(gateway_client, seed_master, db_session, monkeypatch):
+    """
+    [예외] 다른 워커가 추가한 슬롯을 이 워커의 슬롯 설정 캐시가 아직 모르더라도 카운터는 그 슬롯 기준으로 검증
+    - 정원 1인 새 10:00 슬롯에 두 번째 예약은 400, 취소하면 같은 카운터가 줄어듦
+    """
+    monkeypatch.setattr(get_settings(), "capacity_check_mode", "counter")
+    monkeypatch.setattr(get_settings(), "slot_cache_check_seconds", 3600.0)
+    doctors = [Doctor(name=f"의사{i}", department="피부과") for i in range(2)]
+    db_session.add_all(doctors)
+    db_session.execute(delete(HospitalSlot).where(HospitalSlot.start_time == time(10, 0)))
+    db_session.commit()
+    stale = get_slot_config(db_session)
+
+    #다른 워커의 슬롯 추가: 이 워커의 캐시는 무효화되지 않음
+    db_session.execute(insert(HospitalSlot).values(start_time=time(10, 0), end_time=time(10, 30), max_capacity=1))
+    db_session.commit()
+    assert get_slot_config(db_session) is stale
+    assert not stale.covering(datetime.combine(date.today(), time(10, 0)), datetime.combine(date.today(), time(10, 30)))
+
+    treatment_id = seed_master["treatment"].id
+    start_dt = datetime.combine(date.today() + timedelta(days=8), time(10, 0))
+    first = book(gateway_client, doctors[0].id, treatment_id, start_dt)
+    assert first.status_code == 201, first.text
+    second = book(gateway_client, doctors[1].id, treatment_id, start_dt)
+    assert second.status_code == 400, second.text
+    assert "capacity" in second.json()["detail"]
+
+    canceled = gateway_client.patch(f"/api/v1/admin/appointments/{first.json()['id']}/status", json={"status": "canceled"})
+    assert canceled.status_code == 200, canceled.text
+    assert book(gateway_client, doctors[1].id, treatment_id, start_dt).status_code == 201
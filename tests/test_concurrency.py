@@ -0,0 +1,232 @@
+# tests/test_concurrency.py
+from __future__ import annotations
+
+import random
+import threading
+import time as time_module
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from core.config import get_settings
+from core.db import Base
+from core.models import Appointment, Doctor, HospitalSlot, Patient, Treatment
+from core.business.appointments import create_appointment
+from core.business.booking_locks import BookingBusyError
+
+
+# =========================================================
+# 동시 예약 스트레스 테스트
+# - 파일 SQLite + 스레드별 세션으로 실제 동시 POST 상황을 재현
+# - 어떤 경우에도 의사 중복 예약/슬롯 정원 초과가 없어야 함
+# =========================================================
+
+CAPACITY = 2
+
+
+@pytest.fixture()
+def file_sessionmaker(tmp_path):
+    engine = create_engine(
+        f"sqlite+pysqlite:///{tmp_path / 'stress.db'}",
+        connect_args={"check_same_thread": False, "timeout": 30},
+    )
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False, expire_on_commit=False)
+
+    db = SessionLocal()
+    db.add_all([Doctor(name=f"의사{i}", department="피부과") for i in range(4)])
+    db.add(Treatment(name="여드름 치료", duration_minutes=30, price=10000, description=""))
+    db.add_all([Patient(name=f"환자{i}", phone_number=f"010-0000-{i:04d}") for i in range(8)])
+    start = datetime.combine(date.today(), time(9, 0))
+    while start.time() < time(18, 0):
+        end = start + timedelta(minutes=30)
+        if not (time(12, 0) <= start.time() < time(13, 0)):
+            db.add(HospitalSlot(start_time=start.time(), end_time=end.time(), max_capacity=CAPACITY))
+        start = end
+    db.commit()
+    db.close()
+
+    yield SessionLocal
+    engine.dispose()
+
+
+def _book(SessionLocal, doctor_id: int, patient_no: int, start_dt: datetime) -> bool:
+    db = SessionLocal()
+    try:
+        create_appointment(
+            db,
+            patient_name=f"환자{patient_no}",
+            patient_phone=f"010-0000-{patient_no:04d}",
+            doctor_id=doctor_id,
+            treatment_id=1,
+            start_dt=start_dt,
+            memo="",
+        )
+        return True
+    except BookingBusyError:
+        return False
+    except ValueError:
+        return False
+    finally:
+        db.close()
+
+
+def _assert_no_overbooking(SessionLocal) -> None:
+    db = SessionLocal()
+    try:
+        appts = db.query(Appointment).filter(Appointment.status != "canceled").all()
+        slots = db.query(HospitalSlot).all()
+    finally:
+        db.close()
+
+    by_doctor: dict[int, list[Appointment]] = {}
+    for a in appts:
+        by_doctor.setdefault(a.doctor_id, []).append(a)
+    for doctor_appts in by_doctor.values():
+        doctor_appts.sort(key=lambda a: a.start_datetime)
+        for prev, cur in zip(doctor_appts, doctor_appts[1:]):
+            assert prev.end_datetime <= cur.start_datetime, "doctor double-booked"
+
+    for a in appts:
+        d = a.start_datetime.date()
+        for s in slots:
+            slot_start = datetime.combine(d, s.start_time)
+            slot_end = datetime.combine(d, s.end_time)
+            used = sum(1 for b in appts if b.start_datetime < slot_end and slot_start < b.end_datetime)
+            assert used <= s.max_capacity, "slot over capacity"
+
+
+@pytest.mark.parametrize("mode", ["memory", "counter"])
+def test_concurrent_same_doctor_same_time_books_once(file_sessionmaker, monkeypatch, mode):
+    """
+    [예외] 같은 의사/같은 시간에 동시 POST → 정확히 1건만 성공
+    """
+    monkeypatch.setattr(get_settings(), "capacity_check_mode", mode)
+    start_dt = datetime.combine(date.today() + timedelta(days=1), time(10, 0))
+    barrier = threading.Barrier(8)
+
+    def worker(i):
+        barrier.wait()
+        return _book(file_sessionmaker, 1, i, start_dt)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(worker, range(8)))
+
+    assert results.count(True) == 1
+    _assert_no_overbooking(file_sessionmaker)
+
+
+@pytest.mark.parametrize("mode", ["memory", "counter"])
+def test_concurrent_booking_stress_zero_overbooking(file_sessionmaker, monkeypatch, mode):
+    """
+    [정상] 여러 스레드가 같은 날짜의 좁은 시간대에 무작위로 예약
+    - 의사 중복/슬롯 정원 초과 0건
+    - 처리량(bookings/second) 출력 (pytest -s)
+    """
+    monkeypatch.setattr(get_settings(), "capacity_check_mode", mode)
+    target_date = date.today() + timedelta(days=2)
+    rng = random.Random(7)
+    attempts = [
+        (
+            rng.randint(1, 4),
+            rng.randrange(8),
+            datetime.combine(target_date, time(9, 0)) + timedelta(minutes=15 * rng.randrange(8)),
+        )
+        for _ in range(120)
+    ]
+
+    started = time_module.perf_counter()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda args: _book(file_sessionmaker, *args), attempts))
+    elapsed = time_module.perf_counter() - started
+
+    booked = results.count(True)
+    print(f"\n[{mode}] {len(attempts)} attempts, {booked} booked in {elapsed:.2f}s "
+          f"({len(attempts) / elapsed:.1f} attempts/s, {booked / elapsed:.1f} bookings/s)")
+    assert booked > 0
+    _assert_no_overbooking(file_sessionmaker)
+
+
+@pytest.mark.parametrize("mode", ["memory", "counter", "aggregate"])
+def test_concurrent_first_bookings_of_one_patient_single_first_visit(file_sessionmaker, monkeypatch, mode):
+    """
+    [정상] 같은 환자가 서로 다른 의사/날짜로 동시에 처음 예약해도 초진(first)은 정확히 1건
+    - 예약마다 잡는 잠금이 달라 서로 직렬화되지 않으므로 환자 예약 수의 원자적 UPDATE로만 판단됨
+    """
+    monkeypatch.setattr(get_settings(), "capacity_check_mode", mode)
+    barrier = threading.Barrier(4)
+
+    def worker(i):
+        barrier.wait()
+        start_dt = datetime.combine(date.today() + timedelta(days=1 + i), time(10, 0))
+        return _book(file_sessionmaker, 1 + i, 0, start_dt)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(worker, range(4)))
+    assert results == [True] * 4
+
+    db = file_sessionmaker()
+    try:
+        visits = [a.is_first_visit for a in db.query(Appointment).all()]
+    finally:
+        db.close()
+    assert sorted(visits) == ["first", "followup", "followup", "followup"]
+
+
+def test_concurrent_idempotent_duplicate_waits_for_first_result(file_sessionmaker):
+    """
+    [정상] 같은 Idempotency-Key의 두 번째 요청은 첫 요청이 응답을 저장할 때까지 기다렸다가 그 응답을 받는다
+    """
+    from core.business.idempotency import begin_idempotent, finish_idempotent
+
+    first_db = file_sessionmaker()
+    assert begin_idempotent(first_db, "dup-key", "hash") is None
+
+    def duplicate():
+        db = file_sessionmaker()
+        try:
+            return begin_idempotent(db, "dup-key", "hash")
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        waiting = pool.submit(duplicate)
+        time_module.sleep(0.1)
+        assert not waiting.done()
+        finish_idempotent(first_db, "dup-key", 201, '{"id": 1}')
+        stored = waiting.result(timeout=5)
+    first_db.close()
+
+    assert stored is not None
+    assert (stored.status_code, stored.body) == (201, '{"id": 1}')
+
+
+def test_concurrent_logins_keep_single_active_session(file_sessionmaker):
+    """
+    [정상] 같은 환자가 동시에 여러 번 로그인해도 활성 토큰은 마지막 하나뿐
+    """
+    from core.business.patient_auth import issue_patient_token
+    from core.models import PatientSessionToken
+
+    def login(_):
+        db = file_sessionmaker()
+        try:
+            return issue_patient_token(db, patient_phone="010-0000-0000", patient_name="환자0")
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        tokens = list(pool.map(login, range(32)))
+
+    db = file_sessionmaker()
+    try:
+        rows = db.query(PatientSessionToken).all()
+        active = [row for row in rows if row.is_active]
+        assert len(rows) == len(set(tokens)) == 32
+        assert len(active) == 1
+        assert active[0].id == max(row.id for row in rows)
+    finally:
+        db.close()
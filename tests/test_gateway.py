@@ -0,0 +1,205 @@
+# tests/test_gateway.py
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from starlette.requests import ClientDisconnect
+
+import apps.gateway.main as gateway_main
+from apps.gateway.main import app as gateway_app
+from apps.gateway.response_cache import ResponseCache
+from apps.gateway.upstreams import Upstream, client_limits, client_timeout
+
+
+# =========================================================
+# Shared upstream clients
+# =========================================================
+def test_gateway_reuses_upstream_client(gateway_client, seed_master):
+    """
+    [정상] upstream별 클라이언트 하나를 모든 요청이 공유, /gateway/stats에 사용량 집계
+    """
+    client = gateway_app.state.upstreams["patient"].client
+    for _ in range(3):
+        assert gateway_client.get("/api/v1/patient/doctors").status_code == 200
+    assert gateway_client.get("/api/v1/admin/doctors").status_code == 200
+    assert gateway_app.state.upstreams["patient"].client is client
+
+    stats = gateway_client.get("/gateway/stats").json()
+    assert stats["patient"]["requests"] == 3
+    assert stats["admin"]["requests"] == 1
+    assert stats["patient"]["in_flight"] == 0
+    assert stats["patient"]["errors"] == 0
+
+
+def test_gateway_clients_closed_on_shutdown():
+    """
+    [정상] lifespan 종료 시 upstream 클라이언트를 닫음
+    """
+    with TestClient(gateway_app):
+        upstreams = list(gateway_app.state.upstreams.values())
+        assert not any(u.client.is_closed for u in upstreams)
+    assert all(u.client.is_closed for u in upstreams)
+
+
+def test_gateway_pool_settings_from_env(monkeypatch):
+    """
+    [정상] 연결 풀/타임아웃 환경변수 반영
+    """
+    monkeypatch.setenv("GATEWAY_MAX_CONNECTIONS", "7")
+    monkeypatch.setenv("GATEWAY_KEEPALIVE_EXPIRY", "30")
+    monkeypatch.setenv("GATEWAY_READ_TIMEOUT", "2.5")
+
+    limits = client_limits()
+    assert (limits.max_connections, limits.keepalive_expiry) == (7, 30.0)
+    assert limits.max_keepalive_connections == 20
+    assert client_timeout() == httpx.Timeout(connect=5.0, read=2.5, write=10.0, pool=5.0)
+
+
+# =========================================================
+# Streaming proxy mode (GATEWAY_STREAMING)
+# =========================================================
+@pytest.fixture()
+def streaming(monkeypatch):
+    monkeypatch.setattr(gateway_main, "STREAMING", True)
+
+
+def test_gateway_streaming_relays_bodies_and_headers(gateway_client, seed_master, auth_header, streaming):
+    """
+    [정상] 스트리밍 모드에서도 요청 본문/응답 본문/헤더가 그대로 전달
+    - chunked 요청 본문도 upstream까지 전달
+    """
+    chunks = ['{"name": "스트리밍", '.encode(), '"department": "피부과"}'.encode()]
+    res = gateway_client.post(
+        "/api/v1/admin/doctors",
+        content=iter(chunks),
+        headers={"content-type": "application/json"},
+    )
+    assert res.status_code in (200, 201), res.text
+    assert res.json()["name"] == "스트리밍"
+
+    res = gateway_client.get("/api/v1/patient/appointments", headers=auth_header)
+    assert res.status_code == 200, res.text
+    assert res.headers["content-type"] == "application/json"
+    assert res.json() == []
+
+    res = gateway_client.get("/api/v1/patient/appointments")
+    assert res.status_code == 401, res.text
+
+
+def test_gateway_streaming_matches_buffered(gateway_client, seed_master, monkeypatch):
+    """
+    [정상] 같은 요청의 응답 본문/상태가 버퍼링 모드와 동일
+    """
+    buffered = gateway_client.get("/api/v1/patient/doctors")
+    monkeypatch.setattr(gateway_main, "STREAMING", True)
+    monkeypatch.setattr(gateway_main, "COALESCE", False)
+    streamed = gateway_client.get("/api/v1/patient/doctors")
+
+    assert streamed.status_code == buffered.status_code == 200
+    assert streamed.content == buffered.content
+    assert streamed.headers["content-length"] == buffered.headers["content-length"]
+
+
+def test_gateway_streaming_with_default_coalescing(gateway_client, seed_master, auth_header, streaming, monkeypatch):
+    """
+    [정상] GATEWAY_COALESCE 기본값(true)에서도 캐시 규칙 밖의 GET은 스트리밍, 공개 경로만 합치기(버퍼링)
+    """
+    assert gateway_main.COALESCE
+    upstream = gateway_app.state.upstreams["patient"]
+    send = upstream.send
+    streamed = []
+
+    async def recording_send(*args, **kwargs):
+        streamed.append((kwargs["path"], kwargs.get("stream", False)))
+        return await send(*args, **kwargs)
+
+    monkeypatch.setattr(upstream, "send", recording_send)
+
+    res = gateway_client.get("/api/v1/patient/appointments", headers=auth_header)
+    assert res.status_code == 200, res.text
+    res = gateway_client.get("/api/v1/patient/doctors")
+    assert res.status_code == 200, res.text
+
+    assert streamed == [("/api/v1/patient/appointments", True), ("/api/v1/patient/doctors", False)]
+
+
+def test_gateway_streaming_releases_upstream_on_client_disconnect(monkeypatch, streaming):
+    """
+    [예외] 스트리밍 도중 클라이언트가 끊어도 upstream 응답을 닫고 진행 중 요청 수를 돌려줌
+    """
+    async def endless():
+        while True:
+            yield b"row\n"
+            await asyncio.sleep(0.01)
+
+    upstream = Upstream("patient", "http://a", transport=httpx.MockTransport(lambda request: httpx.Response(200, content=endless())))
+    monkeypatch.setattr(gateway_app.state, "upstreams", {"patient": upstream, "admin": upstream}, raising=False)
+    monkeypatch.setattr(gateway_app.state, "response_cache", ResponseCache(0, []), raising=False)
+
+    async def run():
+        sent = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            #첫 본문 조각을 보낸 뒤 연결이 끊긴 것처럼 동작 (ASGI 2.4: send가 OSError)
+            if message["type"] == "http.response.body" and sent:
+                raise OSError("client disconnected")
+            if message["type"] == "http.response.body":
+                assert upstream.in_flight == 1
+                sent.append(message["body"])
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": "/api/v1/patient/doctors", "raw_path": b"/api/v1/patient/doctors",
+            "query_string": b"", "root_path": "", "headers": [(b"host", b"testserver")],
+            "client": ("testclient", 50000), "server": ("testserver", 80),
+        }
+        with pytest.raises(ClientDisconnect):
+            await asyncio.wait_for(gateway_app(scope, receive, send), timeout=5)
+        assert sent == [b"row\n"]
+        assert upstream.in_flight == upstream.replicas[0].in_flight == 0
+        await upstream.aclose()
+
+    asyncio.run(run())
+
+# =========================================================
+# In-process dispatch mode (GATEWAY_MODE=inprocess)
+# =========================================================
+@pytest.fixture()
+def inprocess_client(monkeypatch, override_db):
+    """
+    gateway_client와 달리 httpx transport를 바꾸지 않음 (upstream 호스트로 실제 연결하지 않고 앱을 직접 호출해야 통과)
+    """
+    monkeypatch.setattr(gateway_main, "MODE", "inprocess")
+    with TestClient(gateway_app) as c:
+        yield c
+
+
+def test_gateway_inprocess_mode_same_surface(inprocess_client, seed_master):
+    """
+    [정상] inprocess 모드에서도 같은 URL/상태 코드/헤더 처리
+    """
+    res = inprocess_client.post(
+        "/api/v1/patient/auth/patient/login",
+        json={"phone_number": "010-3333-4444", "name": "김철수"},
+    )
+    assert res.status_code == 200, res.text
+    header = {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+    assert inprocess_client.get("/api/v1/patient/appointments", headers=header).json() == []
+    assert inprocess_client.get("/api/v1/patient/appointments").status_code == 401
+    assert inprocess_client.options("/api/v1/admin/doctors").status_code == 204
+
+    res = inprocess_client.post("/api/v1/admin/doctors", json={"name": "내부의사", "department": "피부과"})
+    assert res.status_code == 201, res.text
+    assert "x-cache-purge" not in res.headers
+    assert "내부의사" in [d["name"] for d in inprocess_client.get("/api/v1/patient/doctors/").json()]
+
+    stats = inprocess_client.get("/gateway/stats").json()
+    assert stats["patient"]["requests"] == 4
+    assert stats["admin"]["requests"] == 1
@@ -0,0 +1,112 @@
+# tests/test_gateway_cache.py
+from __future__ import annotations
+
+import time
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from apps.gateway.main import app as gateway_app
+from apps.gateway.response_cache import DEFAULT_CACHE_RULES, ResponseCache, parse_rules
+
+
+# =========================================================
+# Response cache for public GETs (GATEWAY_CACHE_SIZE / GATEWAY_CACHE_RULES)
+# =========================================================
+@pytest.fixture()
+def response_cache(gateway_client):
+    cache = ResponseCache(128, parse_rules(DEFAULT_CACHE_RULES))
+    gateway_app.state.response_cache = cache
+    return cache
+
+
+def test_gateway_cache_hit_and_etag(gateway_client, seed_master, response_cache):
+    """
+    [정상] 두 번째 GET은 upstream 없이 캐시에서 응답, If-None-Match 일치 시 304
+    """
+    first = gateway_client.get("/api/v1/patient/doctors/")
+    second = gateway_client.get("/api/v1/patient/doctors/")
+    assert (first.headers["x-cache"], second.headers["x-cache"]) == ("MISS", "HIT")
+    assert first.content == second.content
+    assert first.headers["etag"] == second.headers["etag"]
+    assert gateway_app.state.upstreams["patient"].requests == 1
+
+    res = gateway_client.get("/api/v1/patient/doctors/", headers={"If-None-Match": first.headers["etag"]})
+    assert res.status_code == 304
+    assert res.content == b""
+    assert res.headers["etag"] == first.headers["etag"]
+
+    res = gateway_client.get("/api/v1/patient/doctors/", headers={"If-None-Match": '"stale"'})
+    assert res.status_code == 200
+
+
+def test_gateway_cache_purged_by_upstream_hint(gateway_client, seed_master, response_cache):
+    """
+    [정상] 예약 생성/의사 등록 응답의 X-Cache-Purge 힌트로 관련 캐시 항목 제거 (힌트 헤더는 클라이언트에 전달하지 않음)
+    """
+    doctor_id = seed_master["doctor"].id
+    treatment_id = seed_master["treatment"].id
+    day = date.today() + timedelta(days=6)
+    params = {"date": day.isoformat(), "treatment_id": treatment_id}
+    url = f"/api/v1/patient/availability/{doctor_id}/availability"
+
+    assert "10:00" in gateway_client.get(url, params=params).json()["available_start_times"]
+    assert gateway_client.get(url, params=params).headers["x-cache"] == "HIT"
+
+    res = gateway_client.post(
+        "/api/v1/patient/appointments",
+        json={
+            "patient_name": "김철수",
+            "patient_phone": "010-3333-4444",
+            "doctor_id": doctor_id,
+            "treatment_id": treatment_id,
+            "start_datetime": datetime.combine(day, datetime.min.time()).replace(hour=10).isoformat(),
+            "memo": "",
+        },
+    )
+    assert res.status_code == 201, res.text
+    assert "x-cache-purge" not in res.headers
+
+    res = gateway_client.get(url, params=params)
+    assert res.headers["x-cache"] == "MISS"
+    assert "10:00" not in res.json()["available_start_times"]
+
+    gateway_client.get("/api/v1/patient/doctors/")
+    assert gateway_client.post("/api/v1/admin/doctors", json={"name": "새의사", "department": "피부과"}).status_code == 201
+    res = gateway_client.get("/api/v1/patient/doctors/")
+    assert res.headers["x-cache"] == "MISS"
+    assert "새의사" in [d["name"] for d in res.json()]
+
+
+def test_gateway_cache_skips_private_and_opt_out(gateway_client, seed_master, auth_header, response_cache):
+    """
+    [정상] 인증 헤더가 있는 요청, upstream이 no-store로 거부한 응답, 오류 응답은 캐시하지 않음
+    """
+    for _ in range(2):
+        res = gateway_client.get("/api/v1/patient/availability/cache-stats")
+        assert res.status_code == 200 and "x-cache" not in res.headers
+        res = gateway_client.get("/api/v1/patient/doctors/", headers=auth_header)
+        assert "x-cache" not in res.headers
+        res = gateway_client.get("/api/v1/patient/availability/999/availability", params={"date": "bad"})
+        assert res.status_code == 422 and "x-cache" not in res.headers
+    assert response_cache.stats()["size"] == 0
+
+
+def test_gateway_cache_ttl_per_rule(gateway_client, seed_master):
+    """
+    [정상] 규칙별 유지 시간이 지나면 다시 upstream 호출
+    """
+    gateway_app.state.response_cache = ResponseCache(128, parse_rules("/api/v1/patient/doctors=0.05"))
+    assert gateway_client.get("/api/v1/patient/doctors/").headers["x-cache"] == "MISS"
+    assert gateway_client.get("/api/v1/patient/doctors/").headers["x-cache"] == "HIT"
+    time.sleep(0.1)
+    assert gateway_client.get("/api/v1/patient/doctors/").headers["x-cache"] == "MISS"
+
+
+def test_gateway_cache_rules_parsing():
+    """
+    [정상] 긴 prefix 우선, [예외] 형식 오류
+    """
+    assert parse_rules("/a=1, /a/b=2") == [("/a/b", 2.0), ("/a", 1.0)]
+    with pytest.raises(ValueError):
+        parse_rules("/a")
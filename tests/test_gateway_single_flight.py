@@ -0,0 +1,87 @@
+# tests/test_gateway_single_flight.py
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import pytest
+
+from apps.gateway.main import app as gateway_app
+from apps.gateway.single_flight import SingleFlight
+
+
+# =========================================================
+# Single-flight coalescing of identical concurrent GETs
+# =========================================================
+@pytest.fixture()
+def slow_patient_upstream(gateway_client, monkeypatch):
+    """
+    patient upstream 호출을 0.2초 늦춰서 동시 요청이 겹치게 함
+    """
+    upstream = gateway_app.state.upstreams["patient"]
+    send = upstream.send
+
+    async def slow_send(*args, **kwargs):
+        await asyncio.sleep(0.2)
+        return await send(*args, **kwargs)
+
+    monkeypatch.setattr(upstream, "send", slow_send)
+    return upstream
+
+
+def test_gateway_coalesces_identical_concurrent_gets(gateway_client, seed_master, slow_patient_upstream):
+    """
+    [정상] 동시에 들어온 같은 GET 8개는 upstream 호출 1번, 나머지 7개는 합쳐짐
+    """
+    url = f"/api/v1/patient/availability/{seed_master['doctor'].id}/availability"
+    params = {"date": (date.today() + timedelta(days=3)).isoformat(), "treatment_id": seed_master["treatment"].id}
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        responses = list(pool.map(lambda _: gateway_client.get(url, params=params), range(8)))
+
+    assert all(res.status_code == 200 for res in responses)
+    assert len({res.content for res in responses}) == 1
+    assert slow_patient_upstream.requests == 1
+    coalescing = gateway_client.get("/gateway/stats").json()["coalescing"]
+    assert coalescing == {"leaders": 1, "coalesced": 7, "in_flight": 0}
+
+
+def test_gateway_does_not_coalesce_different_users(gateway_client, seed_master, auth_header, slow_patient_upstream):
+    """
+    [정상] Authorization이 다른 요청은 합치지 않음
+    """
+    before = slow_patient_upstream.requests
+    headers = [auth_header, {}, auth_header, {}]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        responses = list(pool.map(lambda h: gateway_client.get("/api/v1/patient/appointments", headers=h), headers))
+
+    assert [res.status_code for res in responses] == [200, 401, 200, 401]
+    assert slow_patient_upstream.requests - before == 2
+
+
+def test_single_flight_shares_result_and_errors():
+    """
+    [정상] 같은 키의 동시 호출은 fn 1번 실행, 예외도 함께 전달, 끝나면 다시 실행
+    """
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return len(calls)
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        raise RuntimeError("upstream down")
+
+    async def run():
+        flight = SingleFlight()
+        assert await asyncio.gather(*(flight.do("k", fetch) for _ in range(5))) == [1] * 5
+        results = await asyncio.gather(*(flight.do("e", failing) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert await flight.do("k", fetch) == 3
+        return flight.stats()
+
+    assert asyncio.run(run()) == {"leaders": 3, "coalesced": 6, "in_flight": 0}
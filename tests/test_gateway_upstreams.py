@@ -0,0 +1,122 @@
+# tests/test_gateway_upstreams.py
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+
+from apps.gateway.main import app as gateway_app
+from apps.gateway.upstreams import Upstream
+
+
+# =========================================================
+# Multi-replica upstreams (load balancing, health checks, retries)
+# =========================================================
+_REAL_ASYNC_CLIENT = httpx.AsyncClient
+
+
+def _replicated_upstream(monkeypatch, handler, urls="http://a,http://b", strategy="round_robin"):
+    monkeypatch.setattr(
+        httpx,
+        "AsyncClient",
+        lambda *args, **kwargs: _REAL_ASYNC_CLIENT(*args, transport=httpx.MockTransport(handler), **kwargs),
+    )
+    monkeypatch.setenv("GATEWAY_LB_STRATEGY", strategy)
+    return Upstream("patient", urls)
+
+
+def test_upstream_round_robin_and_least_outstanding(monkeypatch):
+    """
+    [정상] round_robin은 순서대로, least_outstanding은 진행 중 요청이 적은 replica 선택
+    - 스트리밍 응답은 닫을 때까지 진행 중으로 계산
+    """
+    seen = []
+
+    async def body():
+        yield b"ok"
+
+    def handler(request):
+        seen.append(request.url.host)
+        return httpx.Response(200, content=body())
+
+    async def run():
+        upstream = _replicated_upstream(monkeypatch, handler, "http://a, http://b, http://c")
+        for _ in range(6):
+            await upstream.send("GET", "/x", headers={})
+        assert seen == ["a", "b", "c", "a", "b", "c"]
+
+        upstream = _replicated_upstream(monkeypatch, handler, strategy="least_outstanding")
+        streamed = await upstream.send("GET", "/x", headers={}, stream=True)
+        busy = upstream.replicas[0] if streamed.url.host == "a" else upstream.replicas[1]
+        assert busy.in_flight == 1
+        for _ in range(4):
+            assert (await upstream.send("GET", "/x", headers={})).url.host != streamed.url.host
+        await streamed.aclose()
+        assert upstream.in_flight == busy.in_flight == 0
+        await upstream.aclose()
+
+    asyncio.run(run())
+
+
+def test_upstream_retries_idempotent_on_other_replica(monkeypatch):
+    """
+    [정상] 연결 실패한 replica는 제외되고 GET은 다른 replica로 한 번 재시도
+    [예외] POST는 재시도하지 않음
+    """
+    def handler(request):
+        if request.url.host == "b":
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(200)
+
+    async def run():
+        upstream = _replicated_upstream(monkeypatch, handler, "http://b,http://a")
+        res = await upstream.send("GET", "/x", headers={})
+        assert (res.status_code, res.url.host) == (200, "a")
+        assert upstream.retries == 1
+        assert [r["healthy"] for r in upstream.stats()["replicas"]] == [False, True]
+        for _ in range(3):
+            assert (await upstream.send("GET", "/x", headers={})).url.host == "a"
+
+        upstream = _replicated_upstream(monkeypatch, handler, "http://b,http://a")
+        with pytest.raises(httpx.ConnectError):
+            await upstream.send("POST", "/x", headers={}, content=b"{}")
+        assert upstream.retries == 0
+
+    asyncio.run(run())
+
+
+def test_upstream_health_check_ejects_and_restores(monkeypatch):
+    """
+    [정상] 헬스 체크 실패 replica는 제외, 다시 성공하면 바로 복귀
+    """
+    down = {"b"}
+
+    def handler(request):
+        if request.url.path == "/health" and request.url.host in down:
+            return httpx.Response(503)
+        return httpx.Response(200)
+
+    async def run():
+        upstream = _replicated_upstream(monkeypatch, handler)
+        await upstream.check_health()
+        assert [r["healthy"] for r in upstream.stats()["replicas"]] == [True, False]
+        assert {(await upstream.send("GET", "/x", headers={})).url.host for _ in range(4)} == {"a"}
+
+        down.clear()
+        await upstream.check_health()
+        assert {(await upstream.send("GET", "/x", headers={})).url.host for _ in range(4)} == {"a", "b"}
+
+    asyncio.run(run())
+
+
+def test_gateway_returns_502_when_upstream_unreachable(gateway_client, monkeypatch):
+    """
+    [예외] 모든 replica 연결 실패 시 502
+    """
+    async def unreachable(*args, **kwargs):
+        raise httpx.ConnectError("connection refused")
+
+    monkeypatch.setattr(gateway_app.state.upstreams["admin"], "send", unreachable)
+    res = gateway_client.get("/api/v1/admin/doctors")
+    assert res.status_code == 502, res.text
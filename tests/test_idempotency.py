@@ -0,0 +1,174 @@
+# tests/test_idempotency.py
+from __future__ import annotations
+
+import hashlib
+from datetime import date, datetime, time, timedelta
+
+from core.config import get_settings
+from core.models import Appointment, Doctor, IdempotencyKey
+from core.business.appointments import create_appointment
+from core.business.idempotency import (
+    begin_attempt,
+    begin_idempotent,
+    finish_idempotent,
+    purge_idempotency_keys,
+    record_idempotent,
+    scoped_key,
+)
+from core.schemas import AppointmentCreate
+
+
+# =========================================================
+# Idempotency-Key (POST /appointments)
+# =========================================================
+def test_create_appointment_idempotency_key_replays_first_response(gateway_client, seed_master, db_session):
+    """
+    [정상] 같은 Idempotency-Key 재요청
+    - 첫 응답(201)을 그대로 반환하고 예약은 1건만 생성
+    - 실패 응답(400)도 같은 키로 재요청하면 그대로 반환
+    """
+    doctor_id = seed_master["doctor"].id
+    treatment_id = seed_master["treatment"].id
+    payload = {
+        "patient_name": "김철수",
+        "patient_phone": "010-3333-4444",
+        "doctor_id": doctor_id,
+        "treatment_id": treatment_id,
+        "start_datetime": datetime.combine(date.today() + timedelta(days=10), time(10, 0)).isoformat(),
+        "memo": "",
+    }
+    headers = {"Idempotency-Key": "retry-1"}
+
+    first = gateway_client.post("/api/v1/patient/appointments", json=payload, headers=headers)
+    replay = gateway_client.post("/api/v1/patient/appointments", json=payload, headers=headers)
+    assert first.status_code == 201, first.text
+    assert replay.status_code == 201, replay.text
+    assert replay.json() == first.json()
+    assert replay.headers.get("idempotent-replayed") == "true"
+    assert db_session.query(Appointment).filter(Appointment.doctor_id == doctor_id).count() == 1
+
+    #의사 중복으로 실패한 요청도 저장된 응답으로 재생
+    failed = gateway_client.post("/api/v1/patient/appointments", json=payload, headers={"Idempotency-Key": "retry-2"})
+    failed_replay = gateway_client.post("/api/v1/patient/appointments", json=payload, headers={"Idempotency-Key": "retry-2"})
+    assert failed.status_code == 400, failed.text
+    assert failed_replay.status_code == 400
+    assert failed_replay.json() == failed.json()
+
+
+def test_create_appointment_idempotency_key_reused_or_in_progress(gateway_client, seed_master, db_session, monkeypatch):
+    """
+    [예외] 같은 키를 다른 본문으로 재사용하면 422, 첫 요청이 끝나지 않으면 대기 후 409
+    """
+    payload = {
+        "patient_name": "김철수",
+        "patient_phone": "010-3333-4444",
+        "doctor_id": seed_master["doctor"].id,
+        "treatment_id": seed_master["treatment"].id,
+        "start_datetime": datetime.combine(date.today() + timedelta(days=10), time(11, 0)).isoformat(),
+        "memo": "",
+    }
+    first = gateway_client.post("/api/v1/patient/appointments", json=payload, headers={"Idempotency-Key": "k-1"})
+    assert first.status_code == 201, first.text
+    reused = gateway_client.post(
+        "/api/v1/patient/appointments", json={**payload, "memo": "다른 요청"}, headers={"Idempotency-Key": "k-1"},
+    )
+    assert reused.status_code == 422, reused.text
+
+    monkeypatch.setattr(get_settings(), "idempotency_wait_seconds", 0.05)
+    request_hash = hashlib.sha256(AppointmentCreate(**payload).model_dump_json().encode()).hexdigest()
+    key = scoped_key(payload["patient_phone"], "k-2")
+    db_session.add(IdempotencyKey(key=key, request_hash=request_hash, status_code=None, response_body=None, created_at=datetime.now()))
+    db_session.flush()
+    in_progress = gateway_client.post("/api/v1/patient/appointments", json=payload, headers={"Idempotency-Key": "k-2"})
+    assert in_progress.status_code == 409, in_progress.text
+
+    #응답 없이 lease가 지난 선점은 중단된 요청으로 보고 다시 선점
+    monkeypatch.setattr(get_settings(), "idempotency_lease_seconds", 0.0)
+    payload["start_datetime"] = datetime.combine(date.today() + timedelta(days=10), time(14, 0)).isoformat()
+    request_hash = hashlib.sha256(AppointmentCreate(**payload).model_dump_json().encode()).hexdigest()
+    db_session.get(IdempotencyKey, key).request_hash = request_hash
+    db_session.flush()
+    resumed = gateway_client.post("/api/v1/patient/appointments", json=payload, headers={"Idempotency-Key": "k-2"})
+    assert resumed.status_code == 201, resumed.text
+
+
+def test_idempotency_key_scoped_per_patient(gateway_client, seed_master, db_session):
+    """
+    [정상] 같은 Idempotency-Key라도 환자(전화번호)가 다르면 서로의 응답을 읽거나 막지 않음
+    """
+    payload = {
+        "patient_name": "김철수",
+        "patient_phone": "010-3333-4444",
+        "doctor_id": seed_master["doctor"].id,
+        "treatment_id": seed_master["treatment"].id,
+        "start_datetime": datetime.combine(date.today() + timedelta(days=10), time(15, 0)).isoformat(),
+        "memo": "",
+    }
+    headers = {"Idempotency-Key": "shared-key"}
+    mine = gateway_client.post("/api/v1/patient/appointments", json=payload, headers=headers)
+    other = gateway_client.post(
+        "/api/v1/patient/appointments",
+        json={**payload, "patient_name": "박영희", "patient_phone": "010-5555-6666",
+              "start_datetime": datetime.combine(date.today() + timedelta(days=10), time(16, 0)).isoformat()},
+        headers=headers,
+    )
+    assert mine.status_code == 201, mine.text
+    assert other.status_code == 201, other.text
+    assert "idempotent-replayed" not in other.headers
+    assert other.json()["id"] != mine.json()["id"]
+    assert db_session.query(IdempotencyKey).filter(IdempotencyKey.key == "shared-key").count() == 0
+
+
+def test_idempotent_response_stored_with_appointment(db_session, seed_master):
+    """
+    [정상] 성공 응답은 예약과 같은 트랜잭션으로, 실패 응답은 처리 중 변경을 버린 뒤 저장
+    """
+    key = scoped_key("010-3333-4444", "tx-1")
+    assert begin_idempotent(db_session, key, "hash") is None
+
+    def store_response(appt):
+        #commit 전에는 예약에 id가 있고 아직 응답만 같은 트랜잭션에 쌓인 상태
+        assert appt.id is not None
+        record_idempotent(db_session, key, 201, '{"id": %d}' % appt.id)
+
+    appt = create_appointment(
+        db_session,
+        patient_name="김철수",
+        patient_phone="010-3333-4444",
+        doctor_id=seed_master["doctor"].id,
+        treatment_id=seed_master["treatment"].id,
+        start_dt=datetime.combine(date.today() + timedelta(days=10), time(9, 0)),
+        memo="",
+        before_commit=store_response,
+    )
+    assert begin_idempotent(db_session, key, "hash") == (201, '{"id": %d}' % appt.id)
+
+    failed_key = scoped_key("010-3333-4444", "tx-2")
+    assert begin_idempotent(db_session, failed_key, "hash") is None
+    attempt = begin_attempt(db_session)
+    db_session.add(Doctor(name="버려질의사", department="피부과"))
+    db_session.flush()
+    finish_idempotent(db_session, failed_key, 400, '{"detail": "x"}', attempt)
+    assert db_session.query(Doctor).filter(Doctor.name == "버려질의사").count() == 0
+    assert begin_idempotent(db_session, failed_key, "hash") == (400, '{"detail": "x"}')
+
+
+def test_purge_idempotency_keys_in_batches(db_session, monkeypatch):
+    """
+    [정상] 보관 시간이 지난 키만 배치 단위로 삭제 (처리 중 키 포함), 보관 중인 키는 유지
+    """
+    monkeypatch.setattr(get_settings(), "idempotency_ttl_seconds", 3600.0)
+    now = datetime.now()
+    for i in range(5):
+        db_session.add(IdempotencyKey(
+            key=scoped_key("010-3333-4444", f"old-{i}"), request_hash="hash",
+            status_code=201 if i % 2 else None, response_body="{}" if i % 2 else None,
+            created_at=now - timedelta(hours=2, minutes=i),
+        ))
+    fresh = scoped_key("010-3333-4444", "fresh")
+    db_session.add(IdempotencyKey(key=fresh, request_hash="hash", status_code=201, response_body="{}", created_at=now))
+    db_session.flush()
+
+    assert purge_idempotency_keys(db_session, batch_size=2, now=now) == 5
+    assert [k.key for k in db_session.query(IdempotencyKey).all()] == [fresh]
+    assert purge_idempotency_keys(db_session, batch_size=2, now=now) == 0
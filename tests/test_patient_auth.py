@@ -0,0 +1,123 @@
+# tests/test_patient_auth.py
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from core.config import get_settings
+from core.models import PatientSessionToken
+from core.business.patient_auth import purge_session_tokens
+from tests.helpers import count_statements, login
+
+
+# =========================================================
+# Bearer token validation cache
+# =========================================================
+def test_patient_token_cached_within_session(gateway_client, seed_master, db_session, auth_header):
+    """
+    [정상] 같은 토큰의 두 번째 요청부터는 patient_session_tokens를 조회하지 않음
+    """
+    assert gateway_client.get("/api/v1/patient/appointments", headers=auth_header).status_code == 200
+
+    with count_statements(db_session.connection()) as statements:
+        res = gateway_client.get("/api/v1/patient/appointments", headers=auth_header)
+    assert res.status_code == 200, res.text
+    assert not any("patient_session_tokens" in s for s in statements), statements
+
+
+def test_patient_token_invalid_after_relogin(gateway_client, seed_master, auth_header):
+    """
+    [예외] 재로그인하면 캐시에 있던 기존 토큰은 401 (단일 세션)
+    """
+    assert gateway_client.get("/api/v1/patient/appointments", headers=auth_header).status_code == 200
+
+    new_header = login(gateway_client)
+    assert gateway_client.get("/api/v1/patient/appointments", headers=auth_header).status_code == 401
+    assert gateway_client.get("/api/v1/patient/appointments", headers=new_header).status_code == 200
+
+
+def test_patient_inactive_token_rejected(gateway_client, seed_master, db_session, auth_header):
+    """
+    [예외] is_active=False 토큰은 401
+    """
+    token = auth_header["Authorization"].split()[1]
+    db_session.query(PatientSessionToken).filter(PatientSessionToken.access_token == token).update({"is_active": False})
+    db_session.flush()
+
+    res = gateway_client.get("/api/v1/patient/appointments", headers=auth_header)
+    assert res.status_code == 401, res.text
+
+
+# =========================================================
+# Signed (stateless) patient tokens
+# =========================================================
+@pytest.fixture()
+def signed_tokens(monkeypatch):
+    monkeypatch.setattr(get_settings(), "patient_token_mode", "signed")
+    monkeypatch.setattr(get_settings(), "patient_token_secret", "test-secret")
+
+
+def test_patient_signed_token_skips_db(gateway_client, seed_master, db_session, signed_tokens):
+    """
+    [정상] signed 모드: 토큰을 저장하지 않고, 검증에 DB 조회가 없음
+    """
+    header = login(gateway_client)
+    assert header["Authorization"].split()[1].startswith("p1.")
+    assert db_session.query(PatientSessionToken).count() == 0
+
+    with count_statements(db_session.connection()) as statements:
+        res = gateway_client.get("/api/v1/patient/appointments", headers=header)
+    assert res.status_code == 200, res.text
+    assert len(statements) == 1 and "appointments" in statements[0], statements
+
+
+def test_patient_signed_token_single_session(gateway_client, seed_master, signed_tokens):
+    """
+    [예외] signed 모드에서도 재로그인하면 이전 토큰은 401, 변조된 토큰도 401
+    """
+    old_header = login(gateway_client)
+    new_header = login(gateway_client)
+    assert gateway_client.get("/api/v1/patient/appointments", headers=old_header).status_code == 401
+    assert gateway_client.get("/api/v1/patient/appointments", headers=new_header).status_code == 200
+
+    token = new_header["Authorization"].split()[1]
+    patient_id = token.split(".")[1]
+    forged = token.replace(f"p1.{patient_id}.", f"p1.{int(patient_id) + 1}.", 1)
+    res = gateway_client.get("/api/v1/patient/appointments", headers={"Authorization": f"Bearer {forged}"})
+    assert res.status_code == 401, res.text
+
+
+def test_patient_signed_token_rejected_in_db_mode(gateway_client, seed_master, monkeypatch, signed_tokens):
+    """
+    [예외] 기본(db) 모드로 되돌리면 서명 토큰은 401
+    """
+    header = login(gateway_client)
+    monkeypatch.setattr(get_settings(), "patient_token_mode", "db")
+    assert gateway_client.get("/api/v1/patient/appointments", headers=header).status_code == 401
+
+
+# =========================================================
+# Session token purge
+# =========================================================
+def test_purge_session_tokens_in_batches(gateway_client, seed_master, db_session):
+    """
+    [정상] 만료/비활성 토큰만 배치 단위로 삭제, 현재 토큰은 유지
+    """
+    for _ in range(5):
+        header = login(gateway_client)
+    patient_id = seed_master["patients"][1].id
+    expired = PatientSessionToken(
+        patient_id=patient_id,
+        access_token="expired-token",
+        is_active=True,
+        expires_at=datetime.utcnow() - timedelta(minutes=1),
+    )
+    db_session.add(expired)
+    db_session.flush()
+
+    assert purge_session_tokens(db_session, batch_size=2) == 5
+    remaining = db_session.query(PatientSessionToken).all()
+    assert [t.access_token for t in remaining] == [header["Authorization"].split()[1]]
+    assert gateway_client.get("/api/v1/patient/appointments", headers=header).status_code == 200
+    assert purge_session_tokens(db_session, batch_size=2) == 0
@@ -0,0 +1,64 @@
+# tests/test_patient_visits.py
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+
+from core.models import Appointment, Patient
+from core.business.patient_visits import backfill_active_appointment_counts
+from tests.helpers import book
+
+
+# =========================================================
+# Persisted first-visit counter (patients.active_appointment_count)
+# =========================================================
+def test_first_visit_counter_follows_create_and_cancel(gateway_client, seed_master, db_session):
+    """
+    [정상] 첫 예약은 first, 다음 예약은 followup
+    - 예약을 모두 취소하면 다시 first
+    - backfill 결과가 트랜잭션으로 갱신한 값과 동일
+    """
+    doctor_id = seed_master["doctor"].id
+    treatment_id = seed_master["treatment"].id
+    patient = ("박영희", "010-5555-6666")
+    day = date.today() + timedelta(days=8)
+
+    first = book(gateway_client, doctor_id, treatment_id, datetime.combine(day, time(9, 0)), patient=patient)
+    second = book(gateway_client, doctor_id, treatment_id, datetime.combine(day, time(10, 0)), patient=patient)
+    assert first.json()["is_first_visit"] == "first"
+    assert second.json()["is_first_visit"] == "followup"
+
+    for res in (first, second):
+        canceled = gateway_client.patch(f"/api/v1/admin/appointments/{res.json()['id']}/status", json={"status": "canceled"})
+        assert canceled.status_code == 200, canceled.text
+
+    third = book(gateway_client, doctor_id, treatment_id, datetime.combine(day, time(11, 0)), patient=patient)
+    assert third.json()["is_first_visit"] == "first"
+
+    patient_row = db_session.get(Patient, third.json()["patient_id"])
+    db_session.refresh(patient_row)
+    assert patient_row.active_appointment_count == 1
+    assert backfill_active_appointment_counts(db_session) == 0
+
+
+def test_backfill_active_appointment_counts(db_session, seed_master):
+    """
+    [정상] 직접 넣은 예약(카운터 미반영)을 backfill이 반영
+    """
+    patient = seed_master["patients"][0]
+    for status in ("pending", "completed", "canceled"):
+        start = datetime.combine(date.today() + timedelta(days=9), time(9, 0))
+        db_session.add(Appointment(
+            patient_id=patient.id,
+            doctor_id=seed_master["doctor"].id,
+            treatment_id=seed_master["treatment"].id,
+            start_datetime=start,
+            end_datetime=start + timedelta(minutes=30),
+            status=status,
+            is_first_visit="first",
+            memo="",
+        ))
+    db_session.flush()
+
+    assert backfill_active_appointment_counts(db_session) == 1
+    db_session.refresh(patient)
+    assert patient.active_appointment_count == 2
@@ -0,0 +1,140 @@
+# tests/test_reschedule.py
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from core.config import get_settings
+from core.models import Appointment, Doctor, SlotOccupancy
+from core.business.appointments import apply_cancellation, create_appointment, reschedule_appointment
+from core.business.slot_occupancy import move_slots, rebuild_slot_occupancy, release_slots
+from tests.helpers import book
+
+
+# =========================================================
+# Reschedule (PATCH /appointments/{id}/reschedule)
+# =========================================================
+@pytest.mark.parametrize("mode", ["memory", "aggregate", "counter"])
+def test_patient_reschedule_overlapping_own_interval(gateway_client, seed_master, db_session, auth_header, monkeypatch, mode):
+    """
+    [정상] 자기 자신의 기존 구간과 겹치게 옮겨도 성공
+    - 10:00~10:30 슬롯은 (내 예약 + 다른 의사 예약)으로 정원(2)이 찼지만 내 예약을 빼면 여유가 있음
+    - 예약 가능 시간 캐시/슬롯 카운터도 옮긴 구간으로 반영
+    """
+    monkeypatch.setattr(get_settings(), "capacity_check_mode", mode)
+    other = Doctor(name="의사1", department="피부과")
+    db_session.add(other)
+    db_session.flush()
+    treatment_id = seed_master["treatment"].id
+    start_dt = datetime.combine(date.today() + timedelta(days=11), time(10, 0))
+
+    mine = book(gateway_client, seed_master["doctor"].id, treatment_id, start_dt)
+    assert mine.status_code == 201, mine.text
+    assert book(gateway_client, other.id, treatment_id, start_dt, patient=("박영희", "010-5555-6666")).status_code == 201
+
+    res = gateway_client.patch(
+        f"/api/v1/patient/appointments/{mine.json()['id']}/reschedule",
+        headers=auth_header,
+        json={"start_datetime": (start_dt + timedelta(minutes=15)).isoformat()},
+    )
+    assert res.status_code == 200, res.text
+    assert res.json()["start_datetime"].startswith(f"{start_dt.date().isoformat()}T10:15")
+    assert res.json()["end_datetime"].startswith(f"{start_dt.date().isoformat()}T10:45")
+
+    availability = gateway_client.get(
+        f"/api/v1/patient/availability/{seed_master['doctor'].id}/availability",
+        params={"date": start_dt.date().isoformat(), "treatment_id": treatment_id},
+    ).json()["available_start_times"]
+    assert "10:00" not in availability and "10:15" not in availability and "10:45" in availability
+
+    if mode == "counter":
+        counters = {(r.slot_date, r.slot_id): r.used for r in db_session.query(SlotOccupancy).all() if r.used}
+        rebuild_slot_occupancy(db_session)
+        assert counters == {(r.slot_date, r.slot_id): r.used for r in db_session.query(SlotOccupancy).all()}
+
+
+def test_patient_reschedule_to_full_slot_keeps_original(gateway_client, seed_master, db_session, auth_header):
+    """
+    [예외] 정원이 찬 시간으로 옮기면 400, 기존 예약은 그대로
+    - 다른 환자 예약은 404
+    """
+    doctors = [Doctor(name=f"의사{i}", department="피부과") for i in range(2)]
+    db_session.add_all(doctors)
+    db_session.flush()
+    treatment_id = seed_master["treatment"].id
+    start_dt = datetime.combine(date.today() + timedelta(days=12), time(9, 0))
+    full_dt = datetime.combine(start_dt.date(), time(15, 0))
+
+    mine = book(gateway_client, seed_master["doctor"].id, treatment_id, start_dt)
+    for doctor in doctors:
+        assert book(gateway_client, doctor.id, treatment_id, full_dt, patient=("박영희", "010-5555-6666")).status_code == 201
+
+    res = gateway_client.patch(
+        f"/api/v1/patient/appointments/{mine.json()['id']}/reschedule",
+        headers=auth_header,
+        json={"start_datetime": full_dt.isoformat()},
+    )
+    assert res.status_code == 400, res.text
+    assert "capacity" in res.json()["detail"]
+    assert db_session.get(Appointment, mine.json()["id"]).start_datetime == start_dt
+
+    others = db_session.query(Appointment).filter(Appointment.doctor_id == doctors[0].id).first()
+    res = gateway_client.patch(
+        f"/api/v1/patient/appointments/{others.id}/reschedule",
+        headers=auth_header,
+        json={"start_datetime": start_dt.isoformat()},
+    )
+    assert res.status_code == 404, res.text
+
+
+def test_stale_appointment_reread_under_lock(seed_master, db_session, monkeypatch):
+    """
+    [정상] 잠금 전에 읽어 둔 예약 객체가 다른 요청 때문에 낡았어도 잠금 안에서 다시 읽은 값으로 처리
+    - 다른 요청이 이미 옮긴 예약을 다시 옮기면 옮겨진 구간의 카운터를 이동
+    - 다른 요청이 이미 취소한 예약을 다시 취소해도 카운터는 한 번만 감소
+    """
+    monkeypatch.setattr(get_settings(), "capacity_check_mode", "counter")
+    target_date = date.today() + timedelta(days=13)
+    appt = create_appointment(
+        db_session,
+        patient_name="김철수",
+        patient_phone="010-3333-4444",
+        doctor_id=seed_master["doctor"].id,
+        treatment_id=seed_master["treatment"].id,
+        start_dt=datetime.combine(target_date, time(10, 0)),
+        memo="",
+    )
+
+    def moved_elsewhere(new_start: datetime):
+        #다른 요청의 시간 변경: 행과 카운터만 바꾸고 세션의 appt 객체는 그대로 둔다
+        move_slots(db_session, appt.start_datetime, appt.end_datetime, new_start, new_start + timedelta(minutes=30))
+        db_session.execute(
+            update(Appointment)
+            .where(Appointment.id == appt.id)
+            .values(start_datetime=new_start, end_datetime=new_start + timedelta(minutes=30))
+            .execution_options(synchronize_session=False)
+        )
+
+    def counters_match_rebuild():
+        counters = {(r.slot_date, r.slot_id): r.used for r in db_session.query(SlotOccupancy).all() if r.used}
+        rebuild_slot_occupancy(db_session)
+        return counters == {(r.slot_date, r.slot_id): r.used for r in db_session.query(SlotOccupancy).all()}
+
+    moved_elsewhere(datetime.combine(target_date, time(14, 0)))
+    assert appt.start_datetime.time() == time(10, 0)
+    reschedule_appointment(db_session, appt, datetime.combine(target_date, time(15, 0)))
+    assert appt.start_datetime.time() == time(15, 0)
+    assert counters_match_rebuild()
+
+    db_session.execute(
+        update(Appointment).where(Appointment.id == appt.id).values(status="canceled")
+        .execution_options(synchronize_session=False)
+    )
+    release_slots(db_session, appt.start_datetime, appt.end_datetime)
+    assert appt.status == "pending"
+    apply_cancellation(db_session, appt)
+    db_session.commit()
+    assert appt.status == "canceled"
+    assert counters_match_rebuild()